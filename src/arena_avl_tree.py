@@ -0,0 +1,760 @@
+"""
+An ordered symbol table of key-value pairs backed by an AVL tree whose nodes
+live in parallel, compact columns instead of one Python object per node.
+
+The keys and values are kept in lists, and the links, subtree sizes and
+heights in array('i') columns, all indexed by node id. Node id 0 is a
+sentinel standing for the empty subtree (size 0, height -1), so the hot
+loops never test for None. The ids of deleted nodes go on a free list and
+are reused by later insertions.
+
+The symbol table supports the same operations as avl_tree.AVLTreeST.
+"""
+from array import array
+
+from avl_tree import AVLTreeST
+from utils import sorted_items
+
+NIL = 0     # id of the sentinel node standing for the empty subtree
+
+
+class ArenaAVLTreeST(object):
+    """Symbol table implementation using an array-backed AVL tree.
+
+    The class represents an ordered symbol table of generic key-value pairs
+    with the same interface and semantics as AVLTreeST. The tree is stored
+    in columns indexed by node id, which takes far less memory than an
+    object per node and gives the garbage collector only a few containers
+    to scan.
+    """
+
+    VALIDATION_LEVELS = AVLTreeST.VALIDATION_LEVELS
+
+    def __init__(self, validation=None):
+        """It initializes an ordered symbol table.
+
+        Args:
+            validation: how much of the tree is checked after each mutation;
+                        "off", "path" or "full" (see AVLTreeST)
+        """
+        if validation is None:
+            validation = "path" if __debug__ else "off"
+        if validation not in self.VALIDATION_LEVELS:
+            raise ValueError(f"validation must be one of {self.VALIDATION_LEVELS}")
+        self.validation = validation
+        self._keys = [None]
+        self._values = [None]
+        self._left = array("i", [NIL])
+        self._right = array("i", [NIL])
+        self._size = array("i", [0])
+        self._height = array("i", [-1])
+        self._free = []          # ids of deleted nodes to be reused
+        self.root = NIL
+
+    # ****************************** Node Storage *****************************#
+    def _new_node(self, key, value):
+        """Allocate a leaf node, reusing a free slot if there is one.
+
+        Returns:
+            the id of the new node
+        """
+        if self._free:
+            x = self._free.pop()
+            self._keys[x] = key
+            self._values[x] = value
+            self._left[x] = self._right[x] = NIL
+            self._size[x] = 1
+            self._height[x] = 0
+            return x
+        self._keys.append(key)
+        self._values.append(value)
+        self._left.append(NIL)
+        self._right.append(NIL)
+        self._size.append(1)
+        self._height.append(0)
+        return len(self._keys) - 1
+
+    def _free_node(self, x):
+        """ Release the slot of the given node for reuse. """
+        self._keys[x] = self._values[x] = None
+        self._free.append(x)
+
+    def _update(self, x):
+        """ Recompute the size and height of x from its children. """
+        left, right = self._left[x], self._right[x]
+        self._size[x] = 1 + self._size[left] + self._size[right]
+        lh, rh = self._height[left], self._height[right]
+        self._height[x] = 1 + (lh if lh > rh else rh)
+
+    def _reset(self):
+        """ Drop all nodes and their storage. """
+        self._keys = [None]
+        self._values = [None]
+        self._left = array("i", [NIL])
+        self._right = array("i", [NIL])
+        self._size = array("i", [0])
+        self._height = array("i", [-1])
+        self._free = []
+        self.root = NIL
+
+    # ************************** End of Node Storage **************************#
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return self.root == NIL
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return self._size[self.root]
+
+    def height(self):
+        """Computes the height of the AVL tree.
+
+        The convention is that the height of a empty subtree is -1 and subtree
+        with one element is 0.
+        """
+        return self._height[self.root]
+
+    def contains(self, key):
+        """Check whether the symbol table contains the given key or not.
+
+        Args:
+            key: the key to check if it is in the table
+        Returns:
+            True if the tree contains the given key or False otherwise
+        """
+        if key is None:
+            raise ValueError("Can't search 'None'")
+        return self._get(key) != NIL
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        Returns:
+            value associated with the given key if the key is in the table and
+            None if the key is not in the table.
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        return self._values[self._get(key)]
+
+    def _get(self, key):
+        """ Return the id of the node holding key, or NIL if no such key. """
+        keys, left, right = self._keys, self._left, self._right
+        x = self.root
+        while x != NIL:
+            k = keys[x]
+            if key < k:
+                x = left[x]
+            elif key > k:
+                x = right[x]
+            else:
+                return x
+        return NIL
+
+    def put(self, key, value):
+        """Inserts the key-value pair into the symbol table.
+
+        It overwrites the old value with the new value if the key is already
+        in the symbol table. If the value is None, this effectively deletes the
+        key from the table.
+
+        Args:
+            key  : the key to be inserted into the table.
+            value: value associated with the given key
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if value is None:
+            self.delete(key)
+            return
+        keys, left, right = self._keys, self._left, self._right
+        x, path = self.root, []
+        while x != NIL:
+            k = keys[x]
+            if key < k:
+                path.append((x, True))
+                x = left[x]
+            elif key > k:
+                path.append((x, False))
+                x = right[x]
+            else:
+                self._values[x] = value
+                return
+        self.root = self._rebalance_path(path, self._new_node(key, value), 1)
+        self._validate(key)
+
+    def _rebalance_path(self, path, x, delta):
+        """Reattach x below the recorded path and rebalance it bottom-up.
+
+        Args:
+            path : the (node, went_left) pairs from the root down to the
+                   parent of x
+            x    : the new child of the last node on the path
+            delta: the change in the number of keys, +1 or -1
+        Returns:
+            The new root of the tree
+        """
+        left, right = self._left, self._right
+        size, height = self._size, self._height
+        for i in range(len(path) - 1, -1, -1):
+            p, went_left = path[i]
+            if went_left:
+                left[p] = x
+            else:
+                right[p] = x
+            lh, rh = height[left[p]], height[right[p]]
+            old_height = height[p]
+            size[p] = 1 + size[left[p]] + size[right[p]]
+            height[p] = 1 + (lh if lh > rh else rh)
+            if lh - rh > 1 or rh - lh > 1:
+                x = self._balance(p)
+            elif height[p] == old_height:
+                for j in range(i):
+                    size[path[j][0]] += delta
+                return path[0][0]
+            else:
+                x = p
+        return x
+
+    def _balance_factor(self, x):
+        """ Compute the difference in height of two children of x. """
+        return self._height[self._left[x]] - self._height[self._right[x]]
+
+    def _balance(self, x):
+        """Balance the given subtree x if it violates AVL Tree property.
+
+        Returns:
+            the subtree with restored AVL Tree property
+        """
+        if self._balance_factor(x) < -1:
+            if self._balance_factor(self._right[x]) > 0:
+                self._right[x] = self._rotate_right(self._right[x])
+            x = self._rotate_left(x)
+        elif self._balance_factor(x) > 1:
+            if self._balance_factor(self._left[x]) < 0:
+                self._left[x] = self._rotate_left(self._left[x])
+            x = self._rotate_right(x)
+        return x
+
+    def _rotate_right(self, x):
+        """ Rotate the given subtree (x) to the right. """
+        y = self._left[x]
+        self._left[x] = self._right[y]
+        self._right[y] = x
+        self._update(x)
+        self._update(y)
+        return y
+
+    def _rotate_left(self, x):
+        """ Rotate the given subtree (x) to the left. """
+        y = self._right[x]
+        self._right[x] = self._left[y]
+        self._left[y] = x
+        self._update(x)
+        self._update(y)
+        return y
+
+    def delete(self, key):
+        """Remove the given key and associated value with it from the table.
+
+        Args:
+            key: the key to be removed
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        keys, left, right = self._keys, self._left, self._right
+        x, path = self.root, []
+        while x != NIL:
+            k = keys[x]
+            if key < k:
+                path.append((x, True))
+                x = left[x]
+            elif key > k:
+                path.append((x, False))
+                x = right[x]
+            else:
+                break
+        if x == NIL:
+            return
+        if left[x] == NIL or right[x] == NIL:
+            child = left[x] if right[x] == NIL else right[x]
+        else:
+            # replace x by its successor y, the minimum of its right subtree
+            y, successor_path = right[x], []
+            while left[y] != NIL:
+                successor_path.append((y, True))
+                y = left[y]
+            child = right[y]
+            left[y], right[y] = left[x], right[x]
+            self._size[y], self._height[y] = self._size[x], self._height[x]
+            if path:
+                parent, went_left = path[-1]
+                if went_left:
+                    left[parent] = y
+                else:
+                    right[parent] = y
+            path.append((y, False))
+            path.extend(successor_path)
+        self._free_node(x)
+        self.root = self._rebalance_path(path, child, -1)
+        self._validate(key)
+
+    def delete_min(self):
+        """Removes the smallest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_min() is called on empty table")
+        x, path = self.root, []
+        while self._left[x] != NIL:
+            path.append((x, True))
+            x = self._left[x]
+        key = self._keys[x]
+        self._free_node(x)
+        self.root = self._rebalance_path(path, self._right[x], -1)
+        self._validate(key)
+
+    def delete_max(self):
+        """Remove the largest key and its value from the symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" delete_max() is called on empty table")
+        x, path = self.root, []
+        while self._right[x] != NIL:
+            path.append((x, False))
+            x = self._right[x]
+        key = self._keys[x]
+        self._free_node(x)
+        self.root = self._rebalance_path(path, self._left[x], -1)
+        self._validate(key)
+
+    def max(self):
+        """Reutrns the largest key in the Symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        x = self.root
+        while self._right[x] != NIL:
+            x = self._right[x]
+        return self._keys[x]
+
+    def min(self):
+        """Reutrns the smallest key in the Symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        x = self.root
+        while self._left[x] != NIL:
+            x = self._left[x]
+        return self._keys[x]
+
+    def floor(self, key):
+        """Returns the largest key less than or equal to the given key.
+
+        Args:
+            key  : the key
+        Returns:
+            the largest key less than or equal to the given key.
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        keys, left, right = self._keys, self._left, self._right
+        x, best = self.root, NIL
+        while x != NIL:
+            k = keys[x]
+            if key == k:
+                return k
+            elif key < k:
+                x = left[x]
+            else:
+                best, x = x, right[x]
+        return keys[best]
+
+    def ceiling(self, key):
+        """Returns the smallest key greater than or equal to the given key.
+
+        Args:
+            key  : the key
+        Returns:
+            the smallest key greater than or equal to the given key
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        keys, left, right = self._keys, self._left, self._right
+        x, best = self.root, NIL
+        while x != NIL:
+            k = keys[x]
+            if key == k:
+                return k
+            elif key > k:
+                x = right[x]
+            else:
+                best, x = x, left[x]
+        return keys[best]
+
+    def select(self, k):
+        """Returns the kth smallest key in the symbol table.
+
+        Args:
+            k: the order statistic
+        Returns:
+            the kth smallest key in the table.
+        """
+        if k < 0 or k >= self.size():
+            raise ValueError("k is out of range")
+        left, right, size = self._left, self._right, self._size
+        x = self.root
+        while True:
+            t = size[left[x]]
+            if k < t:
+                x = left[x]
+            elif k > t:
+                k -= t + 1
+                x = right[x]
+            else:
+                return self._keys[x]
+
+    def rank(self, key):
+        """Returns the number of keys in the table strictly less than key.
+
+        Args:
+            key: the key
+        Returns:
+            the number of keys in the table strictly less than key.
+        """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return self._rank(key)
+
+    def _rank(self, key, inclusive=False):
+        """ Returns the number of keys less than (or equal to) key. """
+        keys, left, right, size = self._keys, self._left, self._right, self._size
+        x, r = self.root, 0
+        while x != NIL:
+            k = keys[x]
+            if key < k:
+                x = left[x]
+            elif key > k:
+                r += 1 + size[left[x]]
+                x = right[x]
+            else:
+                return r + size[left[x]] + (1 if inclusive else 0)
+        return r
+
+    def keys(self):
+        """Returns all keys in the symbol table.
+
+        Returns:
+            an iterable containing all keys in the symbol table.
+        """
+        return self.keys_inorder()
+
+    def keys_inorder(self):
+        """Returns all keys in the table following the in-order traversal.
+
+        Returns:
+            an iterable containing all keys in the table.
+        """
+        return [self._keys[x] for x in self._ids_inorder()]
+
+    def _ids_inorder(self):
+        """ Return the node ids following the in-order traversal. """
+        left, right = self._left, self._right
+        queue, stack, x = [], [], self.root
+        while x != NIL or stack:
+            while x != NIL:
+                stack.append(x)
+                x = left[x]
+            x = stack.pop()
+            queue.append(x)
+            x = right[x]
+        return queue
+
+    def keys_level_order(self):
+        """Returns all keys in the table following the level-order traversal.
+
+        Returns:
+            an iterable containing all keys in the table.
+        """
+        q1, q2 = [], [self.root] if self.root != NIL else []
+        for x in q2:
+            q1.append(self._keys[x])
+            if self._left[x] != NIL:
+                q2.append(self._left[x])
+            if self._right[x] != NIL:
+                q2.append(self._right[x])
+        return q1
+
+    def keys_inrange(self, low_key, high_key):
+        """Returns all keys in between low_key and high_key (exclusive).
+
+        Args:
+            low_key : the lowest key
+            high_key: the highest key
+        Returns:
+            an iterable containing all keys in between low_key (inclusive)
+            and high_key (exclusive)
+        """
+        if low_key is None:
+            raise ValueError("keys can't be 'None'")
+        if high_key is None:
+            raise ValueError("keys can't be 'None'")
+        keys, left, right = self._keys, self._left, self._right
+        queue, stack, x = [], [], self.root
+        while x != NIL or stack:
+            while x != NIL:
+                if keys[x] < low_key:
+                    x = right[x]    # the whole left subtree is out of range
+                else:
+                    stack.append(x)
+                    x = left[x]
+            if not stack:
+                break
+            x = stack.pop()
+            if not keys[x] < high_key:
+                break
+            queue.append(keys[x])
+            x = right[x]
+        return queue
+
+    def size_inrange(self, low_key, high_key):
+        """Returns the number of keys in in between low_key and high_key.
+
+        Args:
+            low_key : the lowest key
+            high_key: the highest key
+        Returns:
+            the number of keys in between low_key (inclusive) and
+            high_key (inclusive)
+        """
+        if low_key is None:
+            raise ValueError("keys can't be 'None'")
+        if high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return self.count_range(low_key, high_key, (True, True))
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns the number of keys in between the given keys in O(log n).
+
+        The count is the difference of the ranks of the bounds, each found
+        by one descent, whether or not the bounds are keys of the table.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are counted
+        Returns:
+            the number of keys within the bounds, 0 if high_key < low_key
+        """
+        low, high = 0, self.size()
+        if low_key is not None:
+            low = self._rank(low_key, not inclusive[0])
+        if high_key is not None:
+            high = self._rank(high_key, inclusive[1])
+        return max(0, high - low)
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        Node ids are assigned in key order, so the columns are filled
+        sequentially and the tree is linked up bottom-up in linear time.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        """
+        st = cls(**options)
+        keys, values, _ = sorted_items(items, presorted)
+        st._load(keys, values)
+        st._validate()
+        return st
+
+    def put_many(self, items):
+        """Inserts the given key-value pairs into the symbol table.
+
+        Small batches are inserted one by one, large ones are merged with the
+        keys of the table and the columns are rebuilt in O(n + m).
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        keys, values, _ = sorted_items(items, False, keep_none=True)
+        if len(keys) * max(1, self.height()) < self.size():
+            for key, value in zip(keys, values):
+                self.put(key, value)
+            return
+        old = self._ids_inorder()
+        old_keys, old_values = self._keys, self._values
+        merged_keys, merged_values = [], []
+        i, j = 0, 0
+        while i < len(old) or j < len(keys):
+            if j >= len(keys) or (i < len(old) and old_keys[old[i]] < keys[j]):
+                key, value = old_keys[old[i]], old_values[old[i]]
+                i += 1
+            else:
+                key, value = keys[j], values[j]
+                if i < len(old) and not key < old_keys[old[i]]:
+                    i += 1      # the batch overrides the old value
+                j += 1
+            if value is not None:
+                merged_keys.append(key)
+                merged_values.append(value)
+        self._load(merged_keys, merged_values)
+        self._validate()
+
+    def _load(self, keys, values):
+        """Replace the content of the table by the given sorted pairs.
+
+        The node with id i + 1 holds keys[i], and each subtree is rooted at
+        the middle of its range, which gives a perfectly balanced tree.
+        """
+        self._reset()
+        n = len(keys)
+        self._keys.extend(keys)
+        self._values.extend(values)
+        self._left = array("i", [NIL]) * (n + 1)
+        self._right = array("i", [NIL]) * (n + 1)
+        self._size = array("i", [0]) * (n + 1)
+        self._height = array("i", [-1]) * (n + 1)
+        self.root = self._build(1, n)
+
+    def _build(self, low, high):
+        """ Link the nodes low ... high into a balanced subtree. """
+        if low > high:
+            return NIL
+        mid = (low + high) // 2
+        self._left[mid] = self._build(low, mid - 1)
+        self._right[mid] = self._build(mid + 1, high)
+        self._update(mid)
+        return mid
+
+    def _validate(self, key=None):
+        """Check the invariants after mutating the given key.
+
+        Args:
+            key: the key whose search path was changed, or None after a bulk
+                 rebuild, which is checked in full at any validation level
+        Raises:
+            AssertionError: if the tree is not consistent
+        """
+        if self.validation == "off":
+            return
+        if self.validation == "full" or key is None:
+            consistent = self.checked()
+        else:
+            consistent = self.is_path_consistent(key)
+        if not consistent:
+            what = "a bulk operation" if key is None else repr(key)
+            raise AssertionError(f"AVL tree not consistent after mutating {what}")
+
+    def checked(self):
+        """Check if all the representational invariantsis are consistent.
+
+        Returns:
+            True if all the representational invariantsis are consistent or
+            False otherwise.
+        """
+        return (
+            self.is_BST()
+            and self.is_AVL()
+            and self.is_size_consistent()
+            and self.is_rank_consistent()
+        )
+
+    def is_path_consistent(self, key):
+        """Check the invariants of the nodes along the search path of key.
+
+        Returns:
+            True if the nodes along the path are consistent or False otherwise.
+        """
+        x, smaller, larger = self.root, None, None
+        while x != NIL:
+            if not (
+                self._is_node_consistent(x, smaller, larger)
+                and self._is_node_consistent(self._left[x], smaller, self._keys[x])
+                and self._is_node_consistent(self._right[x], self._keys[x], larger)
+            ):
+                return False
+            if key < self._keys[x]:
+                x, larger = self._left[x], self._keys[x]
+            elif key > self._keys[x]:
+                x, smaller = self._right[x], self._keys[x]
+            else:
+                break
+        return True
+
+    def _is_node_consistent(self, x, smaller, larger):
+        """ Check the invariants of a single node against its children. """
+        if x == NIL:
+            return True
+        key, left, right = self._keys[x], self._left[x], self._right[x]
+        if smaller is not None and key <= smaller:
+            return False
+        if larger is not None and key >= larger:
+            return False
+        if left != NIL and not self._keys[left] < key:
+            return False
+        if right != NIL and not key < self._keys[right]:
+            return False
+        return (
+            self._size[x] == 1 + self._size[left] + self._size[right]
+            and self._height[x] == 1 + max(self._height[left], self._height[right])
+            and -1 <= self._balance_factor(x) <= 1
+        )
+
+    def is_AVL(self):
+        """ Check if the AVL property of the tree is consistent. """
+        return all(-1 <= self._balance_factor(x) <= 1 for x in self._ids_inorder())
+
+    def is_BST(self):
+        """ Check if the BST property of the tree is consistent. """
+        keys = self.keys_inorder()
+        return all(keys[i] < keys[i + 1] for i in range(len(keys) - 1))
+
+    def is_size_consistent(self):
+        """ Check if the size and height of every node are consistent. """
+        for x in self._ids_inorder():
+            left, right = self._left[x], self._right[x]
+            if self._size[x] != 1 + self._size[left] + self._size[right]:
+                return False
+            if self._height[x] != 1 + max(self._height[left], self._height[right]):
+                return False
+        return True
+
+    def is_rank_consistent(self):
+        """ Check if the rank of the AVL tree is consistent. """
+        for i in range(self.size()):
+            if i != self.rank(self.select(i)):
+                return False
+        for key in self.keys():
+            if key != self.select(self.rank(key)):
+                return False
+        return True
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self.size()
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return iter(self.keys_inorder())
+
+    # ********************* End of Python Special Methods *********************#
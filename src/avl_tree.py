@@ -63,9 +63,93 @@ keys_level_order():
 keys_inrange(low_key, high_key):
     Returns all keys in between low_key and high_key (exclusive).
 
+iter_keys(), iter_items(), reversed():
+    Lazy iterators over the keys or the key-value pairs in ascending order,
+    or over the keys in descending order, using O(log n) extra memory.
+
+irange(low_key, high_key, inclusive=(True, False), reverse=False):
+    Lazy iterator over the keys in between low_key and high_key.
+
 size_inrange(low_key, high_key):
     Returns the number of keys in in between low_key and high_key.
 
+count_range(low_key, high_key, inclusive=(True, False)):
+    Returns the number of keys in between low_key and high_key, each bound
+    included or excluded, in O(log n).
+
+page(offset, limit), page_after(key, limit):
+    Return the limit keys from the given rank, or after the given key, in
+    O(log n + limit), for paginating without materializing keys().
+
+get_many(keys), contains_many(keys), rank_many(keys), floor_many(keys),
+ceiling_many(keys), select_many(ks):
+    Answer many queries in a single traversal that shares common path
+    prefixes; the results come back in the order of the queries.
+
+seek(key), first(), last():
+    Return a cursor positioned on the smallest key ≥ key, on the smallest or
+    on the largest key. The cursor moves with next() and prev() in amortized
+    O(1) and exposes key and a writable value.
+
+from_items(items, presorted=False):
+    Builds a perfectly balanced symbol table from key-value pairs in linear
+    time (after sorting, unless the pairs are presorted).
+
+put_many(items):
+    Inserts many key-value pairs at once, rebuilding the tree in bulk when
+    the batch is large compared to the table.
+
+delete_range(low_key, high_key), pop_min(n), pop_max(n):
+    Remove a range of keys, or the n smallest or largest keys, by splitting
+    them off as a whole in O(log n), optionally returning the pairs.
+
+split(key), join(left, right):
+    Split a table into the keys below and from the given key, or join two
+    tables whose keys do not interleave, in O(log n).
+
+union(other), intersection(other), difference(other), merge(other, on_conflict):
+    Set operations with another table in O(m log(n/m + 1)), built on split
+    and join.
+
+copy():
+    Returns a perfectly balanced copy of the table.
+
+freeze(), thaw():
+    Turn the table into an immutable FrozenAVLTreeST on sorted arrays, with
+    O(1) select and binary searches, and back, each in O(n).
+
+snapshot():
+    Returns an immutable view of a table created with persistent=True in
+    O(1); later changes to the table copy only the paths they touch.
+
+aggregate(low_key, high_key, name):
+    Folds an associative aggregate registered at construction, such as a
+    sum or a maximum, over the values of a range of keys in O(log n).
+
+dump(path), load(path, key=None), open_mmap(path, key=None):
+    Write the table to a compact binary image, rebuild a table from an
+    image in linear time, or serve read-only queries straight from a
+    memory-mapped image without deserializing it.
+
+AVLTreeST(cache_size=n):
+    Keeps the results of the n most recent get() calls in an LRU cache that
+    writes invalidate, counting hits and misses in cache_hits and
+    cache_misses.
+
+AVLTreeST(key=function, intern=True):
+    Orders the keys by function(key), computed once per key and kept in the
+    node, and interns str keys. Every search compares once per level and
+    checks for equality only at the bottom.
+
+avl_tree_stats.InstrumentedAVLTreeST:
+    An AVLTreeST counting the key comparisons, node visits, rotations and
+    rebalance depth of every operation, for profiling; AVLTreeST itself
+    carries no counters.
+
+order_statistics.OrderStatistics:
+    A multiset of samples over a sliding window, with its quantiles,
+    median and percentile ranks in O(log n) by select() and rank().
+
 ******************************************************************************
 
 It also support the following operations to check the internal integrities of
@@ -74,6 +158,9 @@ the AVL tree.
 checked():
     Check if all the representational invariantsis are consistent.
 
+is_path_consistent(key):
+    Check the invariants of the nodes along the search path of the key only.
+
 is_AVL():
     Check if the AVL property of the tree is consistent.
 
@@ -86,10 +173,24 @@ is_size_consistent():
 is_rank_consistent():
     Check if the rank of the AVL tree is consistent.
 
+is_aggregate_consistent():
+    Check if the registered aggregates of all subtrees are consistent.
+
+is_cache_consistent():
+    Check if the read cache agrees with the tree.
+
 """
 import sys
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import islice
 from random import randrange
 
+import avl_tree_image
+from utils import sorted_items
+
+_MISSING = object()     # marks a key that is not in the read cache
+
 
 class AVLTreeST(object):
     """Symbol table implementation using AVL tree.
@@ -110,24 +211,245 @@ class AVLTreeST(object):
 
     # *************************** Nested Node Class ***************************#
     class Node(object):
-        def __init__(self, key, value, size, height, left=None, right=None):
+        def __init__(self, key, value, size, height, left=None, right=None,
+                     owner=None, agg=None, ckey=None):
             self.key = key  # the key
+            self.ckey = key if ckey is None else ckey  # the key compared
             self.value = value  # the value associated with the key
             self.left = left  # left subtree
             self.right = right  # right subtree
             self.size = size  # number of subtree rooted at this tree
             self.height = height  # height of the subtree
+            self.owner = owner  # edit token of the table allowed to change it
+            self.agg = agg  # the registered aggregates of the subtree
 
         def __iter__(self):
-            yield from self.left if self.left is not None else ()
-            yield self.key
-            yield from self.right if self.right is not None else ()
+            stack, x = [], self
+            while x is not None or stack:
+                while x is not None:
+                    stack.append(x)
+                    x = x.left
+                x = stack.pop()
+                yield x.key
+                x = x.right
 
     # ************************ End of Nested Node Class ***********************#
 
-    def __init__(self):
-        """ It initializes an ordered symbol table. """
+    # ************************** Nested Cursor Class **************************#
+    class Cursor(object):
+        """A movable position in the key order of an AVLTreeST.
+
+        The cursor keeps the path from the root down to its node, together
+        with the key range each node on the path covers. next() and prev()
+        take amortized O(1) time. seek(key) only climbs as far as the range
+        of the target requires: it is cheaper when the target lies in the
+        subtree of a node near the cursor, but nodes keep no parent or
+        level links, so two adjacent keys may only meet at the root and a
+        seek takes O(log n) in the worst case, even to a nearby key.
+        A cursor moved past either end is no longer valid. Any structural
+        change to the tree invalidates the cursor.
+        """
+
+        def __init__(self, tree):
+            self._tree = tree
+            self._path = []     # (node, low_key, high_key) from the root down
+            self._mod_count = tree._mod_count
+
+        @property
+        def valid(self):
+            """ True if the cursor is positioned on a key. """
+            self._check()
+            return bool(self._path)
+
+        def __bool__(self):
+            return self.valid
+
+        @property
+        def key(self):
+            """ The key the cursor is positioned on. """
+            return self._node().key
+
+        @property
+        def value(self):
+            """ The value associated with the key of the cursor. """
+            return self._node().value
+
+        @value.setter
+        def value(self, value):
+            if value is None:
+                raise ValueError("Can't set 'None'; delete the key instead")
+            x = self._node()
+            if not self._tree._replace_value(x, value):
+                key, self._path = x.key, []
+                self.seek(key)      # the path was copied, follow the copies
+
+        def next(self):
+            """Moves the cursor to the next larger key.
+
+            Returns:
+                True if the cursor is still positioned on a key.
+            """
+            x = self._node()
+            if x.right is not None:
+                self._leftmost(x.right, x.ckey, self._path[-1][2])
+                return True
+            path = self._path
+            child = path.pop()[0]
+            while path and path[-1][0].right is child:
+                child = path.pop()[0]
+            return bool(path)
+
+        def prev(self):
+            """Moves the cursor to the next smaller key.
+
+            Returns:
+                True if the cursor is still positioned on a key.
+            """
+            x = self._node()
+            if x.left is not None:
+                self._rightmost(x.left, self._path[-1][1], x.ckey)
+                return True
+            path = self._path
+            child = path.pop()[0]
+            while path and path[-1][0].left is child:
+                child = path.pop()[0]
+            return bool(path)
+
+        def seek(self, key):
+            """Moves the cursor to the smallest key ≥ the given key.
+
+            The search starts from the current position: the cursor climbs
+            until the subtree it is in covers the key, then descends. This
+            takes O(log n) in the worst case; the climb and the descent are
+            short only when the key is inside a small subtree on the path.
+
+            Args:
+                key: the key to look for
+            Returns:
+                True if the cursor is positioned on a key.
+            """
+            if key is None:
+                raise ValueError("Can't search 'None' in the table")
+            self._check()
+            key = self._tree._ckey(key)
+            path = self._path
+            while len(path) > 1 and not (
+                (path[-1][1] is None or path[-1][1] < key)
+                and (path[-1][2] is None or key < path[-1][2])
+            ):
+                path.pop()
+            if not path:
+                if self._tree.root is None:
+                    return False
+                path.append((self._tree.root, None, None))
+            x, low, high = path[-1]
+            while True:
+                if key < x.ckey:
+                    x, high = x.left, x.ckey
+                elif x.ckey < key:
+                    x, low = x.right, x.ckey
+                else:
+                    return True
+                if x is None:
+                    break
+                path.append((x, low, high))
+            while path and path[-1][0].ckey < key:
+                path.pop()
+            return bool(path)
+
+        def _leftmost(self, x, low, high):
+            """ Push the path from x down to the smallest key under it. """
+            while x is not None:
+                self._path.append((x, low, high))
+                x, high = x.left, x.ckey
+
+        def _rightmost(self, x, low, high):
+            """ Push the path from x down to the largest key under it. """
+            while x is not None:
+                self._path.append((x, low, high))
+                x, low = x.right, x.ckey
+
+        def _node(self):
+            """ Return the node the cursor is positioned on. """
+            self._check()
+            if not self._path:
+                raise RuntimeError("cursor is not positioned on a key")
+            return self._path[-1][0]
+
+        def _check(self):
+            if self._tree._mod_count != self._mod_count:
+                raise RuntimeError("AVLTreeST changed since the cursor was made")
+
+    # ********************** End of Nested Cursor Class ***********************#
+
+    VALIDATION_LEVELS = ("off", "path", "full")
+
+    def __init__(self, validation=None, persistent=False, aggregates=None,
+                 key=None, intern=False, cache_size=0):
+        """It initializes an ordered symbol table.
+
+        Args:
+            validation: how much of the tree is checked after each mutation;
+                        "off", "path" (only the nodes along the path touched
+                        by the mutation, O(log n)) or "full" (the whole tree,
+                        for tests). Defaults to "path", or to "off" when
+                        Python runs with -O.
+            persistent: copy the nodes shared with snapshots before changing
+                        them, so that snapshot() is O(1)
+            aggregates: a dict mapping names to (combine, identity) or
+                        (combine, identity, lift) tuples; every node keeps
+                        combine() folded over lift(value) of its subtree,
+                        in key order, for aggregate() queries. combine must
+                        be associative with identity as neutral element;
+                        lift defaults to the value itself.
+            key       : a function mapping each key to the key it is ordered
+                        by, like the key of sorted(); it is called once per
+                        inserted key and per query, and the result is kept
+                        in the node so that searches compare it directly
+            intern    : intern the str keys (and str comparison keys) put
+                        into the table, so that equal keys share one object
+                        and equality checks on them short-circuit on identity
+            cache_size: keep the results of up to this many recent get()
+                        calls, hits and misses, in an LRU cache in front of
+                        the tree; writes invalidate the keys they touch. The
+                        keys must then be hashable, and get() changes the
+                        cache, so a cached table is not safe for concurrent
+                        readers.
+        """
+        if validation is None:
+            validation = "path" if __debug__ else "off"
+        if validation not in self.VALIDATION_LEVELS:
+            raise ValueError(f"validation must be one of {self.VALIDATION_LEVELS}")
+        self.validation = validation
         self.root = None
+        self._mod_count = 0     # number of structural changes, for iterators
+        self._edit = object() if persistent else None   # owner of new nodes
+        self._aggregate_specs = None    # name -> (combine, identity, lift)
+        self._aggregates = None         # the specs in the order of Node.agg
+        if aggregates:
+            self._aggregate_specs = {}
+            for name, spec in aggregates.items():
+                if len(spec) not in (2, 3):
+                    raise ValueError(f"aggregate {name!r} must be (combine, identity[, lift])")
+                combine, identity, lift = (tuple(spec) + (None,))[:3]
+                self._aggregate_specs[name] = (combine, identity, lift)
+            self._aggregates = tuple(self._aggregate_specs.values())
+        self._key = key         # maps keys to the keys they are compared by
+        self._intern = intern
+        if cache_size < 0:
+            raise ValueError("cache_size can't be negative")
+        self._cache_size = cache_size
+        self._cache = OrderedDict() if cache_size else None    # ckey -> value
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _ckey(self, key):
+        """ Return the key the given key is compared by. """
+        return key if self._key is None else self._key(key)
+
+    def _keyed(self):
+        """ Return True if the user gave a key function to order the keys by. """
+        return self._key is not None
 
     def is_empty(self):
         """ Check whether this symbol table is empty or not. """
@@ -187,29 +509,47 @@ class AVLTreeST(object):
         """
         if key is None:
             raise ValueError("Can't search 'None' in the table")
-        x = self._get(self.root, key)
-        if x is None:
-            return None
-        return x.value
+        ckey = key if self._key is None else self._key(key)
+        cache = self._cache
+        if cache is None:
+            x = self._get(self.root, ckey)
+            return None if x is None else x.value
+        value = cache.get(ckey, _MISSING)
+        if value is not _MISSING:
+            cache.move_to_end(ckey)
+            self.cache_hits += 1
+            return value
+        self.cache_misses += 1
+        x = self._get(self.root, ckey)
+        value = None if x is None else x.value
+        cache[ckey] = value
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+        return value
 
     def _get(self, x, key):
         """Return the subtree associate with the given key.
 
+        The search makes a single comparison per level: it descends to the
+        bottom remembering the last node whose key is not greater, and
+        only checks that node for equality at the end.
+
         Args:
             x  : the subtree
-            key: the key with which a value is associated
+            key: the comparison key with which a value is associated
         Returns:
             subtree corresponding to the given key if the key is in the tree and
             None if the key is not in the symbol table.
         """
-        if x is None:
-            return None
-        elif key < x.key:
-            return self._get(x.left, key)
-        elif key > x.key:
-            return self._get(x.right, key)
-        else:
-            return x
+        candidate = None
+        while x is not None:
+            if key < x.ckey:
+                x = x.left
+            else:
+                candidate, x = x, x.right
+        if candidate is not None and not candidate.ckey < key:
+            return candidate
+        return None
 
     def put(self, key, value):
         """Inserts the key-value pair into the symbol table.
@@ -225,33 +565,150 @@ class AVLTreeST(object):
         if key is None:
             raise ValueError("Can't insert 'None' in the table")
         if value is None:
-            self._delete(self.root, key)
+            self.delete(key)
             return
+        if self._cache is not None:
+            self._uncache(self._ckey(key))
         self.root = self._put(self.root, key, value)
-        assert self.checked()
+        self._validate(key)
 
     def _put(self, x, key, value):
         """Add the given key-value pair in the subtree rooted at x.
 
-        If the key is already in the tree, its value gets updated.
+        If the key is already in the tree, its value gets updated. The path
+        from x down to the new node is recorded on a stack and rebalanced
+        bottom-up afterwards. As in _get(), each level costs one comparison,
+        and whether the key is already there is checked once at the bottom.
 
         Args:
             x    : the subtree
             key  : the key to be inserted into the symbol table.
             value: value associated with the given key
+        Returns:
+            The updated subtree
         """
-        if x is None:
-            return self.Node(key, value, 1, 0)
-        if key < x.key:
-            x.left = self._put(x.left, key, value)
-        elif key > x.key:
-            x.right = self._put(x.right, key, value)
-        else:
+        if self._intern and type(key) is str:
+            key = sys.intern(key)
+        ckey = key if self._key is None else self._key(key)
+        root, path, candidate = x, [], -1
+        while x is not None:
+            if ckey < x.ckey:
+                path.append((x, True))
+                x = x.left
+            else:
+                candidate = len(path)
+                path.append((x, False))
+                x = x.right
+        if candidate >= 0 and not path[candidate][0].ckey < ckey:
+            del path[candidate + 1:]
+            if self._edit is not None:
+                self._own_path(path)
+                root = path[0][0]
+            x = path.pop()[0]
             x.value = value
+            if self._aggregates is not None:
+                self._update_agg(x)
+                for p, _ in reversed(path):
+                    self._update_agg(p)
+            return root
+        if self._edit is not None:
+            self._own_path(path)
+        node = self.Node(key, value, 1, 0, owner=self._edit, ckey=ckey)
+        if self._aggregates is not None:
+            self._update_agg(node)
+        return self._rebalance_path(path, node, 1)
+
+    def _own(self, x):
+        """Returns x, or a copy of x if it may be shared with a snapshot.
+
+        Nodes carry the edit token of the table that created them. A node
+        with another token may be reachable from a snapshot, so it is copied
+        before it is changed. Without snapshots the token never changes and
+        nothing is copied.
+        """
+        if x is None or x.owner is self._edit:
             return x
-        x.size = 1 + self._size(x.left) + self._size(x.right)
-        x.height = 1 + max(self._height(x.left), self._height(x.right))
-        return self._balance(x)
+        return self.Node(x.key, x.value, x.size, x.height, x.left, x.right,
+                         self._edit, x.agg, x.ckey)
+
+    def _own_path(self, path):
+        """Replaces the nodes on the path by copies this table may change.
+
+        Each copy is linked to the (copied) node above it on the path.
+
+        Args:
+            path: the (node, went_left) pairs from a subtree root downwards
+        """
+        for i, (x, went_left) in enumerate(path):
+            y = self._own(x)
+            if y is not x:
+                path[i] = (y, went_left)
+                if i > 0:
+                    parent, left = path[i - 1]
+                    if left:
+                        parent.left = y
+                    else:
+                        parent.right = y
+
+    def _replace_value(self, x, value):
+        """Replaces the value of the node x in place when possible.
+
+        Returns:
+            True if x was changed in place, or False if the value was put
+            through a copy of the path because x is shared with a snapshot.
+        """
+        if x.owner is self._edit and self._aggregates is None:
+            x.value = value
+            if self._cache is not None:
+                self._uncache(x.ckey)
+            return True
+        self.put(x.key, value)
+        return False
+
+    def _rebalance_path(self, path, x, delta):
+        """Reattach x below the recorded path and rebalance it bottom-up.
+
+        Sizes, heights and aggregates are recomputed and rotations applied
+        from the bottom of the path upwards. Once a node keeps its height and
+        is not rotated, the nodes above it only need their size (and
+        aggregates) adjusted.
+
+        Args:
+            path : the (node, went_left) pairs from the subtree root down to
+                   the parent of x
+            x    : the new child of the last node on the path
+            delta: the change in the number of keys, +1 or -1
+        Returns:
+            The updated subtree
+        """
+        self._mod_count += 1
+        aggregated = self._aggregates is not None
+        for i in range(len(path) - 1, -1, -1):
+            p, went_left = path[i]
+            if went_left:
+                p.left = x
+            else:
+                p.right = x
+            left, right = p.left, p.right
+            lh = -1 if left is None else left.height
+            rh = -1 if right is None else right.height
+            height = p.height
+            p.size = (1 + (0 if left is None else left.size)
+                      + (0 if right is None else right.size))
+            p.height = 1 + (lh if lh > rh else rh)
+            if aggregated:
+                self._update_agg(p)
+            if lh - rh > 1 or rh - lh > 1:
+                x = self._balance(p)
+            elif p.height == height:
+                for j in range(i - 1, -1, -1):
+                    path[j][0].size += delta
+                    if aggregated:
+                        self._update_agg(path[j][0])
+                return path[0][0]
+            else:
+                x = p
+        return x
 
     def _balance_factor(self, x):
         """Compute the difference in height of two children of the subtree, x.
@@ -289,13 +746,17 @@ class AVLTreeST(object):
         Return:
             the right rotated subtree.
         """
-        y = x.left
+        x = self._own(x)
+        y = self._own(x.left)
         x.left = y.right
         y.right = x
         y.size = x.size
         x.size = 1 + self._size(x.left) + self._size(x.right)
         x.height = 1 + max(self._height(x.left), self._height(x.right))
         y.height = 1 + max(self._height(y.left), self._height(y.right))
+        if self._aggregates is not None:
+            self._update_agg(x)
+            self._update_agg(y)
 
         return y
 
@@ -307,13 +768,17 @@ class AVLTreeST(object):
         Returns:
             the left rotated subtree
         """
-        y = x.right
+        x = self._own(x)
+        y = self._own(x.right)
         x.right = y.left
         y.left = x
         y.size = x.size
         x.size = 1 + self._size(x.left) + self._size(x.right)
         x.height = 1 + max(self._height(x.left), self._height(x.right))
         y.height = 1 + max(self._height(y.left), self._height(y.right))
+        if self._aggregates is not None:
+            self._update_agg(x)
+            self._update_agg(y)
 
         return y
 
@@ -325,45 +790,84 @@ class AVLTreeST(object):
         """
         if key is None:
             raise ValueError("Can't delete 'None' from the table")
-        if not self.contains(key):
-            return
-        self.root = self._delete(self.root, key)
+        ckey = self._ckey(key)
+        if self._cache is not None:
+            self._uncache(ckey)
+        following = ()
+        if self.validation == "path":
+            # a key with two children is replaced by its successor, and the
+            # path down to the successor's old place, which leads to the key
+            # after it, is rebalanced too
+            following = [x.key for x in islice(
+                self._iter_nodes(key, None, (False, True), False), 2)]
+        size = self._size(self.root)
+        self.root = self._delete(self.root, ckey)
+        if self._size(self.root) != size:
+            self._validate(key, *following)
 
     def _delete(self, x, key):
         """Remove the given key and associated value with it from the table.
 
+        The path from x down to the removed node (or its successor) is
+        recorded on a stack and rebalanced bottom-up afterwards.
+
         Args:
             x  : the subtree
-            key: the key to be removed from the tree
+            key: the comparison key to be removed from the tree
         Returns:
             The updated subtree
         """
-        if x is None:
-            return
-        elif key < x.key:
-            x.left = self._delete(x.left, key)
-        elif key > x.key:
-            x.right = self._delete(x.right, key)
-        else:
-            if x.left is None:
-                return x.right
-            elif x.right is None:
-                return x.left
+        root, path, candidate = x, [], -1
+        while x is not None:
+            if key < x.ckey:
+                path.append((x, True))
+                x = x.left
             else:
-                y = x
-                x = self._min(y.right)
-                x.right = self._delete_min(y.right)
-                x.left = y.left
-
-        x.size = 1 + self._size(x.left) + self._size(x.right)
-        x.height = 1 + max(self._height(x.left), self._height(x.right))
-        return self._balance(x)
+                candidate = len(path)
+                path.append((x, False))
+                x = x.right
+        if candidate < 0 or path[candidate][0].ckey < key:
+            return root
+        x = path[candidate][0]
+        del path[candidate:]
+        if self._edit is not None:
+            self._own_path(path)
+        if x.left is None:
+            return self._rebalance_path(path, x.right, -1)
+        if x.right is None:
+            return self._rebalance_path(path, x.left, -1)
+
+        # replace x by its successor y, the minimum of its right subtree
+        y, successor_path = x.right, []
+        while y.left is not None:
+            successor_path.append((y, True))
+            y = y.left
+        if self._edit is not None:
+            self._own_path(successor_path)
+            y = self._own(y)
+        child = y.right
+        y.left, y.right = x.left, successor_path[0][0] if successor_path else y
+        y.size, y.height = x.size, x.height
+        if path:
+            parent, went_left = path[-1]
+            if went_left:
+                parent.left = y
+            else:
+                parent.right = y
+        path.append((y, False))
+        path.extend(successor_path)
+        return self._rebalance_path(path, child, -1)
 
     def delete_min(self):
         """Removes the smallest key and its value from the table."""
         if self.is_empty():
             raise RuntimeError(" delete_min() is called on empty table")
+        x = self._min(self.root)
+        if self._cache is not None:
+            self._uncache(x.ckey)
+        key = x.key
         self.root = self._delete_min(self.root)
+        self._validate(key)
 
     def _delete_min(self, x):
         """Delete the minimum key and its value from the table.
@@ -373,18 +877,24 @@ class AVLTreeST(object):
         Returns:
             The updated subtree
         """
-        if x.left is None:
-            return x.right
-        x.left = self._delete_min(x.left)
-        x.size = 1 + self._size(x.left) + self._size(x.right)
-        x.height = 1 + max(self._height(x.left), self._height(x.right))
-        return self._balance(x)
+        path = []
+        while x.left is not None:
+            path.append((x, True))
+            x = x.left
+        if self._edit is not None:
+            self._own_path(path)
+        return self._rebalance_path(path, x.right, -1)
 
     def delete_max(self):
         """Remove the largest key and its value from the symbol table"""
         if self.is_empty():
-            return RuntimeError(" delete_max() is called on empty table")
+            raise RuntimeError(" delete_max() is called on empty table")
+        x = self._max(self.root)
+        if self._cache is not None:
+            self._uncache(x.ckey)
+        key = x.key
         self.root = self._delete_max(self.root)
+        self._validate(key)
 
     def _delete_max(self, x):
         """Remove the largest key and its value from the given subtree
@@ -395,38 +905,37 @@ class AVLTreeST(object):
         Returns:
             updated subtree (Node Object)
         """
-        if x.right is None:
-            return x.right
-        x.right = self._delete_max(x.right)
-        x.size = 1 + self._size(x.left) + self._size(x.right)
-        x.height = 1 + max(self._height(x.left), self._height(x.right))
-        return self._balance(x)
+        path = []
+        while x.right is not None:
+            path.append((x, False))
+            x = x.right
+        if self._edit is not None:
+            self._own_path(path)
+        return self._rebalance_path(path, x.left, -1)
 
     def max(self):
         """Reutrns the largest key in the Symbol table"""
         if self.is_empty():
-            return RuntimeError(" max() is called in empty table")
-        return self._max(self.root)
+            raise RuntimeError(" max() is called in empty table")
+        return self._max(self.root).key
 
     def _max(self, x):
         """Reutrns the subtree with the largest key in the table"""
-        if x.right is None:
-            return x
-        else:
-            return self._max(x.right)
+        while x.right is not None:
+            x = x.right
+        return x
 
     def min(self):
         """Reutrns the smallest key in the Symbol table"""
         if self.is_empty():
-            return RuntimeError(" min() is called in empty table")
-        return self._min(self.root)
+            raise RuntimeError(" min() is called in empty table")
+        return self._min(self.root).key
 
     def _min(self, x):
         """Reutrns the subtree with the smallest key in the Symbol table"""
-        if x.left is None:
-            return x
-        else:
-            return self._min(x.left)
+        while x.left is not None:
+            x = x.left
+        return x
 
     def floor(self, key):
         """Returns the largest key less than or equal to the given key.
@@ -440,7 +949,7 @@ class AVLTreeST(object):
             raise ValueError("Can't search 'None' in the table")
         if self.is_empty():
             raise RuntimeError(" floor(key) is called on empty table")
-        x = self._floor(self.root, key)
+        x = self._floor(self.root, self._ckey(key))
         if x is None:
             return None
         return x.key
@@ -450,22 +959,18 @@ class AVLTreeST(object):
 
         Args:
             x  : the subtree
-            key: the key
+            key: the comparison key
 
         Returns:
             subtree with the largest key less than or equal to the given key.
         """
-        if x is None:
-            return None
-        elif key == x.key:
-            return x
-        elif key < x.key:
-            return self._floor(x.left, key)
-        y = self._floor(x.right, key)
-        if y is not None:
-            return y
-        else:
-            return x
+        best = None
+        while x is not None:
+            if key < x.ckey:
+                x = x.left
+            else:
+                best, x = x, x.right
+        return best
 
     def ceiling(self, key):
         """Returns the smallest key greater than or equal to the given key.
@@ -480,7 +985,7 @@ class AVLTreeST(object):
             raise ValueError("Can't search 'None' from the table")
         if self.is_empty():
             raise RuntimeError("ceiling(key) is called on empty table")
-        x = self._ceiling(self.root, key)
+        x = self._ceiling(self.root, self._ckey(key))
         if x is None:
             return None
         return x.key
@@ -490,22 +995,18 @@ class AVLTreeST(object):
 
         Args:
             x  : the subtree
-            key: the key
+            key: the comparison key
 
         Returns:
             subtree with the smallest key greater than or equal to given key.
         """
-        if x is None:
-            return None
-        if key == x.key:
-            return x
-        if key > x.key:
-            return self._ceiling(x.right, key)
-        y = self._ceiling(x.left, key)
-        if y is not None:
-            return y
-        else:
-            return x
+        best = None
+        while x is not None:
+            if x.ckey < key:
+                x = x.right
+            else:
+                best, x = x, x.left
+        return best
 
     def select(self, k):
         """Returns the kth smallest key in the symbol table.
@@ -531,14 +1032,16 @@ class AVLTreeST(object):
         Returns:
             the subtree with the kth smallest key
         """
-        if x is None:
-            return None
-        elif k < self._size(x.left):
-            return self._select(x.left, k)
-        elif k > self._size(x.left):
-            return self._select(x.right, (k - self._size(x.left)) - 1)
-        else:
-            return x
+        while x is not None:
+            t = 0 if x.left is None else x.left.size
+            if k < t:
+                x = x.left
+            elif k > t:
+                k -= t + 1
+                x = x.right
+            else:
+                return x
+        return None
 
     def rank(self, key):
         """Returns the number of keys in the table strictly less than key.
@@ -551,26 +1054,27 @@ class AVLTreeST(object):
         """
         if key is None:
             raise ValueError("key can't be 'None'")
-        return self._rank(self.root, key)
+        return self._rank(self.root, self._ckey(key))
 
-    def _rank(self, x, key):
+    def _rank(self, x, key, inclusive=False):
         """Returns the number of keys in the subtree less than key.
 
         Args:
-            x  : the subtree
-            key: the key
+            x        : the subtree
+            key      : the comparison key
+            inclusive: count the key itself too, i.e. the keys ≤ key
 
         Returns:
-            the number of keys in the subtree less than key.
+            the number of keys in the subtree less than (or equal to) key.
         """
-        if x is None:
-            return 0
-        elif key < x.key:
-            return self._rank(x.left, key)
-        elif key > x.key:
-            return 1 + self._size(x.left) + self._rank(x.right, key)
-        else:
-            return self._size(x.left)
+        r = 0
+        while x is not None:
+            if (not key < x.ckey) if inclusive else x.ckey < key:
+                r += 1 + (0 if x.left is None else x.left.size)
+                x = x.right
+            else:
+                x = x.left
+        return r
 
     def keys(self):
         """Returns all keys in the symbol table.
@@ -597,11 +1101,14 @@ class AVLTreeST(object):
             x    : the subtree
             queue: the queue to hold the keys.
         """
-        if x is None:
-            return
-        self._keys_inorder(x.left, queue)
-        queue.append(x.key)
-        self._keys_inorder(x.right, queue)
+        stack = []
+        while x is not None or stack:
+            while x is not None:
+                stack.append(x)
+                x = x.left
+            x = stack.pop()
+            queue.append(x.key)
+            x = x.right
 
     def keys_level_order(self):
         """Returns all keys in the table following the in-order traversal.
@@ -638,27 +1145,97 @@ class AVLTreeST(object):
             raise ValueError("keys can't be 'None'")
         if high_key is None:
             raise ValueError("keys can't be 'None'")
-        q = []
-        self._keys_inrange(self.root, q, low_key, high_key)
-        return q
+        return list(self.irange(low_key, high_key))
+
+    def iter_keys(self):
+        """Returns a lazy iterator over the keys in ascending order.
+
+        The iterator keeps only the current root-to-node path, O(log n), and
+        raises RuntimeError if the tree is changed while iterating.
+        """
+        for x in self._iter_nodes(None, None, (True, True), False):
+            yield x.key
+
+    def iter_items(self):
+        """Returns a lazy iterator over the (key, value) pairs in key order."""
+        for x in self._iter_nodes(None, None, (True, True), False):
+            yield x.key, x.value
+
+    def reversed(self):
+        """Returns a lazy iterator over the keys in descending order."""
+        for x in self._iter_nodes(None, None, (True, True), True):
+            yield x.key
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False),
+               reverse=False):
+        """Returns a lazy iterator over the keys in between the given keys.
 
-    def _keys_inrange(self, x, q, low_key, high_key):
-        """Returns all keys in between low_key and high_key as iterable.
+        Only the nodes on the boundary paths and the keys actually yielded
+        are visited, so reading the first few keys of a huge range costs
+        O(log n).
 
         Args:
-            x       : the subtree
-            queue   : the queue to hold the keys
-            low_key : the lowest key
-            high_key: the highest key
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+            reverse  : yield the keys in descending order
         """
-        if x is None:
-            return None
-        if low_key < x.key:
-            self._keys_inrange(x.left, q, low_key, high_key)
-        if low_key == x.key and high_key >= x.key:
-            q.append(x.key)
-        if high_key > x.key:
-            self._keys_inrange(x.right, q, low_key, high_key)
+        for x in self._iter_nodes(low_key, high_key, inclusive, reverse):
+            yield x.key
+
+    def _iter_nodes(self, low_key, high_key, inclusive, reverse):
+        """Yields the nodes in between the given keys with an explicit stack.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+            reverse  : yield the nodes in descending key order
+        Raises:
+            RuntimeError: if the tree is changed while iterating
+        """
+        low_inclusive, high_inclusive = inclusive
+        if low_key is not None:
+            low_key = self._ckey(low_key)
+        if high_key is not None:
+            high_key = self._ckey(high_key)
+
+        def too_low(key):
+            if low_key is None:
+                return False
+            return key < low_key if low_inclusive else not low_key < key
+
+        def too_high(key):
+            if high_key is None:
+                return False
+            return high_key < key if high_inclusive else not key < high_key
+
+        expected, stack, x = self._mod_count, [], self.root
+        if not reverse:
+            while x is not None:
+                if too_low(x.ckey):
+                    x = x.right
+                else:
+                    stack.append(x)
+                    x = x.left
+        else:
+            while x is not None:
+                if too_high(x.ckey):
+                    x = x.left
+                else:
+                    stack.append(x)
+                    x = x.right
+        while stack:
+            x = stack.pop()
+            if too_low(x.ckey) if reverse else too_high(x.ckey):
+                return
+            yield x
+            if self._mod_count != expected:
+                raise RuntimeError("AVLTreeST changed during iteration")
+            x = x.left if reverse else x.right
+            while x is not None:
+                stack.append(x)
+                x = x.right if reverse else x.left
 
     def size_inrange(self, low_key, high_key):
         """Returns the number of keys in in between low_key and high_key.
@@ -675,11 +1252,1091 @@ class AVLTreeST(object):
             raise ValueError("keys can't be 'None'")
         if high_key is None:
             raise ValueError("keys can't be 'None'")
-        if low_key > high_key:
-            return 0
-        if self.contains(high_key):
-            return self.rank(high_key) - self.rank(low_key) + 1
-        return self.rank(high_key) - self.rank(low_key)
+        return self.count_range(low_key, high_key, (True, True))
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns the number of keys in between the given keys in O(log n).
+
+        The count is the difference of the ranks of the bounds, each found
+        by one descent, whether or not the bounds are keys of the table.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are counted
+
+        Returns:
+            the number of keys within the bounds, 0 if high_key < low_key
+        """
+        low, high = 0, self.size()
+        if low_key is not None:
+            low = self._rank(self.root, self._ckey(low_key), not inclusive[0])
+        if high_key is not None:
+            high = self._rank(self.root, self._ckey(high_key), inclusive[1])
+        return max(0, high - low)
+
+    def page(self, offset, limit, items=False):
+        """Returns the keys of ranks offset to offset + limit - 1, in O(log n + limit).
+
+        The first key is found by its rank, as by select(), and only the
+        keys of the page are visited after it; keys() is never built.
+
+        Args:
+            offset: the rank of the first key of the page
+            limit : the most keys to return
+            items : return (key, value) pairs instead of keys
+
+        Returns:
+            the list of up to limit keys (or pairs) in ascending order, empty
+            if offset ≥ size()
+        """
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit can't be negative")
+        return self._page(offset, limit, items)
+
+    def page_after(self, key, limit, items=False):
+        """Returns the limit smallest keys greater than key, in O(log n + limit).
+
+        key need not be in the table, so the next page can be read after
+        the last key of a page even if that key has been deleted since.
+
+        Args:
+            key  : the marker, typically the last key of the previous page
+            limit: the most keys to return
+            items: return (key, value) pairs instead of keys
+
+        Returns:
+            the list of up to limit keys (or pairs) > key in ascending order
+        """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        if limit < 0:
+            raise ValueError("limit can't be negative")
+        return self._page(self._rank(self.root, self._ckey(key), True), limit, items)
+
+    def _page(self, k, limit, items):
+        """Returns the keys (or pairs) of ranks k to k + limit - 1.
+
+        The descent to the kth key stacks the nodes where it goes left,
+        which are the next keys in order; the walk then goes on as an
+        in-order traversal and stops after limit keys.
+        """
+        result, stack, x = [], [], self.root
+        if limit == 0:
+            return result
+        while x is not None:
+            t = 0 if x.left is None else x.left.size
+            if k < t:
+                stack.append(x)
+                x = x.left
+            elif k > t:
+                k -= t + 1
+                x = x.right
+            else:
+                stack.append(x)
+                break
+        while stack:
+            x = stack.pop()
+            result.append((x.key, x.value) if items else x.key)
+            if len(result) == limit:
+                break
+            x = x.right
+            while x is not None:
+                stack.append(x)
+                x = x.left
+        return result
+
+    def aggregate(self, low_key=None, high_key=None, name=None,
+                  inclusive=(True, False)):
+        """Folds a registered aggregate over the values of a range of keys.
+
+        The range is covered by the O(log n) nodes on the search paths of
+        its bounds and the subtrees hanging between them, whose aggregates
+        are kept in the nodes, so no key in the range is visited.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            name     : the name of the aggregate; may be omitted if only one
+                       is registered
+            inclusive: whether low_key and high_key themselves are included
+        Returns:
+            combine() folded over lift(value) of the keys in the range, in
+            key order, or the identity if the range is empty
+        """
+        if self._aggregates is None:
+            raise RuntimeError("aggregate() needs aggregates registered at construction")
+        if name is None:
+            if len(self._aggregates) != 1:
+                raise ValueError("name the aggregate to query")
+            i = 0
+        elif name in self._aggregate_specs:
+            i = list(self._aggregate_specs).index(name)
+        else:
+            raise ValueError(f"no aggregate named {name!r}")
+        combine, identity, lift = self._aggregates[i]
+        if low_key is not None:
+            low_key = self._ckey(low_key)
+        if high_key is not None:
+            high_key = self._ckey(high_key)
+
+        def above_low(key):
+            return low_key is None or (
+                not key < low_key if inclusive[0] else low_key < key)
+
+        def below_high(key):
+            return high_key is None or (
+                not high_key < key if inclusive[1] else key < high_key)
+
+        def element(x):
+            return x.value if lift is None else lift(x.value)
+
+        def agg(x):
+            return identity if x is None else x.agg[i]
+
+        x = self.root           # the highest node in the range
+        while x is not None:
+            if not above_low(x.ckey):
+                x = x.right
+            elif not below_high(x.ckey):
+                x = x.left
+            else:
+                break
+        if x is None:
+            return identity
+        left, y = identity, x.left
+        while y is not None:
+            if low_key is None:
+                left = combine(agg(y), left)
+                break
+            if above_low(y.ckey):
+                left = combine(combine(element(y), agg(y.right)), left)
+                y = y.left
+            else:
+                y = y.right
+        right, y = identity, x.right
+        while y is not None:
+            if high_key is None:
+                right = combine(right, agg(y))
+                break
+            if below_high(y.ckey):
+                right = combine(right, combine(agg(y.left), element(y)))
+                y = y.right
+            else:
+                y = y.left
+        return combine(combine(left, element(x)), right)
+
+    def _node_agg(self, x):
+        """ Return the aggregates of the subtree x computed from its children. """
+        left, right, value = x.left, x.right, x.value
+        return tuple([
+            combine(combine(identity if left is None else left.agg[i],
+                            value if lift is None else lift(value)),
+                    identity if right is None else right.agg[i])
+            for i, (combine, identity, lift) in enumerate(self._aggregates)
+        ])
+
+    def _update_agg(self, x):
+        """ Recompute the aggregates of x from its children. """
+        x.agg = self._node_agg(x)
+
+    def get_many(self, keys):
+        """Returns the values associated with many keys at once.
+
+        The keys are sorted and answered in a single traversal: at each node
+        the pending (sorted) queries are split with bisect into those going
+        left, those hitting the node and those going right, so common path
+        prefixes are walked once. A query left alone in its subtree finishes
+        with a plain search loop.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            a list with the value of each key (None if no such key), in the
+            order of the given keys.
+        """
+        order, queries = self._sorted_queries(keys)
+        results = [None] * len(queries)
+        stack = [(self.root, 0, len(queries))] if queries else []
+        while stack:
+            x, low, high = stack.pop()
+            if high - low == 1:
+                x = self._get(x, queries[low])      # a lone query: plain loop
+                if x is not None:
+                    results[order[low]] = x.value
+                continue
+            if x is None:
+                continue
+            i = bisect_left(queries, x.ckey, low, high)
+            j = bisect_right(queries, x.ckey, i, high)
+            for t in range(i, j):
+                results[order[t]] = x.value
+            if low < i:
+                stack.append((x.left, low, i))
+            if j < high:
+                stack.append((x.right, j, high))
+        return results
+
+    def contains_many(self, keys):
+        """Checks whether the table contains each of the given keys.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            a list of booleans in the order of the given keys.
+        """
+        return [value is not None for value in self.get_many(keys)]
+
+    def rank_many(self, keys):
+        """Returns the number of keys strictly less than each of the keys.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            a list with the rank of each key, in the order of the given keys.
+        """
+        order, queries = self._sorted_queries(keys)
+        results = [0] * len(queries)
+        stack = [(self.root, 0, len(queries), 0)] if queries else []
+        while stack:
+            x, low, high, r = stack.pop()
+            if high - low == 1:
+                results[order[low]] = r + self._rank(x, queries[low])
+                continue
+            if x is None:
+                for t in range(low, high):
+                    results[order[t]] = r
+                continue
+            t = r + (0 if x.left is None else x.left.size)
+            i = bisect_left(queries, x.ckey, low, high)
+            j = bisect_right(queries, x.ckey, i, high)
+            for u in range(i, j):
+                results[order[u]] = t
+            if low < i:
+                stack.append((x.left, low, i, r))
+            if j < high:
+                stack.append((x.right, j, high, t + 1))
+        return results
+
+    def floor_many(self, keys):
+        """Returns the largest key less than or equal to each of the keys.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            a list with the floor of each key (None if there is none), in
+            the order of the given keys.
+        """
+        if self.is_empty():
+            raise RuntimeError(" floor_many(keys) is called on empty table")
+        order, queries = self._sorted_queries(keys)
+        results = [None] * len(queries)
+        stack = [(self.root, 0, len(queries), None)] if queries else []
+        while stack:
+            x, low, high, best = stack.pop()
+            if high - low == 1:
+                x = self._floor(x, queries[low])
+                results[order[low]] = best if x is None else x.key
+                continue
+            if x is None:
+                for t in range(low, high):
+                    results[order[t]] = best
+                continue
+            i = bisect_left(queries, x.ckey, low, high)
+            j = bisect_right(queries, x.ckey, i, high)
+            for t in range(i, j):
+                results[order[t]] = x.key
+            if low < i:
+                stack.append((x.left, low, i, best))
+            if j < high:
+                stack.append((x.right, j, high, x.key))
+        return results
+
+    def ceiling_many(self, keys):
+        """Returns the smallest key greater than or equal to each of the keys.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            a list with the ceiling of each key (None if there is none), in
+            the order of the given keys.
+        """
+        if self.is_empty():
+            raise RuntimeError("ceiling_many(keys) is called on empty table")
+        order, queries = self._sorted_queries(keys)
+        results = [None] * len(queries)
+        stack = [(self.root, 0, len(queries), None)] if queries else []
+        while stack:
+            x, low, high, best = stack.pop()
+            if high - low == 1:
+                x = self._ceiling(x, queries[low])
+                results[order[low]] = best if x is None else x.key
+                continue
+            if x is None:
+                for t in range(low, high):
+                    results[order[t]] = best
+                continue
+            i = bisect_left(queries, x.ckey, low, high)
+            j = bisect_right(queries, x.ckey, i, high)
+            for t in range(i, j):
+                results[order[t]] = x.key
+            if low < i:
+                stack.append((x.left, low, i, x.key))
+            if j < high:
+                stack.append((x.right, j, high, best))
+        return results
+
+    def select_many(self, ks):
+        """Returns the kth smallest key for each of the given ranks.
+
+        Args:
+            ks: an iterable of order statistics
+        Returns:
+            a list with the kth smallest key for each k, in the order of the
+            given ranks.
+        """
+        ks = list(ks)
+        for k in ks:
+            if k < 0 or k >= self.size():
+                raise ValueError("k is out of range")
+        order = sorted(range(len(ks)), key=ks.__getitem__)
+        queries = [ks[i] for i in order]
+        results = [None] * len(queries)
+        stack = [(self.root, 0, len(queries), 0)] if queries else []
+        while stack:
+            x, low, high, r = stack.pop()
+            if high - low == 1:
+                results[order[low]] = self._select(x, queries[low] - r).key
+                continue
+            t = r + (0 if x.left is None else x.left.size)
+            i = bisect_left(queries, t, low, high)
+            j = bisect_right(queries, t, i, high)
+            for u in range(i, j):
+                results[order[u]] = x.key
+            if low < i:
+                stack.append((x.left, low, i, r))
+            if j < high:
+                stack.append((x.right, j, high, t + 1))
+        return results
+
+    def _sorted_queries(self, keys):
+        """Sorts the query keys of a batch operation.
+
+        Args:
+            keys: an iterable of keys
+        Returns:
+            the permutation sorting the keys, and the sorted comparison keys.
+        """
+        keys = list(keys)
+        if any(key is None for key in keys):
+            raise ValueError("Can't search 'None' in the table")
+        if self._key is not None:
+            keys = [self._key(key) for key in keys]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return order, [keys[i] for i in order]
+
+    def seek(self, key):
+        """Returns a cursor positioned on the smallest key ≥ the given key.
+
+        Args:
+            key: the key to look for
+        Returns:
+            a Cursor, which is not valid if there is no such key.
+        """
+        cursor = self.Cursor(self)
+        cursor.seek(key)
+        return cursor
+
+    def first(self):
+        """ Returns a cursor positioned on the smallest key. """
+        cursor = self.Cursor(self)
+        cursor._leftmost(self.root, None, None)
+        return cursor
+
+    def last(self):
+        """ Returns a cursor positioned on the largest key. """
+        cursor = self.Cursor(self)
+        cursor._rightmost(self.root, None, None)
+        return cursor
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        The pairs are sorted (unless presorted) and deduplicated once, then
+        a perfectly balanced tree is built bottom-up in linear time. As with
+        put(), the last value given for a key wins and a None value removes
+        the key.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        """
+        st = cls(**options)
+        keys, values, ckeys = sorted_items(items, presorted, key=st._key,
+                                           intern=st._intern)
+        st.root = st._build(keys, values, 0, len(keys) - 1, ckeys)
+        st._validate()
+        return st
+
+    def put_many(self, items):
+        """Inserts the given key-value pairs into the symbol table.
+
+        Small batches are inserted one by one. When the batch is large
+        compared to the table, the batch is sorted and merged with the keys
+        of the table, and the tree is rebuilt bottom-up in O(n + m).
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        keys, values, ckeys = sorted_items(items, False, keep_none=True,
+                                           key=self._key, intern=self._intern)
+        if len(keys) * max(1, self.height()) < self.size():
+            for key, value in zip(keys, values):
+                self.put(key, value)
+            return
+        old = []
+        self._nodes_inorder(self.root, old)
+        merged_keys, merged_values, merged_ckeys = [], [], []
+        i, j = 0, 0
+        while i < len(old) or j < len(keys):
+            if j >= len(keys) or (i < len(old) and old[i].ckey < ckeys[j]):
+                key, value, ckey = old[i].key, old[i].value, old[i].ckey
+                i += 1
+            else:
+                key, value, ckey = keys[j], values[j], ckeys[j]
+                if i < len(old) and not ckey < old[i].ckey:
+                    key = old[i].key    # as in put(), the stored key stays
+                    i += 1              # the batch overrides the old value
+                j += 1
+            if value is not None:
+                merged_keys.append(key)
+                merged_values.append(value)
+                merged_ckeys.append(ckey)
+        self.root = self._build(merged_keys, merged_values, 0, len(merged_keys) - 1,
+                                merged_ckeys)
+        self._mod_count += 1
+        self._uncache()
+        self._validate()
+
+    def split(self, key):
+        """Splits the symbol table into the keys below and from the given key.
+
+        The split walks the search path of the key once and joins the pieces
+        hanging off it, in O(log n). This table is left empty.
+
+        Args:
+            key: the key to split at
+        Returns:
+            a pair of new tables holding the keys less than key, and the keys
+            greater than or equal to key.
+        """
+        if key is None:
+            raise ValueError("Can't split at 'None'")
+        root = self.root
+        self._clear()
+        low, high = self._empty_like(), self._empty_like()
+        left, found, right = low._split(root, self._ckey(key))
+        if found is not None:
+            right = low._join(None, found, right)
+        low.root, high.root = left, right
+        low._validate(key)      # the pieces were joined along the search path
+        high._validate(key)
+        return low, high
+
+    def delete_range(self, low_key, high_key, inclusive=(True, False), items=False):
+        """Removes all keys in between the given keys.
+
+        The tree is split at both bounds and the outer pieces are joined
+        back, so the keys in the range go away as a whole subtree in
+        O(log n), however many there are. pop_min() and pop_max() remove
+        the ranges open at one end.
+
+        Args:
+            low_key  : the lowest key
+            high_key : the highest key
+            inclusive: whether low_key and high_key themselves are included
+            items    : return the removed (key, value) pairs, which takes
+                       O(k) more for k pairs
+        Returns:
+            the list of removed pairs in key order if items is True, or
+            else the number of removed keys
+        """
+        if low_key is None:
+            raise ValueError("keys can't be 'None'")
+        if high_key is None:
+            raise ValueError("keys can't be 'None'")
+        if len(inclusive) != 2:
+            raise ValueError("inclusive must be a pair of booleans")
+        low_inclusive, high_inclusive = inclusive
+        left, found, middle = self._split(self.root, self._ckey(low_key))
+        if found is not None:
+            if low_inclusive:
+                middle = self._join(None, found, middle)
+            else:
+                left = self._join(left, found, None)
+        middle, found, right = self._split(middle, self._ckey(high_key))
+        if found is not None:
+            if high_inclusive:
+                middle = self._join(middle, found, None)
+            else:
+                right = self._join(None, found, right)
+        return self._detach(middle, self._join2(left, right), items,
+                            (low_key, high_key))
+
+    def pop_min(self, n=1, items=False):
+        """Removes the n smallest keys, splitting them off by rank in O(log n).
+
+        Args:
+            n    : the number of keys to remove; all keys if n ≥ size()
+            items: return the removed (key, value) pairs, in O(n) more
+        Returns:
+            the list of removed pairs in ascending key order if items is
+            True, or else the number of removed keys
+        """
+        if n < 0:
+            raise ValueError("n can't be negative")
+        popped, rest = self._split_rank(self.root, n)
+        return self._detach(popped, rest, items,
+                            () if rest is None else (self._min(rest).key,))
+
+    def pop_max(self, n=1, items=False):
+        """Removes the n largest keys, splitting them off by rank in O(log n).
+
+        Args:
+            n    : the number of keys to remove; all keys if n ≥ size()
+            items: return the removed (key, value) pairs, in O(n) more
+        Returns:
+            the list of removed pairs in descending key order if items is
+            True, or else the number of removed keys
+        """
+        if n < 0:
+            raise ValueError("n can't be negative")
+        rest, popped = self._split_rank(self.root, max(0, self.size() - n))
+        removed = self._detach(popped, rest, items,
+                               () if rest is None else (self._max(rest).key,))
+        if items:
+            removed.reverse()
+        return removed
+
+    def _detach(self, removed, root, items, touched):
+        """Makes root the tree after the subtree removed was split off.
+
+        Args:
+            removed: the subtree split off
+            root   : the rest of the tree
+            items  : return the removed pairs rather than their number
+            touched: keys whose search paths cover the seams of the splits
+                     and joins, for validation
+        Returns:
+            the pairs of the removed subtree in key order if items is True,
+            or else their number
+        """
+        self.root = root
+        if removed is not None:
+            self._mod_count += 1
+            self._uncache()
+        self._validate(*touched)
+        if not items:
+            return self._size(removed)
+        nodes = []
+        self._nodes_inorder(removed, nodes)
+        return [(x.key, x.value) for x in nodes]
+
+    @classmethod
+    def join(cls, left, right):
+        """Joins two symbol tables whose keys do not interleave.
+
+        Every key of left must be smaller than every key of right. The join
+        takes O(|height(left) - height(right)| + 1) time and leaves both
+        tables empty.
+
+        Args:
+            left : the table with the smaller keys
+            right: the table with the larger keys
+        Returns:
+            a new table holding the keys of both tables
+        """
+        left._check_compatible(right)
+        if not left.is_empty() and not right.is_empty():
+            if not left._max(left.root).ckey < right._min(right.root).ckey:
+                raise ValueError("the keys of left must be smaller than the keys of right")
+        st = left._empty_like()
+        left_root, right_root = left.root, right.root
+        left._clear()
+        right._clear()
+        # the smallest key of right is the one joined along its path
+        seam = () if right_root is None else (st._min(right_root).key,)
+        st.root = st._join2(left_root, right_root)
+        st._validate(*seam)
+        return st
+
+    def union(self, other):
+        """Adds the keys of the other table to this table.
+
+        Values already in this table are kept for keys in both tables. This
+        takes O(m log(n/m + 1)) time for tables of sizes m ≤ n and leaves the
+        other table empty.
+
+        Args:
+            other: the table to take the keys from
+        """
+        self.merge(other, on_conflict=lambda key, value, other_value: value)
+
+    def merge(self, other, on_conflict=None):
+        """Merges the other table into this table.
+
+        This takes O(m log(n/m + 1)) time for tables of sizes m ≤ n and
+        leaves the other table empty.
+
+        Args:
+            other      : the table to take the keys from
+            on_conflict: a function (key, value, other_value) returning the
+                         value to keep for a key in both tables; by default
+                         the value of the other table wins, as in dict.update
+        """
+        self._check_compatible(other)
+        if on_conflict is None:
+            on_conflict = lambda key, value, other_value: other_value
+        other_root = other.root
+        other._clear()
+        self.root = self._union(self.root, other_root, on_conflict, False)
+        self._mod_count += 1
+        self._uncache()
+        self._validate()
+
+    def intersection(self, other):
+        """Removes the keys that are not in the other table from this table.
+
+        This takes O(m log(n/m + 1)) time for tables of sizes m ≤ n and
+        leaves the other table empty.
+
+        Args:
+            other: the table with the keys to keep
+        """
+        self._check_compatible(other)
+        other_root = other.root
+        other._clear()
+        self.root = self._intersection(self.root, other_root, False)
+        self._mod_count += 1
+        self._uncache()
+        self._validate()
+
+    def difference(self, other):
+        """Removes the keys of the other table from this table.
+
+        This takes O(m log(n/m + 1)) time for tables of sizes m ≤ n and
+        leaves the other table empty.
+
+        Args:
+            other: the table with the keys to remove
+        """
+        self._check_compatible(other)
+        other_root = other.root
+        other._clear()
+        self.root = self._difference(self.root, other_root)
+        self._mod_count += 1
+        self._uncache()
+        self._validate()
+
+    def copy(self):
+        """ Returns a new, perfectly balanced table with the same pairs. """
+        st = self._empty_like()
+        nodes = []
+        self._nodes_inorder(self.root, nodes)
+        st.root = st._build([x.key for x in nodes], [x.value for x in nodes],
+                            0, len(nodes) - 1, [x.ckey for x in nodes])
+        return st
+
+    def freeze(self):
+        """Returns an immutable copy of the table on sorted arrays, in O(n).
+
+        The copy keeps the keys and values in two sorted lists instead of a
+        graph of nodes: select() is O(1), the searches are binary searches,
+        and range queries are slices. FrozenAVLTreeST.thaw() turns it back
+        into a table with the options of this one.
+
+        Returns:
+            a FrozenAVLTreeST holding the pairs of the table
+        """
+        nodes = []
+        self._nodes_inorder(self.root, nodes)
+        keys = [x.key for x in nodes]
+        ckeys = keys if self._key is None else [x.ckey for x in nodes]
+        return FrozenAVLTreeST(keys, [x.value for x in nodes], ckeys,
+                               self._empty_like())
+
+    def snapshot(self):
+        """Returns an immutable view of the table as it is now, in O(1).
+
+        The view shares all nodes with the table. Later changes to the
+        table copy the O(log n) nodes on their path instead of changing
+        shared nodes, so the view never changes, and memory grows with the
+        number of changes rather than with the number of snapshots.
+
+        Returns:
+            an AVLTreeSnapshot supporting all read-only operations
+        Raises:
+            RuntimeError: if the table was not created with persistent=True
+        """
+        if self._edit is None:
+            raise RuntimeError("snapshot() needs a table created with persistent=True")
+        view = AVLTreeSnapshot(self.root, self._aggregate_specs, self._key,
+                               self._intern)
+        self._edit = object()   # nodes made so far now belong to the view
+        return view
+
+    def dump(self, path):
+        """Writes a compact binary image of the table to a file.
+
+        The pairs are written in the order of the table; for a table with a
+        key function, the image is marked so that it can only be read back
+        by load() and open_mmap() given a key function.
+
+        Args:
+            path: the file to write, see avl_tree_image for the format
+        """
+        avl_tree_image.write_image(path, self.iter_items(), self._keyed())
+
+    @classmethod
+    def load(cls, path, **options):
+        """Builds a symbol table from an image written by dump().
+
+        The pairs are stored in key order, so the perfectly balanced tree
+        is rebuilt in linear time without comparing any keys.
+
+        Args:
+            path   : the image file
+            options: keyword arguments for the constructor, including the
+                     key function of the dumped table, if it had one
+        Returns:
+            a new symbol table holding the pairs of the image
+        Raises:
+            ValueError: if key is given for an image without one, or the
+                        other way around
+        """
+        st = cls(**options)
+        keys, values = avl_tree_image.read_image(path, st._keyed())
+        ckeys = keys if st._key is None else [st._key(key) for key in keys]
+        st.root = st._build(keys, values, 0, len(keys) - 1, ckeys)
+        st._validate()
+        return st
+
+    @staticmethod
+    def open_mmap(path, key=None):
+        """Opens an image written by dump() as a read-only symbol table.
+
+        The file is memory-mapped rather than read: opening is O(1), each
+        query decodes only the keys it probes, and processes opening the
+        same image share its pages.
+
+        Args:
+            path: the image file
+            key : the key function of the dumped table, if it had one; the
+                  probed keys are mapped by it on every comparison
+        Returns:
+            a MappedAVLTreeST, to be closed (or used as a context manager)
+        """
+        return avl_tree_image.MappedAVLTreeST(path, key)
+
+    def _empty_like(self):
+        """ Returns an empty table with the same options as this one. """
+        return type(self)(validation=self.validation,
+                          persistent=self._edit is not None,
+                          aggregates=self._aggregate_specs, key=self._key,
+                          intern=self._intern, cache_size=self._cache_size)
+
+    def _check_compatible(self, other):
+        """ Refuse to combine the nodes of tables with other aggregates or keys. """
+        if other._aggregate_specs != self._aggregate_specs:
+            raise ValueError("the tables keep different aggregates")
+        if other._key != self._key:
+            raise ValueError("the tables order their keys by different key functions")
+
+    def _clear(self):
+        """ Removes all keys from the table. """
+        self.root = None
+        self._mod_count += 1
+        self._uncache()
+
+    def _uncache(self, ckey=_MISSING):
+        """ Drops the given comparison key, or all keys, from the read cache. """
+        if self._cache is not None:
+            if ckey is _MISSING:
+                self._cache.clear()
+            else:
+                self._cache.pop(ckey, None)
+
+    def _union(self, x, y, on_conflict, flipped):
+        """Returns the union of the subtrees x and y.
+
+        The taller subtree is split by the root of the shorter one, the
+        pieces are united recursively and joined back with that root.
+
+        Args:
+            x, y       : the subtrees, from this table and the other one
+                         (or the other way around if flipped)
+            on_conflict: the function choosing the value of a common key
+            flipped    : True if x comes from the other table
+        Returns:
+            the united subtree
+        """
+        if x is None:
+            return y
+        if y is None:
+            return x
+        if x.height > y.height:
+            x, y, flipped = y, x, not flipped
+        left, found, right = self._split(y, x.ckey)
+        x_left, x_right = x.left, x.right
+        left = self._union(x_left, left, on_conflict, flipped)
+        right = self._union(x_right, right, on_conflict, flipped)
+        if found is not None:
+            x = self._own(x)
+            if flipped:
+                x.value = on_conflict(x.key, found.value, x.value)
+            else:
+                x.value = on_conflict(x.key, x.value, found.value)
+        return self._join(left, x, right)
+
+    def _intersection(self, x, y, flipped):
+        """Returns the subtree of the keys in both x and y.
+
+        Args:
+            x, y   : the subtrees, from this table and the other one (or the
+                     other way around if flipped)
+            flipped: True if x comes from the other table
+        Returns:
+            the intersected subtree, holding the nodes of this table
+        """
+        if x is None or y is None:
+            return None
+        if x.height > y.height:
+            x, y, flipped = y, x, not flipped
+        left, found, right = self._split(y, x.ckey)
+        x_left, x_right = x.left, x.right
+        left = self._intersection(x_left, left, flipped)
+        right = self._intersection(x_right, right, flipped)
+        if found is None:
+            return self._join2(left, right)
+        return self._join(left, found if flipped else x, right)
+
+    def _difference(self, x, y):
+        """Returns the subtree of the keys of x that are not in y.
+
+        Args:
+            x: the subtree from this table
+            y: the subtree from the other table
+        Returns:
+            the remaining subtree of x
+        """
+        if x is None:
+            return None
+        if y is None:
+            return x
+        left, _, right = self._split(x, y.ckey)
+        y_left, y_right = y.left, y.right
+        left = self._difference(left, y_left)
+        right = self._difference(right, y_right)
+        return self._join2(left, right)
+
+    def _split(self, x, key):
+        """Splits the subtree x at the given key.
+
+        The search path of the key is recorded, then the pieces hanging off
+        it are joined bottom-up, which telescopes to O(log n).
+
+        Args:
+            x  : the subtree
+            key: the comparison key to split at
+        Returns:
+            the subtree of the keys less than key, the detached node holding
+            key (or None) and the subtree of the keys greater than key.
+        """
+        path = []
+        while x is not None:
+            if key < x.ckey:
+                path.append(x)
+                x = x.left
+            elif x.ckey < key:
+                path.append(x)
+                x = x.right
+            else:
+                break
+        if x is None:
+            left = right = None
+        else:
+            x = self._own(x)
+            left, right = x.left, x.right
+            x.left = x.right = None
+            x.size, x.height = 1, 0
+        for p in reversed(path):
+            if key < p.ckey:
+                right = self._join(right, p, p.right)
+            else:
+                left = self._join(p.left, p, left)
+        return left, x, right
+
+    def _split_rank(self, x, k):
+        """Splits the subtree x into its k smallest keys and the others.
+
+        As in _split(), the path to the kth key is recorded and the pieces
+        hanging off it are joined bottom-up, in O(log n).
+
+        Args:
+            x: the subtree
+            k: the number of keys of the first subtree
+        Returns:
+            the subtree of the k smallest keys and the subtree of the others
+        """
+        path = []
+        while x is not None:
+            t = 0 if x.left is None else x.left.size
+            if k <= t:
+                path.append((x, True))
+                x = x.left
+            else:
+                k -= t + 1
+                path.append((x, False))
+                x = x.right
+        left = right = None
+        for p, went_left in reversed(path):
+            if went_left:
+                right = self._join(right, p, p.right)
+            else:
+                left = self._join(p.left, p, left)
+        return left, right
+
+    def _join(self, left, x, right):
+        """Joins two subtrees with the node x in between them.
+
+        All keys of left are less than x.key and all keys of right greater.
+        The node is hung on the spine of the taller subtree, at the first
+        node no more than one taller than the other subtree, and the spine is
+        rebalanced bottom-up.
+
+        Args:
+            left : the subtree with the smaller keys
+            x    : the middle node
+            right: the subtree with the larger keys
+        Returns:
+            the joined subtree
+        """
+        hl = -1 if left is None else left.height
+        hr = -1 if right is None else right.height
+        path, c = [], None
+        if hl > hr + 1:
+            c = left
+            while (-1 if c is None else c.height) > hr + 1:
+                path.append((c, False))
+                c = c.right
+            left = c
+        elif hr > hl + 1:
+            c = right
+            while (-1 if c is None else c.height) > hl + 1:
+                path.append((c, True))
+                c = c.left
+            right = c
+        x = self._own(x)
+        x.left, x.right = left, right
+        x.size = 1 + self._size(left) + self._size(right)
+        x.height = 1 + max(self._height(left), self._height(right))
+        if self._aggregates is not None:
+            self._update_agg(x)
+        if not path:
+            return x
+        if self._edit is not None:
+            self._own_path(path)
+        return self._rebalance_path(path, x, x.size - self._size(c))
+
+    def _join2(self, left, right):
+        """Joins two subtrees without a middle node.
+
+        Args:
+            left : the subtree with the smaller keys
+            right: the subtree with the larger keys
+        Returns:
+            the joined subtree
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        x = self._min(right)
+        right = self._delete_min(right)
+        return self._join(left, x, right)
+
+    def _build(self, keys, values, low, high, ckeys=None):
+        """Builds a perfectly balanced subtree from keys[low ... high].
+
+        Args:
+            keys  : distinct keys in ascending order
+            values: values associated with the keys
+            low   : index of the smallest key of the subtree
+            high  : index of the largest key of the subtree
+            ckeys : the comparison keys of the keys, if they differ
+        Returns:
+            the root of the subtree or None if low > high
+        """
+        if low > high:
+            return None
+        mid = (low + high) // 2
+        left = self._build(keys, values, low, mid - 1, ckeys)
+        right = self._build(keys, values, mid + 1, high, ckeys)
+        x = self.Node(
+            keys[mid], values[mid],
+            1 + self._size(left) + self._size(right),
+            1 + max(self._height(left), self._height(right)),
+            left, right, self._edit, None,
+            None if ckeys is None else ckeys[mid],
+        )
+        if self._aggregates is not None:
+            self._update_agg(x)
+        return x
+
+    def _nodes_inorder(self, x, queue):
+        """Adds the nodes to queue following an in-order traversal.
+
+        Args:
+            x    : the subtree
+            queue: the queue to hold the nodes.
+        """
+        stack = []
+        while x is not None or stack:
+            while x is not None:
+                stack.append(x)
+                x = x.left
+            x = stack.pop()
+            queue.append(x)
+            x = x.right
+
+    def _validate(self, *keys):
+        """Check the invariants after mutating the given keys.
+
+        Depending on the validation level, nothing, the nodes along the
+        search paths of the keys, or the whole tree is checked. Bulk
+        operations, which touch no few paths, pass no key and get the whole
+        tree checked at the "path" level too.
+
+        Args:
+            keys: the keys whose search paths were changed, by inserting,
+                  updating, removing or rebalancing; none for a bulk change
+        Raises:
+            AssertionError: if the tree is not consistent
+        """
+        if self.validation == "off":
+            return
+        if self.validation == "full" or not keys:
+            consistent = self.checked()
+        else:
+            consistent = all(self.is_path_consistent(key) for key in keys)
+        if not consistent:
+            what = ", ".join(map(repr, keys)) if keys else "a bulk operation"
+            raise AssertionError(f"AVL tree not consistent after mutating {what}")
 
     def checked(self):
         """Check if all the representational invariantsis are consistent.
@@ -688,21 +2345,93 @@ class AVLTreeST(object):
             True if all the representational invariantsis are consistent or
             False otherwise.
         """
-        if not self.is_BST():
+        is_BST = self.is_BST()
+        is_AVL = self.is_AVL()
+        is_size_consistent = self.is_size_consistent()
+        is_rank_consistent = self.is_rank_consistent()
+        is_aggregate_consistent = self.is_aggregate_consistent()
+        is_cache_consistent = self.is_cache_consistent()
+        if not is_BST:
             print("Symmetric order not consistent")
-        if not self.is_AVL():
+        if not is_AVL:
             print("AVL property not consistent")
-        if not self.is_size_consistent():
+        if not is_size_consistent:
             print("Subtree counts not consistent")
-        if not self.is_rank_consistent():
+        if not is_rank_consistent:
             print("Ranks not consistent")
+        if not is_aggregate_consistent:
+            print("Subtree aggregates not consistent")
+        if not is_cache_consistent:
+            print("Read cache not consistent")
+        return (is_BST and is_AVL and is_size_consistent and is_rank_consistent
+                and is_aggregate_consistent and is_cache_consistent)
+
+    def is_path_consistent(self, key):
+        """Check the invariants of the nodes along the search path of key.
+
+        Every node on the path, and each of its children, is checked for the
+        AVL property, the BST property (against the bounds implied by its
+        ancestors) and consistent size and height, in O(log n).
+
+        Args:
+            key: the key of which search path is checked
+
+        Returns:
+            True if the nodes along the path are consistent or False otherwise.
+        """
+        key = self._ckey(key)
+        x, smaller, larger = self.root, None, None
+        while x is not None:
+            if not (
+                self._is_node_consistent(x, smaller, larger)
+                and self._is_node_consistent(x.left, smaller, x.ckey)
+                and self._is_node_consistent(x.right, x.ckey, larger)
+            ):
+                return False
+            if key < x.ckey:
+                x, larger = x.left, x.ckey
+            elif key > x.ckey:
+                x, smaller = x.right, x.ckey
+            else:
+                break
+        return True
+
+    def _is_node_consistent(self, x, smaller, larger):
+        """Check the invariants of a single node against its children.
+
+        Args:
+            x      : the subtree
+            smaller: the comparison key x.ckey must be larger than, or None
+            larger : the comparison key x.ckey must be smaller than, or None
+
+        Returns:
+            True if the node is consistent or False otherwise.
+        """
+        if x is None:
+            return True
+        if smaller is not None and x.ckey <= smaller:
+            return False
+        if larger is not None and x.ckey >= larger:
+            return False
+        if x.left is not None and not x.left.ckey < x.ckey:
+            return False
+        if x.right is not None and not x.ckey < x.right.ckey:
+            return False
         return (
-            self.is_BST()
-            and self.is_AVL()
-            and self.is_size_consistent()
-            and self.is_rank_consistent()
+            x.size == 1 + self._size(x.left) + self._size(x.right)
+            and x.height == 1 + max(self._height(x.left), self._height(x.right))
+            and -1 <= self._balance_factor(x) <= 1
+            and (self._aggregates is None or x.agg == self._node_agg(x))
         )
 
+    def is_AVL(self):
+        """Check if the AVL property of the tree is consistent.
+
+        Returns:
+            True if AVL property is consistent or False otherwise.
+        """
+        return self._is_AVL(self.root)
+
     def _is_AVL(self, x):
         """Check if the AVL property of the subtree is consistent.
 
@@ -739,12 +2468,12 @@ class AVLTreeST(object):
         """
         if x is None:
             return True
-        if smaller is not None and x.key <= smaller:
+        if smaller is not None and x.ckey <= smaller:
             return False
-        if larger is not None and x.key >= larger:
+        if larger is not None and x.ckey >= larger:
             return False
-        return self._is_BST(x.left, smaller, x.key) and self._is_BST(
-            x.right, x.key, larger
+        return self._is_BST(x.left, smaller, x.ckey) and self._is_BST(
+            x.right, x.ckey, larger
         )
 
     def is_size_consistent(self):
@@ -784,6 +2513,34 @@ class AVLTreeST(object):
                 return False
         return True
 
+    def is_aggregate_consistent(self):
+        """Check if the registered aggregates of all subtrees are consistent.
+
+        Returns:
+            True if every node keeps the aggregates of its subtree or False
+            otherwise.
+        """
+        if self._aggregates is None:
+            return True
+        nodes = []
+        self._nodes_inorder(self.root, nodes)
+        return all(x.agg == self._node_agg(x) for x in nodes)
+
+    def is_cache_consistent(self):
+        """Check if the read cache agrees with the tree.
+
+        Returns:
+            True if every cached key maps to its value in the tree (or to
+            None for a key not in the tree) or False otherwise.
+        """
+        if self._cache is None:
+            return True
+        for ckey, value in self._cache.items():
+            x = self._get(self.root, ckey)
+            if value is not (None if x is None else x.value):
+                return False
+        return True
+
     # ************************ Python Special Methods: ************************#
     def __len__(self):
         return self.size()
@@ -801,9 +2558,249 @@ class AVLTreeST(object):
         self.delete(key)
 
     def __iter__(self):
-        if self.root is not None:
-            return iter(self.root)
-        else:
-            return iter([])
+        return self.iter_keys()
+
+    def __reversed__(self):
+        return self.reversed()
+
+    # ********************* End of Python Special Methods *********************#
+
+
+class AVLTreeSnapshot(AVLTreeST):
+    """An immutable view of a persistent AVLTreeST at one point in time.
+
+    The view shares its nodes with the table it was taken from and supports
+    every read-only operation, including iteration, cursors and range
+    queries. The operations that would change it raise TypeError.
+    """
+
+    def __init__(self, root=None, aggregates=None, key=None, intern=False):
+        """ It initializes a view of the tree rooted at the given node. """
+        super().__init__(validation="off", aggregates=aggregates, key=key,
+                         intern=intern)
+        self.root = root
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("AVLTreeSnapshot is read-only")
+
+    put = put_many = delete = delete_min = delete_max = _read_only
+    delete_range = pop_min = pop_max = _read_only
+    split = merge = union = intersection = difference = _read_only
+    _clear = _replace_value = _read_only
+
+    def snapshot(self):
+        """ Returns the view itself, which never changes. """
+        return self
+
+    def _empty_like(self):
+        """ Returns an empty persistent table. """
+        return AVLTreeST(persistent=True, aggregates=self._aggregate_specs,
+                         key=self._key, intern=self._intern)
+
+
+class FrozenAVLTreeST(object):
+    """An immutable ordered symbol table on sorted key and value arrays.
+
+    It is made by AVLTreeST.freeze() for read-mostly workloads. Without the
+    nodes, each pair costs two list slots, select(k) is O(1), get, contains,
+    rank, floor and ceiling are binary searches, and range queries are
+    slices of the arrays.
+    """
+
+    def __init__(self, keys=(), values=(), ckeys=None, empty=None):
+        """It initializes a frozen table over the given sorted arrays.
+
+        Args:
+            keys  : distinct keys in ascending order
+            values: the values associated with the keys
+            ckeys : the comparison keys of the keys, if the table orders them
+                    by a key function
+            empty : an empty AVLTreeST with the options thaw() restores;
+                    defaults to AVLTreeST()
+        """
+        self._empty = AVLTreeST() if empty is None else empty
+        self._keys = list(keys)
+        self._values = list(values)
+        self._ckeys = self._keys if ckeys is None else list(ckeys)
+        if not len(self._keys) == len(self._values) == len(self._ckeys):
+            raise ValueError("keys and values must have the same length")
+
+    def thaw(self):
+        """Returns a mutable AVLTreeST holding the pairs, in O(n).
+
+        The perfectly balanced tree is built straight from the arrays,
+        without comparing any keys.
+        """
+        st = self._empty._empty_like()
+        st.root = st._build(self._keys, self._values, 0, len(self._keys) - 1,
+                            self._ckeys)
+        st._validate()
+        return st
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return not self._keys
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return len(self._keys)
+
+    def height(self):
+        """ Return the height of the implicit, perfectly balanced tree. """
+        return len(self._keys).bit_length() - 1
+
+    def contains(self, key):
+        """ Check whether the symbol table contains the given key or not. """
+        return self.get(key) is not None
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        ckey = self._empty._ckey(key)
+        i = bisect_left(self._ckeys, ckey)
+        if i < len(self._ckeys) and not ckey < self._ckeys[i]:
+            return self._values[i]
+        return None
+
+    def floor(self, key):
+        """ Returns the largest key less than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        i = bisect_right(self._ckeys, self._empty._ckey(key))
+        return self._keys[i - 1] if i > 0 else None
+
+    def ceiling(self, key):
+        """ Returns the smallest key greater than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        i = bisect_left(self._ckeys, self._empty._ckey(key))
+        return self._keys[i] if i < len(self._keys) else None
+
+    def select(self, k):
+        """ Returns the kth smallest key in the symbol table. """
+        if k < 0 or k >= len(self._keys):
+            raise ValueError("k is out of range")
+        return self._keys[k]
+
+    def rank(self, key):
+        """ Returns the number of keys in the table strictly less than key. """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return bisect_left(self._ckeys, self._empty._ckey(key))
+
+    def min(self):
+        """ Returns the smallest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        return self._keys[0]
+
+    def max(self):
+        """ Returns the largest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        return self._keys[-1]
+
+    def keys(self):
+        """ Returns all keys in the symbol table. """
+        return list(self._keys)
+
+    def iter_keys(self):
+        """ Returns a lazy iterator over the keys in ascending order. """
+        return iter(self._keys)
+
+    def iter_items(self):
+        """ Returns a lazy iterator over the (key, value) pairs in key order. """
+        return zip(self._keys, self._values)
+
+    def reversed(self):
+        """ Returns a lazy iterator over the keys in descending order. """
+        return reversed(self._keys)
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False),
+               reverse=False):
+        """Returns a lazy iterator over the keys in between the given keys.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+            reverse  : yield the keys in descending order
+        """
+        low, high = self._bounds(low_key, high_key, inclusive)
+        if reverse:
+            return (self._keys[i] for i in range(high - 1, low - 1, -1))
+        return (self._keys[i] for i in range(low, high))
+
+    def keys_inrange(self, low_key, high_key):
+        """ Returns all keys in between low_key (inclusive) and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        low, high = self._bounds(low_key, high_key, (True, False))
+        return self._keys[low:high]
+
+    def size_inrange(self, low_key, high_key):
+        """ Returns the number of keys in between low_key and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        low, high = self._bounds(low_key, high_key, (True, True))
+        return high - low
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """ Returns the number of keys in between the given keys. """
+        low, high = self._bounds(low_key, high_key, inclusive)
+        return high - low
+
+    def page(self, offset, limit, items=False):
+        """ Returns the keys of ranks offset to offset + limit - 1. """
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit can't be negative")
+        if items:
+            return list(zip(self._keys[offset:offset + limit],
+                            self._values[offset:offset + limit]))
+        return self._keys[offset:offset + limit]
+
+    def page_after(self, key, limit, items=False):
+        """ Returns the limit smallest keys greater than key. """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        if limit < 0:
+            raise ValueError("limit can't be negative")
+        return self.page(bisect_right(self._ckeys, self._empty._ckey(key)), limit, items)
+
+    def _bounds(self, low_key, high_key, inclusive):
+        """ Return the range of ranks of the keys within the given bounds. """
+        low, high = 0, len(self._ckeys)
+        if low_key is not None:
+            low_key = self._empty._ckey(low_key)
+            low = (bisect_left if inclusive[0] else bisect_right)(self._ckeys, low_key)
+        if high_key is not None:
+            high_key = self._empty._ckey(high_key)
+            high = (bisect_right if inclusive[1] else bisect_left)(self._ckeys, high_key)
+        return low, max(low, high)
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __reversed__(self):
+        return reversed(self._keys)
 
     # ********************* End of Python Special Methods *********************#
@@ -0,0 +1,354 @@
+"""
+A compact binary image of an ordered symbol table, and a read-only symbol
+table served straight from a memory-mapped image.
+
+The image holds the key-value pairs in ascending key order. The shape of
+the tree is implicit: it is the perfectly balanced tree over that order,
+which AVLTreeST.from_items() rebuilds in O(n), and which the binary
+searches of MappedAVLTreeST walk without building anything. Layout, all
+integers little-endian:
+
+    header : magic (8 bytes), n (uint64), offset of the record table (uint64),
+             width of the offsets (uint64)
+    records: key 0, value 0, key 1, value 1, ... each a 1-byte type tag
+             followed by its payload
+    table  : 2n + 1 file offsets of 4 (or, for images over 4 GiB, 8) bytes,
+             where record j spans table[j] ... table[j + 1]
+
+Ints are stored in as few bytes as they need, floats as doubles, strings
+as UTF-8 and bytes as they are; any other key or value is pickled.
+
+The pairs of a table built with a key function are in the order of their
+comparison keys, and the image says so with its own magic: reading it
+needs the same key function, which the image can't hold, so it is passed
+again to load() or open_mmap().
+"""
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAGIC = b"AVLST\x00\x01\x00"
+KEYED_MAGIC = b"AVLST\x00\x01\x01"     # ordered by a key function
+HEADER = struct.Struct("<8sQQQ")
+OFFSETS = {4: ("I", struct.Struct("<I")), 8: ("Q", struct.Struct("<Q"))}
+FLOAT = struct.Struct("<d")
+
+
+def encode(obj):
+    """ Return the tagged binary record of the given key or value. """
+    if type(obj) is int:
+        return b"i" + obj.to_bytes(obj.bit_length() // 8 + 1, "little", signed=True)
+    if type(obj) is float:
+        return b"f" + FLOAT.pack(obj)
+    if type(obj) is str:
+        return b"s" + obj.encode("utf-8", "surrogatepass")
+    if type(obj) is bytes:
+        return b"b" + obj
+    return b"p" + pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode(buffer, start, end):
+    """ Return the key or value of the record buffer[start ... end). """
+    tag = buffer[start:start + 1]
+    if tag == b"i":
+        return int.from_bytes(buffer[start + 1:end], "little", signed=True)
+    if tag == b"s":
+        return str(buffer[start + 1:end], "utf-8", "surrogatepass")
+    if tag == b"f":
+        return FLOAT.unpack_from(buffer, start + 1)[0]
+    if tag == b"b":
+        return bytes(buffer[start + 1:end])
+    if tag == b"p":
+        return pickle.loads(buffer[start + 1:end])
+    raise ValueError(f"corrupt image: unknown record type {tag!r}")
+
+
+def write_image(path, items, keyed=False):
+    """Writes the image of the given key-value pairs to a file.
+
+    Args:
+        path : the file to write
+        items: the (key, value) pairs in ascending key order
+        keyed: True if the pairs are ordered by a key function of the keys
+    """
+    magic = KEYED_MAGIC if keyed else MAGIC
+    offsets = array("Q")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(magic, 0, 0, 0))
+        position = HEADER.size
+        for key, value in items:
+            for record in (encode(key), encode(value)):
+                offsets.append(position)
+                f.write(record)
+                position += len(record)
+        offsets.append(position)
+        width = 4 if position < 2**32 else 8
+        padding = -position % width
+        f.write(b"\0" * padding)
+        f.write(_table_to_bytes(offsets, width))
+        f.seek(0)
+        f.write(HEADER.pack(magic, len(offsets) // 2, position + padding, width))
+
+
+def read_image(path, keyed=False):
+    """Reads all key-value pairs of an image.
+
+    Args:
+        path : the image file
+        keyed: True if the reader orders the keys by a key function
+    Returns:
+        the list of keys in ascending order and the list of their values
+    Raises:
+        ValueError: if the image is not ordered as keyed says
+    """
+    with open(path, "rb") as f:
+        buffer = f.read()
+    n, table, width = _read_header(buffer, keyed)
+    offsets = _table_from_bytes(buffer[table:table + width * (2 * n + 1)], width)
+    records = []
+    for j in range(2 * n):
+        start, end = offsets[j], offsets[j + 1]
+        tag = buffer[start]
+        if tag == 0x73:                     # the common cases inline: str
+            records.append(buffer[start + 1:end].decode("utf-8", "surrogatepass"))
+        elif tag == 0x69:                   # int
+            records.append(int.from_bytes(buffer[start + 1:end], "little", signed=True))
+        else:
+            records.append(decode(buffer, start, end))
+    return records[0::2], records[1::2]
+
+
+def _table_to_bytes(offsets, width):
+    """ Return the little-endian encoding of the offsets table. """
+    table = array(OFFSETS[width][0], offsets)
+    if sys.byteorder == "big":
+        table.byteswap()
+    return table.tobytes()
+
+
+def _table_from_bytes(data, width):
+    """ Return the offsets table of its little-endian encoding. """
+    table = array(OFFSETS[width][0], data)
+    if sys.byteorder == "big":
+        table.byteswap()
+    return table
+
+
+def _read_header(buffer, keyed):
+    """ Return the number of pairs, the offset and width of the record table. """
+    if len(buffer) < HEADER.size:
+        raise ValueError("corrupt image: file too short")
+    magic, n, table, width = HEADER.unpack_from(buffer, 0)
+    if magic not in (MAGIC, KEYED_MAGIC):
+        raise ValueError("not an AVLTreeST image")
+    if (magic == KEYED_MAGIC) != keyed:
+        if keyed:
+            raise ValueError("the image is ordered by the keys, not by a key function")
+        raise ValueError("the image is ordered by a key function, pass it as key=")
+    if width not in OFFSETS:
+        raise ValueError(f"corrupt image: offsets of {width} bytes")
+    return n, table, width
+
+
+class MappedAVLTreeST(object):
+    """A read-only ordered symbol table served from a memory-mapped image.
+
+    Nothing is deserialized up front: each query decodes only the O(log n)
+    keys its binary search probes, and processes mapping the same image
+    share its pages. select(k) is O(1); get, contains, rank, floor and
+    ceiling are O(log n), and range scans cost O(log n + k).
+    """
+
+    class _Keys(object):
+        """ A lazy sequence of the comparison keys of the image, for bisect. """
+
+        def __init__(self, table):
+            self._table = table
+
+        def __len__(self):
+            return self._table._n
+
+        def __getitem__(self, i):
+            table = self._table
+            if table._key_fn is None:
+                return table._key(i)
+            return table._key_fn(table._key(i))
+
+    def __init__(self, path, key=None):
+        """It maps the image at the given path.
+
+        Args:
+            path: the image file written by AVLTreeST.dump()
+            key : the key function of the table that was dumped, if any
+        """
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._n, self._table, self._width = _read_header(self._mm, key is not None)
+        except ValueError:
+            self._mm.close()
+            raise
+        self._offset_of = OFFSETS[self._width][1].unpack_from
+        self._key_fn = key
+        self._keys = self._Keys(self)
+
+    def close(self):
+        """ Unmaps the image. """
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _offset(self, j):
+        return self._offset_of(self._mm, self._table + self._width * j)[0]
+
+    def _key(self, i):
+        """ Decode the ith smallest key. """
+        return decode(self._mm, self._offset(2 * i), self._offset(2 * i + 1))
+
+    def _ckey(self, key):
+        """ Return the comparison key of the given key. """
+        return key if self._key_fn is None else self._key_fn(key)
+
+    def _value(self, i):
+        """ Decode the value of the ith smallest key. """
+        return decode(self._mm, self._offset(2 * i + 1), self._offset(2 * i + 2))
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return self._n == 0
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return self._n
+
+    def height(self):
+        """ Return the height of the implicit, perfectly balanced tree. """
+        return self._n.bit_length() - 1
+
+    def contains(self, key):
+        """ Check whether the symbol table contains the given key or not. """
+        return self.get(key) is not None
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        ckey = self._ckey(key)
+        i = bisect_left(self._keys, ckey)
+        if i < self._n and not ckey < self._keys[i]:
+            return self._value(i)
+        return None
+
+    def floor(self, key):
+        """ Returns the largest key less than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        i = bisect_right(self._keys, self._ckey(key))
+        return self._key(i - 1) if i > 0 else None
+
+    def ceiling(self, key):
+        """ Returns the smallest key greater than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        i = bisect_left(self._keys, self._ckey(key))
+        return self._key(i) if i < self._n else None
+
+    def select(self, k):
+        """ Returns the kth smallest key in the symbol table. """
+        if k < 0 or k >= self._n:
+            raise ValueError("k is out of range")
+        return self._key(k)
+
+    def rank(self, key):
+        """ Returns the number of keys in the table strictly less than key. """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return bisect_left(self._keys, self._ckey(key))
+
+    def min(self):
+        """ Returns the smallest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        return self._key(0)
+
+    def max(self):
+        """ Returns the largest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        return self._key(self._n - 1)
+
+    def keys(self):
+        """ Returns all keys in the symbol table. """
+        return [self._key(i) for i in range(self._n)]
+
+    def iter_items(self):
+        """ Returns a lazy iterator over the (key, value) pairs in order. """
+        for i in range(self._n):
+            yield self._key(i), self._value(i)
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns a lazy iterator over the keys in between the given keys.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+        """
+        low, high = self._bounds(low_key, high_key, inclusive)
+        for i in range(low, high):
+            yield self._key(i)
+
+    def keys_inrange(self, low_key, high_key):
+        """ Returns all keys in between low_key (inclusive) and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return list(self.irange(low_key, high_key))
+
+    def size_inrange(self, low_key, high_key):
+        """ Returns the number of keys in between low_key and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        low, high = self._bounds(low_key, high_key, (True, True))
+        return max(0, high - low)
+
+    def _bounds(self, low_key, high_key, inclusive):
+        """ Return the range of ranks of the keys within the given bounds. """
+        low, high = 0, self._n
+        if low_key is not None:
+            low_key = self._ckey(low_key)
+            low = (bisect_left if inclusive[0] else bisect_right)(self._keys, low_key)
+        if high_key is not None:
+            high_key = self._ckey(high_key)
+            high = (bisect_right if inclusive[1] else bisect_left)(self._keys, high_key)
+        return low, max(low, high)
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._key(i)
+
+    # ********************* End of Python Special Methods *********************#
@@ -0,0 +1,341 @@
+"""
+Opt-in instrumentation of avl_tree.AVLTreeST.
+
+InstrumentedAVLTreeST is an AVLTreeST that measures what every operation
+costs, so that the latency of a workload can be explained by the work the
+tree does:
+
+comparisons     : key comparisons, counted by wrapping the comparison keys
+visits          : reads of child links, by the searches and the rebalancing,
+                  counted by the nodes themselves
+single_rotations: rebalances of _balance() needing one rotation
+double_rotations: rebalances of _balance() needing two rotations
+rebalance_depth : nodes of the search path whose height changed, i.e. how
+                  far up an insertion or a deletion propagated
+
+AVLTreeST itself is left untouched, so a table that is not instrumented
+pays nothing. An instrumented table is several times slower and keeps a
+wrapper per comparison key, which is why it is a separate class. The
+counts include the comparisons made by the validation of the tree; build
+the table with validation="off" to measure the operations alone.
+
+The counts of each operation are added to per-operation totals, see
+stats(), and passed to the hooks registered with add_hook(), which can
+forward them to a metrics pipeline. depth_histogram() and
+memory_estimate() describe the shape and the footprint of any AVLTreeST.
+"""
+import sys
+
+from avl_tree import AVLTreeST, FrozenAVLTreeST
+
+# Comparisons and visits made by all the instrumented tables of the process;
+# each operation reports the difference, so the counts are not thread-safe.
+_counts = [0, 0]
+
+COUNTERS = ("comparisons", "visits", "single_rotations", "double_rotations",
+            "rebalance_depth")
+
+
+class _CountedKey(object):
+    """ A comparison key counting how often it is compared. """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        _counts[0] += 1
+        return self.key < (other.key if type(other) is _CountedKey else other)
+
+    def __gt__(self, other):
+        _counts[0] += 1
+        return self.key > (other.key if type(other) is _CountedKey else other)
+
+    def __le__(self, other):
+        _counts[0] += 1
+        return self.key <= (other.key if type(other) is _CountedKey else other)
+
+    def __ge__(self, other):
+        _counts[0] += 1
+        return self.key >= (other.key if type(other) is _CountedKey else other)
+
+    def __eq__(self, other):
+        _counts[0] += 1
+        return self.key == (other.key if type(other) is _CountedKey else other)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"_CountedKey({self.key!r})"
+
+
+def _measured(name):
+    """ Make a method running the AVLTreeST method name and recording its costs. """
+    run = getattr(AVLTreeST, name)
+
+    def method(self, *args, **kwargs):
+        if self._current is not None:           # called by another operation
+            return run(self, *args, **kwargs)
+        self._current = current = [-_counts[0], -_counts[1], 0, 0, 0]
+        try:
+            return run(self, *args, **kwargs)
+        finally:
+            current[0] += _counts[0]
+            current[1] += _counts[1]
+            self._current = None
+            self._record(name, current)
+    method.__name__ = name
+    method.__doc__ = run.__doc__
+    return method
+
+
+class InstrumentedAVLTreeST(AVLTreeST):
+    """An AVLTreeST counting the comparisons, visits and rotations of its operations.
+
+    It takes the options of AVLTreeST; key functions are supported, the
+    counted keys wrapping their results.
+    """
+
+    # *************************** Nested Node Class ***************************#
+    class Node(AVLTreeST.Node):
+        """ An AVLTreeST node counting the reads of its child links. """
+
+        @property
+        def left(self):
+            _counts[1] += 1
+            return self._left
+
+        @left.setter
+        def left(self, x):
+            self._left = x
+
+        @property
+        def right(self):
+            _counts[1] += 1
+            return self._right
+
+        @right.setter
+        def right(self, x):
+            self._right = x
+
+    # ************************ End of Nested Node Class ***********************#
+
+    def __init__(self, validation=None, persistent=False, aggregates=None,
+                 key=None, intern=False, cache_size=0):
+        """It initializes an instrumented ordered symbol table.
+
+        Args:
+            the options of AVLTreeST
+        """
+        super().__init__(validation, persistent, aggregates,
+                         self._counted_key(key), intern, cache_size)
+        self._user_key = key
+        self._current = None    # the counts of the running operation
+        self._stats = {}        # operation -> [calls, counts..., max depth]
+        self._hooks = []
+
+    def _keyed(self):
+        """ Return True if the user gave a key function, not only the counting one. """
+        return self._user_key is not None
+
+    @staticmethod
+    def _counted_key(key):
+        """ Return the key function wrapping the keys compared in _CountedKey. """
+        if key is None:
+            return _CountedKey
+        return lambda k: _CountedKey(key(k))
+
+    # ******************************* Statistics ******************************#
+    def add_hook(self, hook):
+        """Calls hook(operation, counts) after every measured operation.
+
+        Args:
+            hook: a function taking the name of the operation and a dict
+                  mapping each of COUNTERS to its count for the operation
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """ Stops calling the given hook. """
+        self._hooks.remove(hook)
+
+    def stats(self):
+        """Returns the totals of the counts of every measured operation.
+
+        Returns:
+            a dict mapping the name of each operation called to a dict of
+            its number of calls, the total of each of COUNTERS and
+            max_rebalance_depth
+        """
+        report = {}
+        for name, totals in self._stats.items():
+            entry = {"calls": totals[0]}
+            entry.update(zip(COUNTERS, totals[1:-1]))
+            entry["max_rebalance_depth"] = totals[-1]
+            report[name] = entry
+        return report
+
+    def reset_stats(self):
+        """ Forgets the counts of the operations measured so far. """
+        self._stats = {}
+
+    def report(self):
+        """ Returns the stats(), the depth_histogram() and the memory_estimate(). """
+        return {"operations": self.stats(),
+                "depth_histogram": depth_histogram(self),
+                "memory": memory_estimate(self)}
+
+    def _record(self, name, counts):
+        """ Adds the counts of one call of the operation name to its totals. """
+        totals = self._stats.get(name)
+        if totals is None:
+            totals = self._stats[name] = [0] * (len(COUNTERS) + 2)
+        totals[0] += 1
+        for i, count in enumerate(counts, 1):
+            totals[i] += count
+        if counts[-1] > totals[-1]:
+            totals[-1] = counts[-1]
+        if self._hooks:
+            counts = dict(zip(COUNTERS, counts))
+            for hook in self._hooks:
+                hook(name, counts)
+
+    # *************************** Measured operations *************************#
+    get = _measured("get")
+    contains = _measured("contains")
+    put = _measured("put")
+    delete = _measured("delete")
+    delete_min = _measured("delete_min")
+    delete_max = _measured("delete_max")
+    floor = _measured("floor")
+    ceiling = _measured("ceiling")
+    select = _measured("select")
+    rank = _measured("rank")
+    size_inrange = _measured("size_inrange")
+    count_range = _measured("count_range")
+    page = _measured("page")
+    page_after = _measured("page_after")
+    keys_inrange = _measured("keys_inrange")
+    put_many = _measured("put_many")
+    get_many = _measured("get_many")
+    delete_range = _measured("delete_range")
+    pop_min = _measured("pop_min")
+    pop_max = _measured("pop_max")
+
+    def _balance(self, x):
+        current = self._current
+        if current is not None:     # classify, without counting these reads
+            factor = self._height(x._left) - self._height(x._right)
+            if factor < -1:
+                y = x._right
+                current[3 if self._height(y._left) > self._height(y._right) else 2] += 1
+            elif factor > 1:
+                y = x._left
+                current[3 if self._height(y._left) < self._height(y._right) else 2] += 1
+        return super()._balance(x)
+
+    def _rebalance_path(self, path, x, delta):
+        current = self._current
+        if current is None:
+            return super()._rebalance_path(path, x, delta)
+        heights = [p.height for p, _ in path]
+        root = super()._rebalance_path(path, x, delta)
+        current[4] += sum(p.height != height for (p, _), height in zip(path, heights))
+        return root
+
+    # ******************************* Options *********************************#
+    def freeze(self):
+        """Returns an immutable copy of the table on sorted arrays, in O(n).
+
+        The copy is not instrumented: it holds the keys compared by the key
+        function of the user, if any, without the counting wrappers, and
+        its thaw() returns a plain AVLTreeST with the options of this table.
+
+        Returns:
+            a FrozenAVLTreeST holding the pairs of the table
+        """
+        nodes = []
+        self._nodes_inorder(self.root, nodes)
+        keys = [x.key for x in nodes]
+        ckeys = keys if self._user_key is None else [x.ckey.key for x in nodes]
+        empty = AVLTreeST(validation=self.validation, persistent=self._edit is not None,
+                          aggregates=self._aggregate_specs, key=self._user_key,
+                          intern=self._intern, cache_size=self._cache_size)
+        return FrozenAVLTreeST(keys, [x.value for x in nodes], ckeys, empty)
+
+    def _empty_like(self):
+        """ Returns an empty table with the same options as this one. """
+        return type(self)(validation=self.validation,
+                          persistent=self._edit is not None,
+                          aggregates=self._aggregate_specs, key=self._user_key,
+                          intern=self._intern, cache_size=self._cache_size)
+
+    def _check_compatible(self, other):
+        """ Refuse to combine the nodes of tables with other aggregates or keys. """
+        if other._aggregate_specs != self._aggregate_specs:
+            raise ValueError("the tables keep different aggregates")
+        if isinstance(other, InstrumentedAVLTreeST):
+            other_key = other._user_key
+        else:
+            other_key = other._key
+        if other_key != self._user_key:
+            raise ValueError("the tables order their keys by different key functions")
+
+
+def depth_histogram(tree):
+    """Counts the nodes of an AVLTreeST at every depth.
+
+    Args:
+        tree: an AVLTreeST or a subclass of it
+    Returns:
+        a list whose element d is the number of nodes at depth d, the root
+        being at depth 0; empty for an empty table
+    """
+    histogram, level = [], [tree.root] if tree.root is not None else []
+    while level:
+        histogram.append(len(level))
+        level = [c for x in level for c in (x.left, x.right) if c is not None]
+    return histogram
+
+
+def memory_estimate(tree, sample=1000):
+    """Estimates the memory taken by the nodes of an AVLTreeST.
+
+    The node itself is measured as a plain AVLTreeST.Node, without the
+    counters of an instrumented table; the keys and the values are
+    measured shallowly on the first sample nodes in key order.
+
+    Args:
+        tree  : an AVLTreeST or a subclass of it
+        sample: the number of nodes whose keys and values are measured
+    Returns:
+        a dict of the bytes of a node, of a key (with its comparison key if
+        it is a separate object) and of a value on average, their sum per
+        node, and the total for the table
+    """
+    n = tree.size()
+    if n == 0:
+        return {"node": 0, "key": 0, "value": 0, "per_node": 0, "total": 0}
+    x = tree.root
+    plain = AVLTreeST.Node(x.key, x.value, x.size, x.height, None, None,
+                           x.owner, x.agg, x.ckey)
+    node = sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+    if x.agg is not None:
+        node += sys.getsizeof(x.agg)
+    key_bytes = value_bytes = measured = 0
+    for x in tree._iter_nodes(None, None, (True, True), False):
+        ckey = x.ckey.key if type(x.ckey) is _CountedKey else x.ckey
+        key_bytes += sys.getsizeof(x.key)
+        if ckey is not x.key:
+            key_bytes += sys.getsizeof(ckey)
+        value_bytes += sys.getsizeof(x.value)
+        measured += 1
+        if measured == sample:
+            break
+    key_bytes /= measured
+    value_bytes /= measured
+    per_node = node + key_bytes + value_bytes
+    return {"node": node, "key": key_bytes, "value": value_bytes,
+            "per_node": per_node, "total": per_node * n}
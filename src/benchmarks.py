@@ -0,0 +1,1124 @@
+"""
+Benchmarks for the symbol tables and the sorts of this package.
+
+Run them from the src directory with assertions disabled, so that the
+symbol tables do not verify their invariants after every mutation:
+
+    python -O benchmarks.py                         # every printed benchmark
+    python -O benchmarks.py run bench_cache         # some of them, by name
+    python -O benchmarks.py scaling --output new.json --baseline old.json
+
+The scaling suite times every operation across sizes, key distributions
+and key types, writes the results as JSON and exits with status 1 if they
+regress from a baseline written by an earlier run.
+"""
+import argparse
+import gc
+import json
+import operator
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import accumulate
+from random import Random, randrange, seed, shuffle
+
+from arena_avl_tree import ArenaAVLTreeST
+from avl_tree import AVLTreeST
+from avl_tree_stats import InstrumentedAVLTreeST, depth_histogram, memory_estimate
+from bplus_tree import BPlusTreeST
+from buffered_avl_tree import BufferedAVLTreeST
+from concurrent_avl_tree import ConcurrentAVLTreeST
+from order_statistics import OrderStatistics
+from sortings import merge_sort, merge_sort_three, merge_sort_two, natural_merge_sort
+from symbol_tables import BACKENDS
+from utils import load_data_from_file
+from wavl_tree import WAVLTreeST
+
+
+def timed(fn, *args):
+    """Return the wall-clock seconds taken by calling fn(*args).
+
+    As in timeit, the cyclic garbage collector is paused during the call.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def timed_with_gc(fn, *args):
+    """ Return the wall-clock seconds taken by fn(*args), with the garbage collector running. """
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def best_of(repeat, fn, *args):
+    """ Return the fewest seconds taken by repeat calls of fn(*args). """
+    return min(timed(fn, *args) for _ in range(repeat))
+
+
+def shuffled_items(n):
+    """ Return n distinct integer key-value pairs in random order. """
+    items = [(i, i) for i in range(n)]
+    shuffle(items)
+    return items
+
+
+def put_all(st, items):
+    """ Insert the key-value pairs into st one by one. """
+    for key, value in items:
+        st.put(key, value)
+
+
+def bench_bulk_load(sizes=(10**3, 10**4, 10**5)):
+    """Compares AVLTreeST.from_items() against repeated put() calls."""
+    print("bulk load: from_items() vs put()")
+    print(f"\t{'n':>9} {'put()':>10} {'unsorted':>10} {'presorted':>10} {'speedup':>8}")
+    for n in sizes:
+        items = shuffled_items(n)
+        t_put = timed(put_all, AVLTreeST(), items)
+        t_bulk = timed(AVLTreeST.from_items, items)
+        t_sorted = timed(AVLTreeST.from_items, sorted(items), True)
+        print(f"\t{n:>9} {t_put:>10.4f} {t_bulk:>10.4f} {t_sorted:>10.4f} "
+              f"{t_put / t_bulk:>7.1f}x")
+
+
+def bench_operations(sizes=(10**5, 10**6), probes=10**5, cls=AVLTreeST):
+    """Measures the mean latency of get(), put() and delete() on a table.
+
+    Each table is bulk loaded with n integer keys before probes random keys
+    are looked up, and as many new keys in between them are inserted and
+    then deleted again.
+    """
+    print(f"operations on {cls.__name__}: mean latency per call (microseconds)")
+    print(f"\t{'n':>9} {'get()':>10} {'put()':>10} {'delete()':>10}")
+    for n in sizes:
+        st = cls.from_items(shuffled_items(n), validation="off")
+        hits = [key for key, _ in shuffled_items(n)[:probes]]
+        fresh = [(key + 0.5, key) for key in hits]
+        t_get = timed(lambda: [st.get(key) for key in hits])
+        t_put = timed(put_all, st, fresh)
+        t_delete = timed(lambda: [st.delete(key) for key, _ in fresh])
+        print(f"\t{n:>9} {t_get / probes * 1e6:>10.2f} "
+              f"{t_put / probes * 1e6:>10.2f} {t_delete / probes * 1e6:>10.2f}")
+
+
+def bench_storage(sizes=(10**5, 10**6)):
+    """Compares the memory of the object-per-node and arena node layouts.
+
+    Reports the memory allocated while bulk loading a table from n existing
+    integer keys and values, and the time a full garbage collection takes
+    while the table is alive.
+    """
+    print("storage: object-per-node (AVLTreeST) vs arena (ArenaAVLTreeST)")
+    print(f"\t{'n':>9} {'layout':>8} {'MiB':>8} {'B/node':>8} {'gc (ms)':>8}")
+    for n in sizes:
+        items = shuffled_items(n)
+        for name, cls in (("object", AVLTreeST), ("arena", ArenaAVLTreeST)):
+            gc.collect()
+            tracemalloc.start()
+            st = cls.from_items(items, validation="off")
+            used = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            t_gc = timed(gc.collect)
+            print(f"\t{n:>9} {name:>8} {used / 2**20:>8.1f} "
+                  f"{used / n:>8.1f} {t_gc * 1e3:>8.1f}")
+            del st
+    for cls in (AVLTreeST, ArenaAVLTreeST):
+        bench_operations(sizes, cls=cls)
+
+
+def bench_batch(n=10**6, batch_sizes=(10, 100, 1000, 10000), rounds=20):
+    """Compares get_many() and rank_many() against one call per key.
+
+    Random batches draw keys from the whole table; clustered batches draw
+    every tenth key of a random window, so their search paths share long
+    prefixes.
+    """
+    print(f"batched lookups on {n} keys: mean latency per key (microseconds)")
+    print(f"\t{'batch':>9} {'kind':>10} {'get()':>10} {'get_many':>10} "
+          f"{'rank()':>10} {'rank_many':>10}")
+    st = AVLTreeST.from_items(shuffled_items(n), validation="off")
+    for size in batch_sizes:
+        total = size * rounds / 1e6
+        clustered = []
+        for _ in range(rounds):
+            start = randrange(n - 10 * size)
+            clustered.append(list(range(start, start + 10 * size, 10)))
+            shuffle(clustered[-1])
+        spread = [[key for key, _ in shuffled_items(n)[:size]] for _ in range(rounds)]
+        for kind, batches in (("random", spread), ("clustered", clustered)):
+            t_get = timed(lambda: [[st.get(key) for key in b] for b in batches])
+            t_get_many = timed(lambda: [st.get_many(b) for b in batches])
+            t_rank = timed(lambda: [[st.rank(key) for key in b] for b in batches])
+            t_rank_many = timed(lambda: [st.rank_many(b) for b in batches])
+            print(f"\t{size:>9} {kind:>10} {t_get / total:>10.2f} "
+                  f"{t_get_many / total:>10.2f} {t_rank / total:>10.2f} "
+                  f"{t_rank_many / total:>10.2f}")
+
+
+def bench_cursor(n=10**6, walks=1000, steps=100):
+    """Compares walking successors with a cursor against select(rank + i)."""
+    print(f"ordered walks of {steps} keys on {n} keys: mean time per step (us)")
+    st = AVLTreeST.from_items(shuffled_items(n), validation="off")
+    starts = [randrange(n - steps) for _ in range(walks)]
+
+    def with_select():
+        for start in starts:
+            r = st.rank(st.ceiling(start))
+            for i in range(steps):
+                st.select(r + i)
+
+    def with_cursor():
+        for start in starts:
+            cursor = st.seek(start)
+            for i in range(steps):
+                cursor.key
+                cursor.next()
+
+    def with_finger():
+        cursor = st.first()
+        for start in sorted(starts):
+            cursor.seek(start)
+
+    total = walks * steps / 1e6
+    print(f"\tselect(rank + i): {timed(with_select) / total:.2f}")
+    print(f"\tcursor.next()   : {timed(with_cursor) / total:.2f}")
+    print(f"\tfinger seek() of sorted starts vs seek() from the root (us per seek):"
+          f" {timed(with_finger) / walks * 1e6:.2f} vs "
+          f"{timed(lambda: [st.seek(start) for start in starts]) / walks * 1e6:.2f}")
+
+
+def bench_set_ops(n=10**6, sizes=(10**2, 10**3, 10**4, 10**5)):
+    """Compares merge() of m new keys into n keys against m calls to put().
+
+    The intersection also pays for freeing the n - m discarded nodes.
+    """
+    print(f"merging m keys into {n} keys (ms)")
+    print(f"\t{'m':>9} {'put()':>10} {'merge()':>10} {'union()':>10} "
+          f"{'inter()':>10} {'diff()':>10}")
+    items = shuffled_items(n)
+    for m in sizes:
+        small = [(key * (n // m) + 0.5, 0) for key, _ in shuffled_items(m)]
+        times = []
+        for op in ("put", "merge", "union", "intersection", "difference"):
+            big = AVLTreeST.from_items(items, validation="off")
+            other = AVLTreeST.from_items(small, validation="off")
+            if op == "put":
+                times.append(timed(put_all, big, small))
+            else:
+                times.append(timed(getattr(big, op), other))
+        print(f"\t{m:>9} " + " ".join(f"{t * 1e3:>10.2f}" for t in times))
+
+
+def bench_snapshots(n=10**5, changes=10**4):
+    """Measures snapshot() and the cost of copy-on-write in persistent mode.
+
+    Reports the time of snapshot() against copy(), the put() latency with
+    and without a snapshot taken before every put, and the memory kept
+    alive by 1000 snapshots with and without changes in between.
+    """
+    print(f"persistent snapshots of {n} keys")
+    st = AVLTreeST.from_items(shuffled_items(n), validation="off", persistent=True)
+    t_snapshot = timed(lambda: [st.snapshot() for _ in range(1000)]) / 1000
+    t_copy = timed(st.copy)
+    print(f"\tsnapshot(): {t_snapshot * 1e6:.2f} us, copy(): {t_copy * 1e3:.2f} ms")
+
+    fresh = [(key + 0.5, key) for key, _ in shuffled_items(n)[:changes]]
+    items = shuffled_items(n)
+    plain = AVLTreeST.from_items(items, validation="off")
+    owned = AVLTreeST.from_items(items, validation="off", persistent=True)
+    t_plain = timed(put_all, plain, fresh)
+    t_owned = timed(put_all, owned, fresh)
+    put_all(st, fresh)
+    snapshots = []
+
+    def put_with_snapshots():
+        for key, value in fresh:
+            snapshots.append(st.snapshot())
+            st.delete(key)
+    t_shared = timed(put_with_snapshots)
+    snapshots.clear()
+    print(f"\tper change: plain put() {t_plain / changes * 1e6:.2f} us, "
+          f"persistent put() without snapshots {t_owned / changes * 1e6:.2f} us, "
+          f"snapshot + delete() {t_shared / changes * 1e6:.2f} us")
+
+    for churn in (0, 1, 10):
+        gc.collect()
+        tracemalloc.start()
+        keep = []
+        for i in range(1000):
+            keep.append(st.snapshot())
+            for key, value in fresh[i * churn:(i + 1) * churn]:
+                st.put(key, value)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"\t1000 snapshots, {churn:>2} puts between them: {used / 2**20:.2f} MiB")
+        del keep
+
+
+def bench_aggregates(n=10**6, queries=1000, widths=(10, 1000, 100000)):
+    """Compares aggregate() with folding keys_inrange() in Python.
+
+    Also reports what keeping a sum and a maximum costs put() and delete().
+    """
+    print(f"range sums over {n} keys: aggregate() vs folding keys_inrange()")
+    items = shuffled_items(n)
+    aggregates = {"sum": (operator.add, 0), "max": (max, float("-inf"))}
+    plain = AVLTreeST.from_items(items, validation="off")
+    st = AVLTreeST.from_items(items, validation="off", aggregates=aggregates)
+    for width in widths:
+        lows = [randrange(n - width) for _ in range(queries)]
+        t_fold = timed(lambda: [sum(st.get(key) for key in st.keys_inrange(low, low + width))
+                                for low in lows]) / queries
+        t_agg = timed(lambda: [st.aggregate(low, low + width, "sum")
+                               for low in lows]) / queries
+        print(f"\twidth {width:>7}: fold {t_fold * 1e6:10.1f} us, "
+              f"aggregate() {t_agg * 1e6:6.1f} us")
+    fresh = [(key + 0.5, key) for key, _ in items[:10**4]]
+    for label, table in (("plain", plain), ("sum + max", st)):
+        t_put = timed(put_all, table, fresh) / len(fresh)
+        t_delete = timed(lambda: [table.delete(key) for key, _ in fresh]) / len(fresh)
+        print(f"\t{label:>10}: put {t_put * 1e6:.2f} us, delete {t_delete * 1e6:.2f} us")
+
+
+class CountedStr(str):
+    """ A str counting the comparisons made on it, in a class attribute. """
+
+    comparisons = 0
+
+    def __lt__(self, other):
+        CountedStr.comparisons += 1
+        return str.__lt__(self, other)
+
+    def __gt__(self, other):
+        CountedStr.comparisons += 1
+        return str.__gt__(self, other)
+
+    def __eq__(self, other):
+        CountedStr.comparisons += 1
+        return str.__eq__(self, other)
+
+    __hash__ = str.__hash__
+
+
+class CaseFolded(object):
+    """ A key ordered case-insensitively by folding it at every comparison. """
+
+    __slots__ = ("s",)
+
+    def __init__(self, s):
+        self.s = s
+
+    def __lt__(self, other):
+        return self.s.casefold() < other.s.casefold()
+
+    def __gt__(self, other):
+        return self.s.casefold() > other.s.casefold()
+
+    def __eq__(self, other):
+        return self.s.casefold() == other.s.casefold()
+
+
+def url_keys(n):
+    """ Return n distinct URL-like keys sharing long prefixes, shuffled. """
+    rnd = Random(14)
+    hosts = ["https://api.example.com", "https://static.example.com",
+             "https://www.Example.org"]
+    keys = {f"{rnd.choice(hosts)}/v2/Users/{rnd.randrange(10**6):07d}/"
+            f"Orders/{rnd.randrange(10**4)}" for _ in range(n)}
+    keys = sorted(keys)
+    Random(15).shuffle(keys)
+    return keys
+
+
+def three_way_get(st, key):
+    """ The classic search loop: up to two comparisons per level. """
+    x = st.root
+    while x is not None:
+        if key < x.key:
+            x = x.left
+        elif key > x.key:
+            x = x.right
+        else:
+            return x.value
+    return None
+
+
+def bench_key_transform(n=10**5, probes=10**4):
+    """Measures the comparisons per search on URL-like string keys, and
+    compares the key= option against folding the keys in every __lt__.
+    """
+    print(f"comparisons per search over {n} URL-like keys")
+    keys = [CountedStr(key) for key in url_keys(n)]
+    st = AVLTreeST.from_items(((key, 1) for key in keys), validation="off")
+    hits = [CountedStr(str(key)) for key in keys[:probes]]
+    misses = [CountedStr(key + "!") for key in keys[:probes]]
+    for label, queries in (("hits", hits), ("misses", misses)):
+        CountedStr.comparisons = 0
+        for key in queries:
+            three_way_get(st, key)
+        classic = CountedStr.comparisons / probes
+        CountedStr.comparisons = 0
+        for key in queries:
+            st.get(key)
+        print(f"\t{label:>6}: two-way loop {classic:5.1f}, get() "
+              f"{CountedStr.comparisons / probes:5.1f}")
+    CountedStr.comparisons = 0
+    put_all(AVLTreeST(validation="off"), ((key, 1) for key in keys[:probes]))
+    print(f"\t   put: {CountedStr.comparisons / probes:5.1f} per key")
+
+    print(f"case-insensitive table of {n} URL-like keys")
+    keys = url_keys(n)
+    probe_keys = [key.upper() for key in keys[:probes]]
+    for label, st, queries in (
+        ("folding __lt__", AVLTreeST(validation="off"), [CaseFolded(k) for k in probe_keys]),
+        ("key=casefold", AVLTreeST(validation="off", key=str.casefold), probe_keys),
+        ("+ intern", AVLTreeST(validation="off", key=str.casefold, intern=True), probe_keys),
+    ):
+        items = [(CaseFolded(key) if label.startswith("folding") else key, 1)
+                 for key in keys]
+        t_put = timed(put_all, st, items) / n
+        t_get = timed(lambda: [st.get(key) for key in queries]) / probes
+        print(f"\t{label:>15}: put {t_put * 1e6:5.2f} us, get {t_get * 1e6:5.2f} us")
+
+
+def bench_cache(n=10**6, probes=10**6, cache_sizes=(0, 10**3, 10**4, 10**5)):
+    """Measures get() under skewed traffic, where 1% of the keys receive 90%
+    of the calls, with read caches of several sizes.
+    """
+    print(f"skewed get() over {n} keys: 90% of {probes} calls on 1% of the keys")
+    items = shuffled_items(n)
+    rnd = Random(15)
+    hot = [key for key, _ in items[:n // 100]]
+    queries = [rnd.choice(hot) if rnd.random() < 0.9 else rnd.randrange(n)
+               for _ in range(probes)]
+    for cache_size in cache_sizes:
+        st = AVLTreeST.from_items(items, validation="off", cache_size=cache_size)
+        t_get = timed(lambda: [st.get(key) for key in queries]) / probes
+        calls = st.cache_hits + st.cache_misses
+        hit_rate = st.cache_hits / calls if calls else 0.0
+        t_put = timed(put_all, st, items[:10**4]) / 10**4
+        print(f"\tcache {cache_size:>6}: get {t_get * 1e6:.2f} us "
+              f"(hit rate {hit_rate:4.0%}), put {t_put * 1e6:.2f} us")
+
+
+def bench_freeze(n=10**6, probes=10**5):
+    """Compares a frozen sorted-array table with the tree it was frozen from.
+
+    Reports the time and memory of freeze() and thaw(), and the time of the
+    read-only operations on both.
+    """
+    print(f"freeze() / thaw() of {n} integer keys")
+    items = shuffled_items(n)
+    st = AVLTreeST.from_items(items, validation="off")
+    frozen = st.freeze()
+    t_freeze, t_thaw = timed(st.freeze), timed(frozen.thaw)
+    used = {}
+    for label, fn in (("freeze", st.freeze), ("thaw", frozen.thaw)):
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        used[label] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+    print(f"\tfreeze {t_freeze:.2f} s ({used['freeze'] / n:.1f} B/key), "
+          f"thaw {t_thaw:.2f} s ({used['thaw'] / n:.1f} B/key)")
+    keys = [randrange(n) for _ in range(probes)]
+    ks = [randrange(n) for _ in range(probes)]
+    for label, table in (("tree", st), ("frozen", frozen)):
+        t_get = timed(lambda: [table.get(key) for key in keys]) / probes
+        t_rank = timed(lambda: [table.rank(key) for key in keys]) / probes
+        t_floor = timed(lambda: [table.floor(key + 0.5) for key in keys]) / probes
+        t_select = timed(lambda: [table.select(k) for k in ks]) / probes
+        t_range = timed(lambda: [table.keys_inrange(key, key + 100)
+                                 for key in keys[:10**4]]) / 10**4
+        print(f"\t{label:>7}: get {t_get * 1e6:.2f} us, rank {t_rank * 1e6:.2f} us, "
+              f"floor {t_floor * 1e6:.2f} us, select {t_select * 1e6:.2f} us, "
+              f"100-key range {t_range * 1e6:.1f} us")
+
+
+def bench_backends(n=10**5, probes=10**4, backends=None):
+    """Times every backend of symbol_tables on the same workloads.
+
+    Prints one row per backend with the microseconds per operation of bulk
+    loading, random and ascending insertion, lookup, rank, select, a
+    100-key range query and random deletion.
+    """
+    backends = backends or list(BACKENDS)
+    items = shuffled_items(n)
+    ascending = sorted(items)
+    keys = [randrange(n) for _ in range(probes)]
+    ks = [randrange(n) for _ in range(probes)]
+    columns = ("load", "put", "put asc", "get", "rank", "select", "range", "delete")
+    print(f"backends over {n} integer keys, microseconds per operation")
+    print(f"\t{'':>16}" + "".join(f"{c:>9}" for c in columns))
+    for backend in backends:
+        cls = BACKENDS[backend]
+        timings = [timed(lambda: cls.from_items(items, validation="off")) / n]
+        st = cls(validation="off")
+        timings.append(timed(put_all, st, items) / n)
+        timings.append(timed(put_all, cls(validation="off"), ascending) / n)
+        timings.append(timed(lambda: [st.get(key) for key in keys]) / probes)
+        timings.append(timed(lambda: [st.rank(key) for key in keys]) / probes)
+        timings.append(timed(lambda: [st.select(k) for k in ks]) / probes)
+        timings.append(timed(lambda: [st.keys_inrange(key, key + 100)
+                                      for key in keys[:probes // 10]]) / (probes // 10))
+        timings.append(timed(lambda: [st.delete(key) for key, _ in items]) / n)
+        print(f"\t{backend:>16}" + "".join(f"{t * 1e6:>9.2f}" for t in timings))
+
+
+def bench_delete_range(n=10**6, widths=(10, 1000, 100000)):
+    """Compares delete_range() and pop_min() with deleting key by key."""
+    print(f"removing k of {n} keys: one by one vs split/join")
+    st = AVLTreeST.from_items(shuffled_items(n), validation="off")
+    for width in widths:
+        low = randrange(n - 2 * width)
+        t_each = timed(lambda: [st.delete(key) for key in st.keys_inrange(low, low + width)])
+        low = st.select(randrange(st.size() - width))
+        high = st.select(st.rank(low) + width)
+        t_range = timed(st.delete_range, low, high)
+        t_mins = timed(lambda: [st.delete_min() for _ in range(width)])
+        t_pop = timed(st.pop_min, width)
+        print(f"\tk {width:>7}: delete each {t_each * 1e3:9.2f} ms, "
+              f"delete_range {t_range * 1e3:6.3f} ms; delete_min x k "
+              f"{t_mins * 1e3:9.2f} ms, pop_min(k) {t_pop * 1e3:6.3f} ms")
+
+
+def bench_instrumentation(n=10**5, probes=10**5):
+    """Measures the overhead of InstrumentedAVLTreeST over AVLTreeST, and
+    prints the work it counts per operation for random and ascending keys.
+    """
+    print(f"instrumentation over {n} keys, {probes} get() calls")
+    items = shuffled_items(n)
+    queries = [randrange(n) for _ in range(probes)]
+    for cls in (AVLTreeST, InstrumentedAVLTreeST):
+        st = cls(validation="off")
+        t_put = timed(put_all, st, items) / n
+        t_get = timed(lambda: [st.get(key) for key in queries]) / probes
+        print(f"\t{cls.__name__:>21}: put {t_put * 1e6:.2f} us, get {t_get * 1e6:.2f} us")
+    for order, pairs in (("random", items), ("ascending", sorted(items))):
+        st = InstrumentedAVLTreeST(validation="off")
+        put_all(st, pairs)
+        for key in queries:
+            st.get(key)
+        for op, counts in st.stats().items():
+            calls = counts["calls"]
+            print(f"\t{order:>9} {op:>4}: {counts['comparisons'] / calls:5.1f} comparisons, "
+                  f"{counts['visits'] / calls:5.1f} visits, "
+                  f"{(counts['single_rotations'] + counts['double_rotations']) / calls:.2f} "
+                  f"rebalances ({counts['double_rotations']} double), rebalance depth "
+                  f"{counts['rebalance_depth'] / calls:.2f} (max {counts['max_rebalance_depth']})")
+        print(f"\t{order:>9} depths: {depth_histogram(st)}")
+    memory = memory_estimate(st)
+    print(f"\tmemory: {memory['per_node']:.0f} bytes per node "
+          f"({memory['node']} for the node), {memory['total'] / 2**20:.1f} MiB in all")
+
+
+def bench_write_buffer(n=10**6, ratios=(1.0, 2.0, 4.0)):
+    """Compares the ingest throughput of BufferedAVLTreeST, flushing at
+    several ratios of the size of the tree, against put() calls on
+    AVLTreeST, into an empty table and into one holding n keys.
+
+    Speedups are measured with the garbage collector paused, as by every
+    benchmark here, and running, as in most programs: the rebuilds of the
+    flushes allocate in bursts that trigger collections.
+    """
+    print(f"ingest of {n} random keys, keys per second")
+    print(f"\t{'table':>8} {'ratio':>8} {'keys/s':>10} {'speedup':>8} {'gc on':>8}")
+    burst = [(key + 0.5, key) for key, _ in shuffled_items(n)]
+    for existing in (0, n):
+        items = [(key, key) for key in range(existing)]
+        st = AVLTreeST.from_items(items, True, validation="off")
+        t_put = timed(put_all, st, burst)
+        st = AVLTreeST.from_items(items, True, validation="off")
+        t_put_gc = timed_with_gc(put_all, st, burst)
+        print(f"\t{existing:>8} {'put()':>8} {n / t_put:>10.0f} {1:>7.1f}x {1:>7.1f}x")
+        for ratio in ratios:
+            st = BufferedAVLTreeST.from_items(items, True, ratio=ratio, validation="off")
+            t_buffered = timed(lambda: (put_all(st, burst), st.flush()))
+            st = BufferedAVLTreeST.from_items(items, True, ratio=ratio, validation="off")
+            t_buffered_gc = timed_with_gc(lambda: (put_all(st, burst), st.flush()))
+            print(f"\t{existing:>8} {ratio:>8} {n / t_buffered:>10.0f} "
+                  f"{t_put / t_buffered:>7.1f}x {t_put_gc / t_buffered_gc:>7.1f}x")
+
+
+def counting_rotations(cls):
+    """Return a subclass of cls counting its rotations, the most rotations
+    made by one update, and the nodes whose height (or rank) changed.
+    """
+    class Counting(cls):
+        rotations = most_rotations = changes = 0
+
+        def _rotate_left(self, x):
+            self.rotations += 1
+            return super()._rotate_left(x)
+
+        def _rotate_right(self, x):
+            self.rotations += 1
+            return super()._rotate_right(x)
+
+        def _rebalance_path(self, path, x, delta):
+            heights = [p.height for p, _ in path]
+            rotations = self.rotations
+            root = super()._rebalance_path(path, x, delta)
+            self.most_rotations = max(self.most_rotations, self.rotations - rotations)
+            self.changes += sum(p.height != h for (p, _), h in zip(path, heights))
+            return root
+
+    Counting.__name__ = cls.__name__
+    return Counting
+
+
+def bench_wavl(n=10**5, operations=3 * 10**5):
+    """Compares the rebalancing work and latency of AVLTreeST and WAVLTreeST.
+
+    Both start from the same n keys and run the same random insertions,
+    the same deletions of half the keys in random order, and the same mix
+    of put(), delete() and delete_min() in equal parts. Height changes
+    count the nodes on the update path whose height (or rank) changed.
+    """
+    rnd = Random(22)
+    inserts = [(rnd.random() * 2 * n, 1) for _ in range(operations)]
+    deletes = rnd.sample([2 * key for key in range(n)], n // 2)
+    mixed = [(i % 3, rnd.randrange(2 * n)) for i in range(operations)]
+    print(f"AVL vs WAVL rebalancing from {n} keys")
+    print(f"\t{'workload':>8} {'tree':>10} {'rotations/op':>13} {'most':>5} "
+          f"{'changes/op':>11} {'us/op':>7} {'height':>7}")
+    for workload in ("insert", "delete", "mixed"):
+        for cls in (AVLTreeST, WAVLTreeST):
+            st = counting_rotations(cls).from_items(
+                [(2 * key, key) for key in range(n)], True, validation="off")
+            if workload == "insert":
+                seconds, ops = timed(put_all, st, inserts), len(inserts)
+            elif workload == "delete":
+                seconds = timed(lambda: [st.delete(key) for key in deletes])
+                ops = len(deletes)
+            else:
+                def run():
+                    for op, key in mixed:
+                        if op == 0:
+                            st.put(key, key)
+                        elif op == 1:
+                            st.delete(key)
+                        elif not st.is_empty():
+                            st.delete_min()
+                seconds, ops = timed(run), len(mixed)
+            print(f"\t{workload:>8} {cls.__name__:>10} {st.rotations / ops:>13.3f} "
+                  f"{st.most_rotations:>5} {st.changes / ops:>11.2f} "
+                  f"{seconds / ops * 1e6:>7.2f} {len(depth_histogram(st)) - 1:>7}")
+
+
+def bench_window(windows=(10**3, 10**4, 10**5, 10**6), stream=10**5, batch=1000):
+    """Compares running percentiles over a sliding window of latencies.
+
+    Every pushed sample evicts the oldest one of the full window. Per push,
+    the median and the 99th percentile are read after every sample, from
+    OrderStatistics and from a sorted list kept by bisect.insort(), whose
+    O(n) inserts and deletes are memory moves. Per batch, batch samples
+    arrive at a time and are read once, pushed by push() or by push_many(),
+    which rebuilds the tree once the batch is a large part of the window.
+    """
+    rnd = Random(23)
+    print(f"sliding window percentiles over {stream} pushes (us per sample)")
+    print(f"\t{'window':>8} {'tree':>8} {'list':>8} "
+          f"{'push() per batch':>17} {'push_many()':>12}")
+    for window in windows:
+        initial = [rnd.expovariate(1.0) for _ in range(window)]
+        samples = [rnd.expovariate(1.0) for _ in range(stream)]
+        stats = OrderStatistics(window)
+        stats.push_many(initial)
+
+        def run_tree():
+            for x in samples:
+                stats.push(x)
+                stats.median()
+                stats.quantile(0.99)
+
+        arrivals, ordered = deque(initial), sorted(initial)
+
+        def run_list():
+            for x in samples:
+                del ordered[bisect_left(ordered, arrivals.popleft())]
+                arrivals.append(x)
+                insort(ordered, x)
+                ordered[(window - 1) // 2]
+                ordered[int(0.99 * (window - 1))]
+
+        def run_batches(st, bulk):
+            for i in range(0, stream, batch):
+                if bulk:
+                    st.push_many(samples[i:i + batch])
+                else:
+                    for x in samples[i:i + batch]:
+                        st.push(x)
+                st.median()
+                st.quantile(0.99)
+
+        pushed, bulk = OrderStatistics(window), OrderStatistics(window)
+        pushed.push_many(initial)
+        bulk.push_many(initial)
+        t_tree, t_list = timed(run_tree), timed(run_list)
+        t_pushed, t_bulk = timed(run_batches, pushed, False), timed(run_batches, bulk, True)
+        print(f"\t{window:>8} {t_tree / stream * 1e6:>8.2f} {t_list / stream * 1e6:>8.2f} "
+              f"{t_pushed / stream * 1e6:>17.2f} {t_bulk / stream * 1e6:>12.2f}")
+
+
+def bench_pagination(n=10**6, pages=1000, limit=50):
+    """Compares paging by offset and by marker with slicing keys().
+
+    Every page starts at a random offset; page_after() starts after the
+    key just before it, as an API resuming from the last key it returned.
+    """
+    st = AVLTreeST.from_items(((key, key) for key in range(n)), True, validation="off")
+    offsets = [randrange(n) for _ in range(pages)]
+    t_keys = timed(lambda: [st.keys()[offset:offset + limit] for offset in offsets[:10]])
+    t_page = timed(lambda: [st.page(offset, limit) for offset in offsets])
+    t_after = timed(lambda: [st.page_after(offset - 1, limit) for offset in offsets])
+    print(f"pages of {limit} keys out of {n}")
+    print(f"\tkeys() sliced : {t_keys / 10 * 1e6:10.1f} us/page")
+    print(f"\tpage()        : {t_page / pages * 1e6:10.1f} us/page")
+    print(f"\tpage_after()  : {t_after / pages * 1e6:10.1f} us/page")
+
+
+def bench_sortings(n=10**5):
+    """Compares natural_merge_sort() with the merge_sort() variants and sorted().
+
+    The inputs are presorted, reversed, presorted with 1% of the items
+    swapped at random, and random integers; every sort must agree with
+    sorted(). merge_sort() returns a new list, the others sort in place.
+    """
+    rnd = Random(25)
+    nearly = list(range(n))
+    for _ in range(n // 100):
+        i, j = rnd.randrange(n), rnd.randrange(n)
+        nearly[i], nearly[j] = nearly[j], nearly[i]
+    inputs = {"presorted": list(range(n)), "reversed": list(range(n, 0, -1)),
+              "nearly": nearly, "random": [rnd.randrange(n) for _ in range(n)]}
+    sorts = {"merge_sort": merge_sort, "merge_sort_two": merge_sort_two,
+             "merge_sort_three": merge_sort_three,
+             "natural_merge_sort": natural_merge_sort, "sorted": sorted}
+    print(f"sorting {n} integers, seconds")
+    print(f"\t{'':>18}" + "".join(f"{name:>10}" for name in inputs))
+    for name, sort in sorts.items():
+        row = []
+        for kind, data in inputs.items():
+            a = list(data)
+            result = []
+            seconds = timed(lambda: result.append(sort(a)))
+            ordered = result[0] if name in ("merge_sort", "sorted") else a
+            if ordered != sorted(data):
+                raise AssertionError(f"{name} did not sort the {kind} input")
+            row.append(seconds)
+        print(f"\t{name:>18}" + "".join(f"{seconds:>10.3f}" for seconds in row))
+
+
+def bench_image(n=10**6, probes=10**4):
+    """Compares cold starts from a text file, from dump() and from open_mmap().
+
+    The text file holds n distinct words, one per line, as read by
+    load_data_from_file(); the image is the dump() of the resulting table.
+    """
+    print(f"cold start with {n} words")
+    words = [f"w{i:09d}" for i in range(n)]
+    shuffle(words)
+    queries = [words[randrange(n)] for _ in range(probes)]
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "words.txt")
+        image_path = os.path.join(directory, "words.avl")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(words))
+        st = AVLTreeST(validation="off")
+        t_text = timed(load_data_from_file, text_path, st)
+        t_dump = timed(st.dump, image_path)
+        t_load = timed(lambda: AVLTreeST.load(image_path, validation="off"))
+        mapped = []
+        t_open = timed(lambda: mapped.append(AVLTreeST.open_mmap(image_path)))
+        with mapped[0] as m:
+            t_get = timed(lambda: [m.get(key) for key in queries]) / probes
+        t_tree_get = timed(lambda: [st.get(key) for key in queries]) / probes
+        print(f"\ttext {os.path.getsize(text_path) / 2**20:.1f} MiB, "
+              f"image {os.path.getsize(image_path) / 2**20:.1f} MiB, "
+              f"dump(): {t_dump:.3f} s")
+        print(f"\tload_data_from_file(): {t_text:.3f} s, load(): {t_load:.3f} s, "
+              f"open_mmap(): {t_open * 1e6:.1f} us")
+        print(f"\tget(): tree {t_tree_get * 1e6:.2f} us, mapped {t_get * 1e6:.2f} us")
+
+
+def bench_bplus(n=10**6, probes=10**4, cache_sizes=(2**20, 2**26)):
+    """Compares the disk-resident BPlusTreeST with the in-memory AVLTreeST.
+
+    Reports bulk loading, random get(), rank() and select(), and scans of
+    1000 consecutive keys, with page cache budgets smaller and larger than
+    the file, and the pages read from the file per operation.
+    """
+    print(f"B+-tree on disk vs AVLTreeST, {n} keys")
+    items = shuffled_items(n)
+    queries = [randrange(n) for _ in range(probes)]
+    avl = AVLTreeST.from_items(items, validation="off")
+    t_get = timed(lambda: [avl.get(key) for key in queries]) / probes
+    t_scan = timed(lambda: [avl.keys_inrange(key, key + 1000) for key in queries[:100]]) / 100
+    print(f"\t{'AVLTreeST':>20}: get {t_get * 1e6:6.2f} us, "
+          f"scan(1000) {t_scan * 1e6:8.1f} us")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "table.bpt")
+        t_load = timed(lambda: BPlusTreeST.from_items(items, path=path,
+                                                      validation="off").close())
+        print(f"\tbulk load: {t_load:.2f} s, file {os.path.getsize(path) / 2**20:.1f} MiB")
+        for cache_bytes in cache_sizes:
+            with BPlusTreeST(path, cache_bytes=cache_bytes, validation="off") as st:
+                timings = []
+                for op in (lambda: [st.get(key) for key in queries],
+                           lambda: [st.rank(key) for key in queries],
+                           lambda: [st.select(key) for key in queries]):
+                    reads = st.page_reads
+                    timings.append((timed(op) / probes, (st.page_reads - reads) / probes))
+                reads = st.page_reads
+                t_bscan = timed(lambda: [st.keys_inrange(key, key + 1000)
+                                         for key in queries[:100]]) / 100
+                scan_reads = (st.page_reads - reads) / 100
+            (t_bget, get_reads), (t_rank, _), (t_select, _) = timings
+            print(f"\t{f'cache {cache_bytes >> 20} MiB':>20}: get {t_bget * 1e6:6.2f} us "
+                  f"({get_reads:.2f} reads), rank {t_rank * 1e6:6.2f} us, "
+                  f"select {t_select * 1e6:6.2f} us, "
+                  f"scan(1000) {t_bscan * 1e6:8.1f} us ({scan_reads:.1f} reads)")
+
+
+def run_threads(st, readers, writers, seconds, n):
+    """Runs reader and writer threads against st for the given time.
+
+    Writers put key -> 2 * key pairs (in batches every tenth time) and
+    delete keys; readers check that every value they see is 2 * key.
+
+    Returns:
+        the number of reads and of writes done, and the errors raised.
+    """
+    stop = threading.Event()
+    reads, writes, errors = [], [], []      # list.append is thread-safe
+
+    def read(rng):
+        done = 0
+        try:
+            while not stop.is_set():
+                key = rng.randrange(n)
+                value = st.get(key)
+                if value is not None and value != 2 * key:
+                    raise AssertionError(f"read {key!r} -> {value!r}")
+                done += 1
+        except Exception as e:
+            errors.append(e)
+        reads.append(done)
+
+    def write(rng):
+        done = 0
+        try:
+            while not stop.is_set():
+                if done % 10 == 0:
+                    st.put_many([(key, 2 * key) for key in
+                                 (rng.randrange(n) for _ in range(100))])
+                    done += 100
+                elif rng.random() < 0.5:
+                    key = rng.randrange(n)
+                    st.put(key, 2 * key)
+                    done += 1
+                else:
+                    st.delete(rng.randrange(n))
+                    done += 1
+        except Exception as e:
+            errors.append(e)
+        writes.append(done)
+
+    threads = [threading.Thread(target=read, args=(Random(i),)) for i in range(readers)]
+    threads += [threading.Thread(target=write, args=(Random(-1 - i),))
+                for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(reads), sum(writes), errors
+
+
+def stress_concurrent(threads=8, seconds=2.0, n=10**4):
+    """Stress tests ConcurrentAVLTreeST with concurrent readers and writers.
+
+    Both modes are hammered by threads - 2 readers and 2 writers; any error
+    seen by a thread or an inconsistent tree afterwards fails the test.
+    """
+    for snapshot_reads in (False, True):
+        st = ConcurrentAVLTreeST(snapshot_reads=snapshot_reads, validation="off")
+        st.put_many((key, 2 * key) for key in range(0, n, 2))
+        reads, writes, errors = run_threads(st, threads - 2, 2, seconds, n)
+        if errors:
+            raise errors[0]
+        if not st.checked():
+            raise AssertionError("tree not consistent after the stress test")
+        print(f"\tstress (snapshot_reads={snapshot_reads}): {reads} reads, "
+              f"{writes} writes, consistent")
+
+
+def bench_concurrent(n=10**5, seconds=1.0, reader_counts=(1, 2, 4, 8)):
+    """Measures the read and write throughput with one writer thread."""
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"concurrent throughput on {n} keys (GIL {'enabled' if gil else 'disabled'}),"
+          f" operations per second")
+    print(f"\t{'mode':>9} {'readers':>8} {'reads/s':>12} {'writes/s':>12}")
+    for snapshot_reads in (False, True):
+        mode = "snapshot" if snapshot_reads else "lock"
+        for readers in reader_counts:
+            st = ConcurrentAVLTreeST(snapshot_reads=snapshot_reads, validation="off")
+            st.put_many((key, 2 * key) for key in range(n))
+            reads, writes, errors = run_threads(st, readers, 1, seconds, n)
+            if errors:
+                raise errors[0]
+            print(f"\t{mode:>9} {readers:>8} {reads / seconds:>12.0f} "
+                  f"{writes / seconds:>12.0f}")
+
+
+# ***************************** Scaling suite *****************************#
+DISTRIBUTIONS = ("random", "sequential", "reverse", "zipf")
+KEY_TYPES = ("int", "str")
+SCALING_SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+ZIPF_EXPONENT = 1.1
+SCALING_OPERATIONS = ("put", "get", "floor", "ceiling", "rank", "select",
+                      "keys_inrange", "iterate", "delete")
+
+
+def scaling_keys(n, distribution, key_type, rnd):
+    """Returns n keys in the order of the given distribution.
+
+    random, sequential and reverse are permutations of 0 ... n - 1; zipf
+    draws n keys from 0 ... n - 1 with Zipf-skewed frequencies, the hot
+    keys being scattered over the key space. str keys are the integers
+    zero-padded behind a common prefix, so that they sort alike.
+
+    Args:
+        n           : the number of keys
+        distribution: one of DISTRIBUTIONS
+        key_type    : one of KEY_TYPES
+        rnd         : the Random instance to draw from
+    """
+    if distribution == "random":
+        keys = list(range(n))
+        rnd.shuffle(keys)
+    elif distribution == "sequential":
+        keys = list(range(n))
+    elif distribution == "reverse":
+        keys = list(range(n - 1, -1, -1))
+    elif distribution == "zipf":
+        weights = list(accumulate(1 / (r + 1) ** ZIPF_EXPONENT for r in range(n)))
+        total, random = weights[-1], rnd.random
+        keys = [min(bisect_right(weights, random() * total), n - 1) * 2654435761 % n
+                for _ in range(n)]
+    else:
+        raise ValueError(f"distribution must be one of {DISTRIBUTIONS}")
+    if key_type == "str":
+        return [f"key:{key:010d}" for key in keys]
+    if key_type != "int":
+        raise ValueError(f"key_type must be one of {KEY_TYPES}")
+    return keys
+
+
+def bench_scaling(sizes=SCALING_SIZES, distributions=DISTRIBUTIONS,
+                  key_types=KEY_TYPES, probes=10**5, backend="avl", memory=True,
+                  repeat=3):
+    """Measures every operation across table sizes and key distributions.
+
+    For each size, distribution and key type, the keys are put one by one
+    in the order of the distribution; then the first probes of them, in the
+    same order, are looked up with get(), floor(), ceiling() and rank(),
+    start 100-key keys_inrange() queries (a tenth as many), and are deleted
+    at the end. select() takes random ranks and the whole table is
+    iterated. The read-only operations take the best time of repeat runs,
+    the others run once. The peak memory of the puts is traced in a separate
+    pass, since tracing slows them down.
+
+    Args:
+        sizes        : the numbers of keys
+        distributions: a subset of DISTRIBUTIONS
+        key_types    : a subset of KEY_TYPES
+        probes       : the most calls timed per query operation
+        backend      : the name of a backend of symbol_tables.BACKENDS
+        memory       : whether to trace the peak memory
+        repeat       : the number of runs of the read-only operations
+    Returns:
+        a list of result dicts, one per measurement, with the backend,
+        size, distribution, key_type and operation, and either us_per_op
+        and ops_per_sec or, for the peak_memory operation, bytes and
+        bytes_per_key
+    """
+    cls, results = BACKENDS[backend], []
+    print(f"scaling of {backend}, microseconds per operation, peak memory in bytes per key")
+    print(f"\t{'n':>9} {'keys':>16}" + "".join(f"{op[:8]:>9}" for op in SCALING_OPERATIONS)
+          + f"{'memory':>9}")
+    for n in sizes:
+        for distribution in distributions:
+            for key_type in key_types:
+                rnd = Random(n)
+                keys = scaling_keys(n, distribution, key_type, rnd)
+                queries = keys[:probes]
+                ordered = sorted(set(keys))
+                ranges = [(key, ordered[min(bisect_left(ordered, key) + 100, len(ordered) - 1)])
+                          for key in queries[:max(1, len(queries) // 10)]]
+                ranks = [rnd.randrange(len(ordered)) for _ in queries]
+                st = cls(validation="off")
+                reads = {
+                    "get": lambda: [st.get(key) for key in queries],
+                    "floor": lambda: [st.floor(key) for key in queries],
+                    "ceiling": lambda: [st.ceiling(key) for key in queries],
+                    "rank": lambda: [st.rank(key) for key in queries],
+                    "select": lambda: [st.select(k) for k in ranks],
+                    "keys_inrange": lambda: [st.keys_inrange(low, high) for low, high in ranges],
+                    "iterate": lambda: [None for _ in st],
+                }
+                calls = dict.fromkeys(reads, len(queries))
+                calls.update(put=n, keys_inrange=len(ranges), iterate=len(ordered),
+                             delete=len(queries))
+                seconds = {"put": timed(lambda: [st.put(key, key) for key in keys])}
+                for op, fn in reads.items():
+                    seconds[op] = best_of(repeat, fn)
+                seconds["delete"] = timed(lambda: [st.delete(key) for key in queries])
+                del st
+                case = {"backend": backend, "size": n, "distribution": distribution,
+                        "key_type": key_type}
+                for op in SCALING_OPERATIONS:
+                    results.append(dict(
+                        case, operation=op, us_per_op=seconds[op] / calls[op] * 1e6,
+                        ops_per_sec=calls[op] / seconds[op] if seconds[op] else None))
+                row = "".join(f"{seconds[op] / calls[op] * 1e6:>9.2f}"
+                              for op in SCALING_OPERATIONS)
+                if memory:
+                    gc.collect()
+                    tracemalloc.start()
+                    st = cls(validation="off")
+                    for key in keys:
+                        st.put(key, key)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    del st
+                    results.append(dict(case, operation="peak_memory", bytes=peak,
+                                        bytes_per_key=peak / len(ordered)))
+                    row += f"{peak / len(ordered):>9.0f}"
+                print(f"\t{n:>9} {distribution + ' ' + key_type:>16}" + row)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.1):
+    """Flags the results worse than the matching results of a baseline.
+
+    Results match when they have the same backend, size, distribution, key
+    type and operation; a result regresses when its us_per_op, or its
+    bytes for peak_memory, exceeds the baseline by more than tolerance.
+
+    Args:
+        results  : the result dicts of bench_scaling()
+        baseline : the result dicts of an earlier run
+        tolerance: the relative slack, 0.1 for 10%
+    Returns:
+        a list of (result, baseline result, ratio) for the regressions
+    """
+    def case(result):
+        return (result["backend"], result["size"], result["distribution"],
+                result["key_type"], result["operation"])
+
+    before = {case(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = before.get(case(result))
+        if old is None:
+            continue
+        metric = "bytes" if result["operation"] == "peak_memory" else "us_per_op"
+        if old[metric] and result[metric] > old[metric] * (1 + tolerance):
+            regressions.append((result, old, result[metric] / old[metric]))
+    return regressions
+
+
+def main(argv=None):
+    """Runs the benchmarks from the command line; see --help.
+
+    Returns:
+        the exit status, 1 if the scaling suite regressed from its baseline
+    """
+    printed = list(BENCHMARKS)
+    parser = argparse.ArgumentParser(
+        description="Benchmarks for the symbol tables of this package; without a "
+                    "command, runs every printed benchmark.")
+    commands = parser.add_subparsers(dest="command")
+    run = commands.add_parser("run", help="run printed benchmarks by name")
+    run.add_argument("names", nargs="*", choices=printed, metavar="NAME",
+                     help=f"any of {', '.join(printed)}; all by default")
+    scaling = commands.add_parser("scaling", help="run the scaling suite")
+    scaling.add_argument("--sizes", type=int, nargs="+", default=SCALING_SIZES)
+    scaling.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS,
+                         default=DISTRIBUTIONS)
+    scaling.add_argument("--key-types", nargs="+", choices=KEY_TYPES, default=KEY_TYPES)
+    scaling.add_argument("--probes", type=int, default=10**5,
+                         help="the most calls timed per query operation")
+    scaling.add_argument("--repeat", type=int, default=3,
+                         help="the runs of the read-only operations, the best counting")
+    scaling.add_argument("--backend", choices=tuple(BACKENDS), default="avl")
+    scaling.add_argument("--no-memory", action="store_true",
+                         help="skip the traced pass measuring the peak memory")
+    scaling.add_argument("--output", help="write the results to this JSON file")
+    scaling.add_argument("--baseline", help="compare the results to this JSON file")
+    scaling.add_argument("--tolerance", type=float, default=0.1,
+                         help="the relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    seed(0)
+    if args.command != "scaling":
+        for name in (args.names if args.command == "run" and args.names else printed):
+            BENCHMARKS[name]()
+        return 0
+    results = bench_scaling(args.sizes, args.distributions, args.key_types,
+                            args.probes, args.backend, not args.no_memory, args.repeat)
+    if args.output:
+        report = {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "optimize": sys.flags.optimize,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for result, old, ratio in regressions:
+            metric = "bytes" if result["operation"] == "peak_memory" else "us_per_op"
+            print(f"REGRESSION {result['operation']} n={result['size']} "
+                  f"{result['distribution']} {result['key_type']}: "
+                  f"{old[metric]:.4g} -> {result[metric]:.4g} {metric} ({ratio:.2f}x)")
+        print(f"{len(regressions)} regressions beyond {args.tolerance:.0%} "
+              f"against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+BENCHMARKS = {fn.__name__: fn for fn in (
+    bench_bulk_load, bench_operations, bench_storage, bench_batch, bench_cursor,
+    bench_set_ops, bench_snapshots, bench_aggregates, bench_key_transform,
+    bench_cache, bench_freeze, bench_backends, bench_delete_range,
+    bench_instrumentation, bench_write_buffer, bench_wavl, bench_window,
+    bench_pagination, bench_sortings, bench_image, bench_bplus, stress_concurrent,
+    bench_concurrent,
+)}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
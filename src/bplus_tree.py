@@ -0,0 +1,966 @@
+"""
+A disk-resident ordered symbol table backed by a B+-tree, for tables that do
+not fit in memory.
+
+The tree lives in a file of fixed-size pages. Leaf pages hold the key-value
+pairs in key order and are chained left to right, so range scans read them
+sequentially. Internal pages hold separator keys, the ids of their children
+and, for each child, the number of keys below it; like Node.size in
+AVLTreeST, these counts let rank() and select() run in O(log n) page visits.
+Pages split and merge by their encoded size in bytes, so the fanout adapts
+to the keys: hundreds of small keys share a 4 KiB page.
+
+Only the pages in an LRU cache with a configurable budget are held in memory.
+Changed pages are written back when they are evicted and by flush() or
+close(). Writes are not crash-safe: a table whose process died between two
+flushes must be rebuilt.
+
+The symbol table supports the operations of avl_tree.AVLTreeST that do not
+hand out nodes: get, put, delete, contains, delete_min, delete_max, min,
+max, floor, ceiling, rank, select, keys, keys_inrange, size_inrange,
+count_range, irange, iter_items, from_items and put_many.
+"""
+import os
+import pickle
+import struct
+import tempfile
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from avl_tree import AVLTreeST
+from avl_tree_image import decode, encode
+from utils import sorted_items
+
+MAGIC = b"BPLUSST\x01"
+META = struct.Struct("<8sIIIIQ")    # magic, page size, root, pages, free, size
+PAGE_HEADER = struct.Struct("<BHII")   # kind, entries, next page, size
+LENGTH = struct.Struct("<I")
+LEAF, INTERNAL, FREE = 0, 1, 2
+RECORDS = 0x80      # kind flag of pages stored as records instead of pickled
+PICKLE_PROTOCOL = 4
+NONE = 0        # page 0 holds the meta data, so no tree page has id 0
+MAX_PAGE_SIZE = 2**19  # keeps the number of entries of a page below 2**16
+MIN_CACHE_PAGES = 8
+BULK_FILL = 0.9     # fraction of a page filled by bulk loading
+
+
+class BPlusTreeST(object):
+    """Symbol table implementation using an out-of-core B+-tree.
+
+    The class represents an ordered symbol table of generic key-value pairs
+    with the interface and semantics of AVLTreeST; min() and max() return
+    keys. Keys and values are stored as in avl_tree_image, so ints, floats,
+    strings and bytes are stored natively and anything else is pickled.
+    """
+
+    class Page(object):
+        """A page of the tree as held in the page cache.
+
+        A leaf page has keys and values; an internal page has len(keys) + 1
+        children and the number of keys below each child in counts, where
+        child i holds the keys k with keys[i - 1] <= k < keys[i].
+        """
+        __slots__ = ("id", "leaf", "keys", "values", "children", "counts",
+                     "next", "nbytes", "dirty")
+
+        def __init__(self, id, leaf, keys, values=None, children=None,
+                     counts=None, next=NONE, nbytes=PAGE_HEADER.size):
+            self.id = id  # the page number in the file
+            self.leaf = leaf  # whether the page is a leaf
+            self.keys = keys  # the keys, or the separators of the children
+            self.values = values  # values of the keys of a leaf
+            self.children = children  # page ids of the children
+            self.counts = counts  # number of keys below each child
+            self.next = next  # the next leaf to the right
+            self.nbytes = nbytes  # the encoded size of the page
+            self.dirty = False  # whether the file holds an older version
+
+    VALIDATION_LEVELS = AVLTreeST.VALIDATION_LEVELS
+
+    def __init__(self, path=None, page_size=4096, cache_bytes=2**24,
+                 validation=None):
+        """It opens or creates an ordered symbol table stored in a file.
+
+        Args:
+            path       : the file of the table, created if missing or empty,
+                         or None for an anonymous temporary file
+            page_size  : the size of a page in bytes, for new files
+            cache_bytes: memory budget of the page cache, in bytes of pages
+            validation : how much of the tree is checked after each mutation;
+                         "off", "path" or "full" (see AVLTreeST)
+        """
+        if validation is None:
+            validation = "path" if __debug__ else "off"
+        if validation not in self.VALIDATION_LEVELS:
+            raise ValueError(f"validation must be one of {self.VALIDATION_LEVELS}")
+        self.validation = validation
+        if path is None:
+            self._file = tempfile.TemporaryFile()
+        elif os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+        else:
+            self._file = open(path, "w+b")
+        self._cache = OrderedDict()
+        self._mod_count = 0
+        self.page_reads = self.page_writes = 0
+
+        self._file.seek(0)
+        meta = self._file.read(META.size)
+        if meta:
+            (magic, self.page_size, self.root, self._pages, self._free,
+             self._n) = META.unpack(meta)
+            if magic != MAGIC:
+                raise ValueError("not a BPlusTreeST file")
+        elif not 256 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 256 and {MAX_PAGE_SIZE} bytes")
+        else:
+            self.page_size = page_size
+        self._capacity = self.page_size - PAGE_HEADER.size
+        self._max_entry = self._capacity // 4
+        self._cache_pages = max(MIN_CACHE_PAGES, cache_bytes // self.page_size)
+        if not meta:
+            self._pages, self._free, self._n = 1, NONE, 0
+            root = self.Page(self._allocate(), True, [], [])
+            self.root = root.id
+            self._touch(root)
+            self.flush()
+
+    # ******************************* Page Storage ****************************#
+    def _page(self, id):
+        """ Return the page with the given id, reading it if not cached. """
+        page = self._cache.get(id)
+        if page is not None:
+            self._cache.move_to_end(id)
+            return page
+        self._file.seek(id * self.page_size)
+        page = self._decode(id, self._file.read(self.page_size))
+        self.page_reads += 1
+        self._cache[id] = page
+        self._evict()
+        return page
+
+    def _touch(self, page):
+        """ Mark the page as changed, caching it again if it was evicted. """
+        page.dirty = True
+        self._cache[page.id] = page
+        self._cache.move_to_end(page.id)
+        self._evict()
+
+    def _evict(self):
+        """ Drop the least recently used pages over the budget, writing them. """
+        while len(self._cache) > self._cache_pages:
+            _, page = self._cache.popitem(last=False)
+            if page.dirty:
+                self._write(page)
+
+    def _write(self, page):
+        """ Write the page to its place in the file. """
+        data = self._encode(page)
+        assert len(data) <= self.page_size, "page overflow"
+        self._file.seek(page.id * self.page_size)
+        self._file.write(data.ljust(self.page_size, b"\0"))
+        self.page_writes += 1
+        page.dirty = False
+
+    def _allocate(self):
+        """ Return the id of an unused page, reusing a freed one if any. """
+        id = self._free
+        if id != NONE:
+            self._file.seek(id * self.page_size)
+            _, _, self._free, _ = PAGE_HEADER.unpack(self._file.read(PAGE_HEADER.size))
+            return id
+        self._pages += 1
+        return self._pages - 1
+
+    def _release(self, page):
+        """ Put the page on the free list. """
+        self._cache.pop(page.id, None)
+        self._file.seek(page.id * self.page_size)
+        self._file.write(PAGE_HEADER.pack(FREE, 0, self._free, 0))
+        self._free = page.id
+
+    def _encode(self, page):
+        """Return the bytes of the page as stored in the file.
+
+        The keys and values are pickled as whole lists, which decode at C
+        speed. The size of a page, which decides when it splits, is the size
+        it takes with each key and value a record of avl_tree_image; the few
+        pages whose pickle would not fit in a page are stored that way.
+        """
+        if page.leaf:
+            kind, m, links = LEAF, len(page.keys), b""
+            columns = (page.keys, page.values)
+        else:
+            kind, m = INTERNAL, len(page.children)
+            links = struct.pack(f"<{m}I{m}Q", *page.children, *page.counts)
+            columns = page.keys
+        body = pickle.dumps(columns, PICKLE_PROTOCOL)
+        if PAGE_HEADER.size + len(links) + len(body) > self.page_size:
+            kind |= RECORDS
+            body = self._encode_records(page)
+        return PAGE_HEADER.pack(kind, m, page.next, page.nbytes) + links + body
+
+    def _encode_records(self, page):
+        """ Return the keys and values of the page as length-prefixed records. """
+        if page.leaf:
+            records = [record for pair in zip(page.keys, page.values)
+                       for record in map(encode, pair)]
+        else:
+            records = [encode(key) for key in page.keys]
+        return b"".join(LENGTH.pack(len(record)) + record for record in records)
+
+    def _decode(self, id, data):
+        """ Return the page of the given bytes read from the file. """
+        kind, m, next, nbytes = PAGE_HEADER.unpack_from(data, 0)
+        leaf = kind & ~RECORDS == LEAF
+        if not leaf and kind & ~RECORDS != INTERNAL:
+            raise ValueError(f"corrupt table: page {id} is not in the tree")
+        position = PAGE_HEADER.size
+        if not leaf:
+            fields = struct.unpack_from(f"<{m}I{m}Q", data, position)
+            children, counts = list(fields[:m]), list(fields[m:])
+            position += 12 * m
+        if kind & RECORDS:
+            records = []
+            for _ in range(2 * m if leaf else m - 1):
+                length = LENGTH.unpack_from(data, position)[0]
+                position += 4
+                records.append(decode(data, position, position + length))
+                position += length
+            columns = (records[0::2], records[1::2]) if leaf else records
+        else:
+            columns = pickle.loads(data[position:])    # ignores the padding
+        if leaf:
+            keys, values = columns
+            return self.Page(id, True, keys, values, next=next, nbytes=nbytes)
+        return self.Page(id, False, columns, children=children, counts=counts,
+                         nbytes=nbytes)
+
+    def flush(self):
+        """ Write all changed pages and the meta data to the file. """
+        for page in self._cache.values():
+            if page.dirty:
+                self._write(page)
+        self._file.seek(0)
+        self._file.write(META.pack(MAGIC, self.page_size, self.root,
+                                   self._pages, self._free, self._n))
+        self._file.flush()
+
+    def close(self):
+        """ Flush the table and close its file. """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # *************************** End of Page Storage *************************#
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return self._n == 0
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return self._n
+
+    def height(self):
+        """Computes the height of the B+-tree.
+
+        The convention is that the height of an empty table is -1 and of a
+        table held in a single leaf is 0.
+        """
+        if self.is_empty():
+            return -1
+        page, h = self._page(self.root), 0
+        while not page.leaf:
+            page, h = self._page(page.children[0]), h + 1
+        return h
+
+    def _leaf(self, key):
+        """ Return the leaf page where the given key belongs. """
+        page = self._page(self.root)
+        while not page.leaf:
+            page = self._page(page.children[bisect_right(page.keys, key)])
+        return page
+
+    def contains(self, key):
+        """Check whether the symbol table contains the given key or not.
+
+        Args:
+            key: the key to check if it is in the table
+        Returns:
+            True if the table contains the given key or False otherwise
+        """
+        if key is None:
+            raise ValueError("Can't search 'None'")
+        return self.get(key) is not None
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        Returns:
+            value associated with the given key if the key is in the table and
+            None if the key is not in the table.
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        leaf = self._leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return leaf.values[i]
+        return None
+
+    def put(self, key, value):
+        """Inserts the key-value pair into the symbol table.
+
+        It overwrites the old value with the new value if the symbol table
+        already contains the given key. It deletes the key (and its value)
+        from the symbol table if the given value is None.
+
+        Args:
+            key  : the key to be inserted
+            value: the value associated with the given key
+        Raises:
+            ValueError: if the pair is too large to share a page with others
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if value is None:
+            self.delete(key)
+            return
+        key_size, value_size = len(encode(key)), len(encode(value))
+        if max(8 + key_size + value_size, 16 + key_size) > self._max_entry:
+            raise ValueError(f"key-value pair too large for pages of "
+                             f"{self.page_size} bytes")
+        path, page = [], self._page(self.root)
+        while not page.leaf:
+            i = bisect_right(page.keys, key)
+            path.append((page, i))
+            page = self._page(page.children[i])
+        i = bisect_left(page.keys, key)
+        if i < len(page.keys) and page.keys[i] == key:
+            page.nbytes += value_size - len(encode(page.values[i]))
+            page.values[i] = value
+        else:
+            page.keys.insert(i, key)
+            page.values.insert(i, value)
+            page.nbytes += 8 + key_size + value_size
+            for parent, j in path:
+                parent.counts[j] += 1
+                self._touch(parent)
+            self._n += 1
+        self._mod_count += 1
+        self._touch(page)
+        while page.nbytes > self.page_size:
+            page = self._split(page, path.pop() if path else None)
+        self._validate(key)
+
+    def _split(self, page, parent_entry):
+        """Splits an overflowing page in two halves of about equal size.
+
+        Args:
+            page        : the overflowing page
+            parent_entry: the parent page and the index of page in it, or
+                          None if the page is the root
+        Returns:
+            the parent page, which may overflow in turn
+        """
+        if page.leaf:
+            sizes = [8 + len(encode(k)) + len(encode(v))
+                     for k, v in zip(page.keys, page.values)]
+        else:
+            sizes = [12] + [16 + len(encode(k)) for k in page.keys]
+        half, s, total = (page.nbytes - PAGE_HEADER.size) // 2, 0, 0
+        while total + sizes[s] <= half:
+            total += sizes[s]
+            s += 1
+        s = max(s, 1)
+        total = sum(sizes[:s])
+        right = self.Page(self._allocate(), page.leaf, None)
+        if page.leaf:
+            right.keys, right.values = page.keys[s:], page.values[s:]
+            del page.keys[s:], page.values[s:]
+            right.next, page.next = page.next, right.id
+            separator = right.keys[0]
+            right.nbytes = page.nbytes - total
+            page.nbytes = PAGE_HEADER.size + total
+            moved = len(right.keys)
+        else:
+            separator = page.keys[s - 1]
+            right.keys, right.children = page.keys[s:], page.children[s:]
+            right.counts = page.counts[s:]
+            del page.keys[s - 1:], page.children[s:], page.counts[s:]
+            right.nbytes = page.nbytes - total - sizes[s] + 12
+            page.nbytes = PAGE_HEADER.size + total
+            moved = sum(right.counts)
+        if parent_entry is None:
+            parent = self.Page(self._allocate(), False, [], children=[page.id],
+                               counts=[moved + (sum(page.counts) if not page.leaf
+                                                else len(page.keys))],
+                               nbytes=PAGE_HEADER.size + 12)
+            self.root = parent.id
+            i = 0
+        else:
+            parent, i = parent_entry
+        parent.keys.insert(i, separator)
+        parent.children.insert(i + 1, right.id)
+        parent.counts[i] -= moved
+        parent.counts.insert(i + 1, moved)
+        parent.nbytes += 16 + len(encode(separator))
+        self._touch(page)
+        self._touch(right)
+        self._touch(parent)
+        return parent
+
+    def delete(self, key):
+        """Removes the specified key and its associated value from the table.
+
+        Args:
+            key: the key to be removed from the table
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        path, page = [], self._page(self.root)
+        while not page.leaf:
+            i = bisect_right(page.keys, key)
+            path.append((page, i))
+            page = self._page(page.children[i])
+        i = bisect_left(page.keys, key)
+        if i == len(page.keys) or page.keys[i] != key:
+            return
+        page.nbytes -= 8 + len(encode(key)) + len(encode(page.values[i]))
+        del page.keys[i], page.values[i]
+        for parent, j in path:
+            parent.counts[j] -= 1
+            self._touch(parent)
+        self._touch(page)
+        self._n -= 1
+        self._mod_count += 1
+        while path and page.nbytes - PAGE_HEADER.size < self._capacity // 4:
+            parent, i = path.pop()
+            if not self._merge(parent, i, page):
+                break
+            page = parent
+        root = self._page(self.root)
+        if not root.leaf and len(root.children) == 1:
+            self.root = root.children[0]
+            self._release(root)
+        self._validate(key)
+
+    def _merge(self, parent, i, page):
+        """Merges the underfull child i of parent with a sibling if they fit.
+
+        Args:
+            parent: an internal page
+            i     : the index of the underfull child
+            page  : the underfull child
+        Returns:
+            True if the children were merged, False if they do not fit
+        """
+        if len(parent.children) == 1:
+            return False
+        if i == len(parent.children) - 1:
+            i -= 1
+            left, right = self._page(parent.children[i]), page
+        else:
+            left, right = page, self._page(parent.children[i + 1])
+        separator = parent.keys[i]
+        nbytes = left.nbytes + right.nbytes - PAGE_HEADER.size
+        if not left.leaf:
+            nbytes += 4 + len(encode(separator))
+        if nbytes > self.page_size:
+            return False
+        if left.leaf:
+            left.keys += right.keys
+            left.values += right.values
+            left.next = right.next
+        else:
+            left.keys += [separator] + right.keys
+            left.children += right.children
+            left.counts += right.counts
+        left.nbytes = nbytes
+        del parent.keys[i], parent.children[i + 1]
+        parent.counts[i] += parent.counts.pop(i + 1)
+        parent.nbytes -= 16 + len(encode(separator))
+        self._release(right)
+        self._touch(left)
+        self._touch(parent)
+        return True
+
+    def delete_min(self):
+        """Removes the smallest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_min() is called on empty table")
+        self.delete(self.min())
+
+    def delete_max(self):
+        """Remove the largest key and its value from the symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" delete_max() is called on empty table")
+        self.delete(self.max())
+
+    def max(self):
+        """Reutrns the largest key in the Symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        page = self._page(self.root)
+        while not page.leaf:
+            page = self._page(page.children[-1])
+        return page.keys[-1]
+
+    def min(self):
+        """Reutrns the smallest key in the Symbol table"""
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        page = self._page(self.root)
+        while not page.leaf:
+            page = self._page(page.children[0])
+        return page.keys[0]
+
+    def floor(self, key):
+        """Returns the largest key less than or equal to the given key.
+
+        Args:
+            key  : the key
+        Returns:
+            the largest key less than or equal to the given key.
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        page, fallback = self._page(self.root), None
+        while not page.leaf:
+            i = bisect_right(page.keys, key)
+            if i > 0:
+                fallback = page.children[i - 1]
+            page = self._page(page.children[i])
+        i = bisect_right(page.keys, key)
+        if i > 0:
+            return page.keys[i - 1]
+        if fallback is None:
+            return None
+        page = self._page(fallback)       # the rightmost key left of the path
+        while not page.leaf:
+            page = self._page(page.children[-1])
+        return page.keys[-1]
+
+    def ceiling(self, key):
+        """Returns the smallest key greater than or equal to the given key.
+
+        Args:
+            key  : the key
+        Returns:
+            the smallest key greater than or equal to the given key
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        page = self._leaf(key)
+        i = bisect_left(page.keys, key)
+        if i < len(page.keys):
+            return page.keys[i]
+        if page.next == NONE:
+            return None
+        return self._page(page.next).keys[0]
+
+    def select(self, k):
+        """Returns the kth smallest key in the symbol table.
+
+        Args:
+            k: the order statistic
+        Returns:
+            the kth smallest key in the table.
+        """
+        if k < 0 or k >= self.size():
+            raise ValueError("k is out of range")
+        page = self._page(self.root)
+        while not page.leaf:
+            i = 0
+            while k >= page.counts[i]:
+                k -= page.counts[i]
+                i += 1
+            page = self._page(page.children[i])
+        return page.keys[k]
+
+    def rank(self, key):
+        """Returns the number of keys in the table strictly less than key.
+
+        Args:
+            key: the key
+        Returns:
+            the number of keys in the table strictly less than key.
+        """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return self._rank(key)
+
+    def _rank(self, key, inclusive=False):
+        """ Returns the number of keys less than (or equal to) key, reading
+        one page per level. """
+        page, r = self._page(self.root), 0
+        while not page.leaf:
+            i = bisect_right(page.keys, key)
+            r += sum(page.counts[:i])
+            page = self._page(page.children[i])
+        return r + (bisect_right if inclusive else bisect_left)(page.keys, key)
+
+    def keys(self):
+        """ Returns all keys in the symbol table in ascending order. """
+        return list(self.irange())
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns a lazy iterator over the keys in between the given keys.
+
+        The iterator scans the chain of leaves, reading each page once.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+        Raises:
+            RuntimeError: if the table is changed during the iteration
+        """
+        return (key for key, _ in self._scan(low_key, high_key, inclusive))
+
+    def iter_items(self):
+        """ Returns a lazy iterator over the (key, value) pairs in order. """
+        return self._scan(None, None, (True, False))
+
+    def _scan(self, low_key, high_key, inclusive):
+        """ Yield the pairs within the given bounds along the leaf chain. """
+        mod_count = self._mod_count
+        if low_key is None:
+            page = self._page(self.root)
+            while not page.leaf:
+                page = self._page(page.children[0])
+            i = 0
+        else:
+            page = self._leaf(low_key)
+            i = (bisect_left if inclusive[0] else bisect_right)(page.keys, low_key)
+        while True:
+            keys, values = page.keys, page.values
+            if high_key is None:
+                end = len(keys)
+            else:
+                end = (bisect_right if inclusive[1] else bisect_left)(keys, high_key)
+            for j in range(i, end):
+                yield keys[j], values[j]
+                if self._mod_count != mod_count:
+                    raise RuntimeError("BPlusTreeST changed during iteration")
+            if end < len(keys) or page.next == NONE:
+                return
+            page, i = self._page(page.next), 0
+
+    def keys_inrange(self, low_key, high_key):
+        """Returns all keys in between low_key and high_key (exclusive).
+
+        Args:
+            low_key : the lowest key
+            high_key: the highest key
+        Returns:
+            an iterable containing all keys in between low_key (inclusive)
+            and high_key (exclusive)
+        """
+        if low_key is None:
+            raise ValueError("keys can't be 'None'")
+        if high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return list(self.irange(low_key, high_key))
+
+    def size_inrange(self, low_key, high_key):
+        """Returns the number of keys in in between low_key and high_key.
+
+        Args:
+            low_key : the lowest key
+            high_key: the highest key
+        Returns:
+            the number of keys in between low_key (inclusive) and
+            high_key (inclusive)
+        """
+        if low_key is None:
+            raise ValueError("keys can't be 'None'")
+        if high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return self.count_range(low_key, high_key, (True, True))
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns the number of keys in between the given keys.
+
+        The count is the difference of the ranks of the bounds, each found
+        by one descent, whether or not the bounds are keys of the table.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are counted
+        Returns:
+            the number of keys within the bounds, 0 if high_key < low_key
+        """
+        low, high = 0, self.size()
+        if low_key is not None:
+            low = self._rank(low_key, not inclusive[0])
+        if high_key is not None:
+            high = self._rank(high_key, inclusive[1])
+        return max(0, high - low)
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        The leaves are filled to BULK_FILL in key order and written
+        sequentially, then each level of internal pages is built from the
+        one below, in O(n) page writes. Presorted pairs are streamed, so
+        they need not fit in memory.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        Raises:
+            ValueError: if the file given in options already holds keys
+        """
+        st = cls(**options)
+        if not st.is_empty():
+            raise ValueError("from_items() needs an empty table")
+        if not presorted:
+            items = zip(*sorted_items(items, False)[:2])
+        st._bulk_load(items)
+        return st
+
+    def put_many(self, items):
+        """Inserts the given key-value pairs into the symbol table.
+
+        An empty table is bulk loaded. Otherwise the pairs are inserted in
+        key order, so that consecutive insertions hit cached pages.
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        keys, values, _ = sorted_items(items, False, keep_none=True)
+        if self.is_empty():
+            self._bulk_load((k, v) for k, v in zip(keys, values) if v is not None)
+            return
+        for key, value in zip(keys, values):
+            self.put(key, value)
+
+    def _bulk_load(self, items):
+        """Replaces the empty tree by one built from ascending pairs.
+
+        Args:
+            items: (key, value) pairs in ascending key order; as with put(),
+                   the last value given for a key wins and None removes it
+        """
+        limit = PAGE_HEADER.size + int(self._capacity * BULK_FILL)
+        self._release(self._page(self.root))
+        level = []            # (page id, number of keys, smallest key)
+        leaf = self.Page(self._allocate(), True, [], [])
+        for key, value in _distinct(items):
+            size = 8 + len(encode(key)) + len(encode(value))
+            if max(size, 16 + len(encode(key))) > self._max_entry:
+                raise ValueError(f"key-value pair too large for pages of "
+                                 f"{self.page_size} bytes")
+            if leaf.keys and leaf.nbytes + size > limit:
+                leaf.next = self._allocate()
+                level.append((leaf.id, len(leaf.keys), leaf.keys[0]))
+                self._write(leaf)
+                leaf = self.Page(leaf.next, True, [], [])
+            leaf.keys.append(key)
+            leaf.values.append(value)
+            leaf.nbytes += size
+        level.append((leaf.id, len(leaf.keys), leaf.keys[0] if leaf.keys else None))
+        self._write(leaf)
+        while len(level) > 1:
+            level = self._bulk_level(level, limit)
+        self.root = level[0][0]
+        self._n = sum(count for _, count, _ in level)
+        self._mod_count += 1
+        self.flush()
+        self._validate()
+
+    def _bulk_level(self, level, limit):
+        """Writes the internal pages above a level of bulk loaded pages.
+
+        Args:
+            level: (page id, number of keys, smallest key) of each page
+            limit: the number of bytes to fill each page to
+        Returns:
+            the same triples for the new level
+        """
+        parents = []
+        page = None
+        for id, count, smallest in level:
+            size = 16 + len(encode(smallest))
+            if page is not None and page.nbytes + size > limit:
+                parents.append((page.id, sum(page.counts), first))
+                self._write(page)
+                page = None
+            if page is None:
+                page = self.Page(self._allocate(), False, [], children=[id],
+                                 counts=[count], nbytes=PAGE_HEADER.size + 12)
+                first = smallest
+            else:
+                page.keys.append(smallest)
+                page.children.append(id)
+                page.counts.append(count)
+                page.nbytes += size
+        parents.append((page.id, sum(page.counts), first))
+        self._write(page)
+        return parents
+
+    def _validate(self, key=None):
+        """Check the invariants after mutating the given key.
+
+        At the "path" level the pages along the search path of the key are
+        checked, at the "full" level the whole tree.
+
+        Args:
+            key: the key that was inserted, updated or removed, or None
+        Raises:
+            AssertionError: if the tree is not consistent
+        """
+        if self.validation == "off":
+            return
+        if self.validation == "full" or key is None:
+            consistent = self.checked()
+        else:
+            consistent = self.is_path_consistent(key)
+        if not consistent:
+            raise AssertionError("B+-tree invariants violated")
+
+    def checked(self):
+        """Check if all the representational invariantsis are consistent.
+
+        Returns:
+            True if all the representational invariantsis are consistent or
+            False otherwise.
+        """
+        leaves = []
+        if self._check_page(self.root, None, None, leaves) != self._n:
+            return False
+        for leaf, successor in zip(leaves, leaves[1:] + [None]):
+            if leaf.next != (successor.id if successor else NONE):
+                return False
+        return True
+
+    def _check_page(self, id, low, high, leaves):
+        """Checks the subtree of the given page against its key bounds.
+
+        Returns:
+            the number of keys in the subtree, or -1 if it is inconsistent
+        """
+        page = self._page(id)
+        if not self._is_page_consistent(page, low, high, exact=True):
+            return -1
+        if page.leaf:
+            leaves.append(page)
+            return len(page.keys)
+        bounds = [low] + page.keys + [high]
+        for i, child in enumerate(list(page.children)):
+            if self._check_page(child, bounds[i], bounds[i + 1], leaves) != page.counts[i]:
+                return -1
+        return sum(page.counts)
+
+    def is_path_consistent(self, key):
+        """Check the invariants of the pages along the search path of the key.
+
+        Args:
+            key: the key whose search path is checked
+        Returns:
+            True if the pages on the path are consistent or False otherwise
+        """
+        page, low, high = self._page(self.root), None, None
+        while True:
+            if not self._is_page_consistent(page, low, high):
+                return False
+            if page.leaf:
+                return True
+            i = bisect_right(page.keys, key)
+            if i > 0:
+                low = page.keys[i - 1]
+            if i < len(page.keys):
+                high = page.keys[i]
+            page = self._page(page.children[i])
+
+    def _is_page_consistent(self, page, low, high, exact=False):
+        """Check the invariants local to a page.
+
+        Its keys are ascending and within [low, high), it fits in a page and
+        an internal page has one more child than keys. With exact, the size
+        kept for the page is also checked against its encoding.
+        """
+        keys = page.keys
+        if page.nbytes > self.page_size:
+            return False
+        if exact:
+            links = 0 if page.leaf else 12 * len(page.children)
+            if PAGE_HEADER.size + links + len(self._encode_records(page)) != page.nbytes:
+                return False
+        if any(not a < b for a, b in zip(keys, keys[1:])):
+            return False
+        if keys and ((low is not None and keys[0] < low)
+                     or (high is not None and not keys[-1] < high)):
+            return False
+        if page.leaf:
+            return len(page.values) == len(keys)
+        return len(page.children) == len(page.counts) == len(keys) + 1
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self.size()
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return self.irange()
+
+    # ********************* End of Python Special Methods *********************#
+
+
+def _distinct(items):
+    """Yields the ascending key-value pairs with duplicates resolved.
+
+    As with put(), the last value given for a key wins and a None value
+    removes the key; the pairs are streamed, holding back only one.
+
+    Args:
+        items: (key, value) pairs in ascending key order
+    Raises:
+        ValueError: if a key is None or the pairs are not sorted by key
+    """
+    pending = None
+    for key, value in items:
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if pending is not None:
+            if not pending[0] < key:
+                if key < pending[0]:
+                    raise ValueError("items are not sorted by key")
+                pending = (key, value)
+                continue
+            if pending[1] is not None:
+                yield pending
+        pending = (key, value)
+    if pending is not None and pending[1] is not None:
+        yield pending
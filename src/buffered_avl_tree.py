@@ -0,0 +1,273 @@
+"""
+A write-buffered ordered symbol table built on avl_tree.AVLTreeST, for
+ingesting bursts of writes.
+
+BufferedAVLTreeST does not insert a put() or a delete() into the tree at
+once: it records the write in an unsorted buffer, a delete as a tombstone,
+where a later write to the same key replaces an earlier one. When the
+buffer holds buffer_size keys, and at least ratio times as many keys as
+the tree, it is flushed: the writes are sorted and merged with the keys of
+the tree in one pass of AVLTreeST.put_many(), which rebuilds the tree
+bottom-up. As the buffer grows with the tree, each key is rebuilt into
+the tree a constant number of times on average, about 1 + 1 / ratio.
+
+A flush rebuilds every node of the tree, so with ratios below 1 the
+rebuilds cost more than the descents and rotations of put() they replace:
+ratio 0.25 measured 0.4 - 0.9x the throughput of put(). ratio must
+therefore be at least 1. At ratios 1 to 4, ingest runs at about
+1.3 - 2.4x the throughput of put() with the garbage collector paused.
+With it running, the allocation bursts of the rebuilds trigger
+collections and the gain shrinks to 1.1 - 1.9x, down to 0.8x measured on
+a table of 500000 random float keys. The price is also the memory of the
+buffer.
+
+get() and contains() look in the buffer before the tree. Every other read,
+and the writes that depend on the order of the keys, flush the buffer
+first, so that they always see every write. The keys (or what the key
+function maps them to) must be hashable.
+"""
+from avl_tree import AVLTreeST
+
+
+def _flushed(name):
+    """ Make a method flushing the buffer and running the AVLTreeST method name. """
+    def method(self, *args, **kwargs):
+        if self._buffer:
+            self.flush()
+        return getattr(self._tree, name)(*args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(AVLTreeST, name).__doc__
+    return method
+
+
+class _Cursor(AVLTreeST.Cursor):
+    """A cursor over the tree of a BufferedAVLTreeST.
+
+    A value set through the cursor goes straight into the tree, so any write
+    to the same key still in the buffer is dropped: it is older, and the
+    next flush would otherwise override the value set by the cursor.
+    """
+
+    def __init__(self, table):
+        super().__init__(table._tree)
+        self._table = table
+
+    @AVLTreeST.Cursor.value.setter
+    def value(self, value):
+        AVLTreeST.Cursor.value.fset(self, value)
+        self._table._buffer.pop(self._node().ckey, None)
+
+
+class BufferedAVLTreeST(object):
+    """Symbol table buffering its writes and merging them into an AVL tree in bulk.
+
+    The class offers the operations of AVLTreeST. Lazy iterators and
+    cursors see the tree as of the last flush, and are invalidated by the
+    next one. A value set through a cursor replaces any buffered write to
+    its key.
+    """
+
+    def __init__(self, buffer_size=10000, ratio=1.0, **options):
+        """It initializes a write-buffered ordered symbol table.
+
+        Args:
+            buffer_size: the fewest buffered keys triggering a flush
+            ratio      : the fewest buffered keys triggering a flush, as a
+                         multiple of the keys in the tree, at least 1
+            options    : keyword arguments for the underlying AVLTreeST
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be positive")
+        if ratio < 1:
+            raise ValueError("ratio must be at least 1, smaller ones are slower than put()")
+        self.buffer_size = buffer_size
+        self.ratio = ratio
+        self._tree = AVLTreeST(**options)
+        self._buffer = {}       # ckey -> (key, value), a None value deletes
+        self.flushes = 0
+
+    @classmethod
+    def from_items(cls, items, presorted=False, buffer_size=10000, ratio=1.0,
+                   **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        Args:
+            items      : an iterable of (key, value) pairs
+            presorted  : True if the pairs are already in ascending key order
+            buffer_size: the fewest buffered keys triggering a flush
+            ratio      : the same, as a multiple of the keys in the tree
+            options    : keyword arguments for the underlying AVLTreeST
+        Returns:
+            a new symbol table holding the given pairs, none of them buffered
+        """
+        st = cls(buffer_size, ratio, **options)
+        st._tree = AVLTreeST.from_items(items, presorted, **options)
+        return st
+
+    @property
+    def pending(self):
+        """ The number of keys written since the last flush. """
+        return len(self._buffer)
+
+    def flush(self):
+        """ Merges the buffered writes into the tree and empties the buffer. """
+        if self._buffer:
+            items, self._buffer = list(self._buffer.values()), {}
+            self._tree.put_many(items)
+            self.flushes += 1
+
+    def tree(self):
+        """Flushes the buffer and returns the underlying table.
+
+        Returns:
+            the AVLTreeST holding all the writes so far; writing to it
+            directly bypasses the buffer
+        """
+        self.flush()
+        return self._tree
+
+    def put(self, key, value):
+        """Buffers the insertion of the key-value pair into the symbol table.
+
+        Args:
+            key  : the key to be inserted into the table
+            value: value associated with the given key; None deletes the key
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        buffer = self._buffer
+        buffer[self._tree._ckey(key)] = (key, value)
+        if (len(buffer) >= self.buffer_size
+                and len(buffer) >= self.ratio * self._tree.size()):
+            self.flush()
+
+    def delete(self, key):
+        """Buffers the removal of the given key and its value from the table.
+
+        Args:
+            key: the key to be removed
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        self.put(key, None)
+
+    def put_many(self, items):
+        """Buffers the given key-value pairs.
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        for key, value in items:
+            self.put(key, value)
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        The buffer holds the latest write to the key, if any; otherwise
+        the tree is searched.
+
+        Args:
+            key: the key of which value to be gotten
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self._buffer:
+            write = self._buffer.get(self._tree._ckey(key))
+            if write is not None:
+                return write[1]
+        return self._tree.get(key)
+
+    def contains(self, key):
+        """ Check whether the symbol table contains the given key or not. """
+        if key is None:
+            raise ValueError("Can't search 'None'")
+        return self.get(key) is not None
+
+    def seek(self, key):
+        """Flushes the buffer and returns a cursor on the smallest key ≥ key.
+
+        Args:
+            key: the key to look for
+        Returns:
+            a cursor, which is not valid if there is no such key; setting
+            its value replaces any write to its key buffered since
+        """
+        self.flush()
+        cursor = _Cursor(self)
+        cursor.seek(key)
+        return cursor
+
+    def first(self):
+        """ Flushes the buffer and returns a cursor on the smallest key. """
+        self.flush()
+        cursor = _Cursor(self)
+        cursor._leftmost(self._tree.root, None, None)
+        return cursor
+
+    def last(self):
+        """ Flushes the buffer and returns a cursor on the largest key. """
+        self.flush()
+        cursor = _Cursor(self)
+        cursor._rightmost(self._tree.root, None, None)
+        return cursor
+
+    is_empty = _flushed("is_empty")
+    size = _flushed("size")
+    height = _flushed("height")
+    min = _flushed("min")
+    max = _flushed("max")
+    floor = _flushed("floor")
+    ceiling = _flushed("ceiling")
+    select = _flushed("select")
+    rank = _flushed("rank")
+    keys = _flushed("keys")
+    keys_inrange = _flushed("keys_inrange")
+    size_inrange = _flushed("size_inrange")
+    count_range = _flushed("count_range")
+    page = _flushed("page")
+    page_after = _flushed("page_after")
+    iter_keys = _flushed("iter_keys")
+    iter_items = _flushed("iter_items")
+    irange = _flushed("irange")
+    aggregate = _flushed("aggregate")
+    get_many = _flushed("get_many")
+    contains_many = _flushed("contains_many")
+    rank_many = _flushed("rank_many")
+    floor_many = _flushed("floor_many")
+    ceiling_many = _flushed("ceiling_many")
+    select_many = _flushed("select_many")
+    snapshot = _flushed("snapshot")
+    freeze = _flushed("freeze")
+    checked = _flushed("checked")
+    delete_min = _flushed("delete_min")
+    delete_max = _flushed("delete_max")
+    delete_range = _flushed("delete_range")
+    pop_min = _flushed("pop_min")
+    pop_max = _flushed("pop_max")
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self.size()
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return self.iter_keys()
+
+    def __reversed__(self):
+        if self._buffer:
+            self.flush()
+        return reversed(self._tree)
+
+    # ********************* End of Python Special Methods *********************#
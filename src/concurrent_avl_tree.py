@@ -0,0 +1,207 @@
+"""
+A thread-safe ordered symbol table built on avl_tree.AVLTreeST.
+
+ConcurrentAVLTreeST serializes writers and lets any number of readers run at
+the same time, in one of two modes:
+
+lock (default):
+    A readers-writer lock guards the tree. Readers share the lock and never
+    wait for each other, only for a writer holding or waiting for the lock.
+
+snapshot_reads=True:
+    The tree is persistent, and after every write the writer publishes an
+    immutable snapshot of it. Readers query the latest snapshot without
+    taking any lock, so they never block, and a rotation can never expose a
+    half-updated subtree to them. Writes pay for copying the paths they
+    change.
+
+Batches of writes take the lock once, through put_many() or the batch()
+context manager. The same code runs on GIL and free-threaded builds of
+Python; only the threading primitives are relied on.
+"""
+import threading
+from contextlib import contextmanager
+
+from avl_tree import AVLTreeST
+
+
+class ReadWriteLock(object):
+    """A readers-writer lock preferring writers.
+
+    Any number of readers may hold the lock together, or a single writer.
+    New readers wait while a writer is waiting, so writers cannot starve.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def _reader(name):
+    """ Make a method running the read-only AVLTreeST method name safely. """
+    def method(self, *args, **kwargs):
+        view = self._view
+        if view is not None:
+            return getattr(view, name)(*args, **kwargs)
+        with self._lock.read_locked():
+            return getattr(self._tree, name)(*args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(AVLTreeST, name).__doc__
+    return method
+
+
+def _writer(name):
+    """ Make a method running the mutating AVLTreeST method name safely. """
+    def method(self, *args, **kwargs):
+        with self.batch() as tree:
+            return getattr(tree, name)(*args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(AVLTreeST, name).__doc__
+    return method
+
+
+class ConcurrentAVLTreeST(object):
+    """Thread-safe symbol table with many readers and one writer at a time.
+
+    The class offers the read-only and mutating operations of AVLTreeST.
+    Methods returning lazy iterators or cursors are only available through
+    snapshot(), since they would outlive any lock.
+    """
+
+    def __init__(self, snapshot_reads=False, validation=None, aggregates=None,
+                 key=None):
+        """It initializes a thread-safe ordered symbol table.
+
+        Args:
+            snapshot_reads: serve reads from immutable snapshots published by
+                            the writer instead of through a readers lock
+            validation    : the validation level of the underlying tree
+            aggregates    : the aggregates kept by the underlying tree
+            key           : the function the underlying tree orders keys by
+        """
+        self._tree = AVLTreeST(validation=validation, persistent=snapshot_reads,
+                               aggregates=aggregates, key=key)
+        self._lock = ReadWriteLock()
+        self._view = self._tree.snapshot() if snapshot_reads else None
+
+    @contextmanager
+    def batch(self):
+        """Holds the write lock for a batch of changes.
+
+        Yields:
+            the underlying AVLTreeST, to be changed only inside the block
+        """
+        with self._lock.write_locked():
+            try:
+                yield self._tree
+            finally:
+                if self._view is not None:
+                    self._view = self._tree.snapshot()
+
+    def snapshot(self):
+        """Returns an immutable view of the table for consistent reads.
+
+        Raises:
+            RuntimeError: if the table was not created with snapshot_reads
+        """
+        if self._view is None:
+            raise RuntimeError("snapshot() needs snapshot_reads=True")
+        return self._view
+
+    is_empty = _reader("is_empty")
+    size = _reader("size")
+    height = _reader("height")
+    contains = _reader("contains")
+    get = _reader("get")
+    floor = _reader("floor")
+    ceiling = _reader("ceiling")
+    select = _reader("select")
+    rank = _reader("rank")
+    keys = _reader("keys")
+    keys_inrange = _reader("keys_inrange")
+    size_inrange = _reader("size_inrange")
+    count_range = _reader("count_range")
+    page = _reader("page")
+    page_after = _reader("page_after")
+    aggregate = _reader("aggregate")
+    get_many = _reader("get_many")
+    contains_many = _reader("contains_many")
+    rank_many = _reader("rank_many")
+    floor_many = _reader("floor_many")
+    ceiling_many = _reader("ceiling_many")
+    select_many = _reader("select_many")
+    freeze = _reader("freeze")
+    checked = _reader("checked")
+
+    put = _writer("put")
+    put_many = _writer("put_many")
+    delete = _writer("delete")
+    delete_min = _writer("delete_min")
+    delete_max = _writer("delete_max")
+    delete_range = _writer("delete_range")
+    pop_min = _writer("pop_min")
+    pop_max = _writer("pop_max")
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self.size()
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    # ********************* End of Python Special Methods *********************#
@@ -0,0 +1,239 @@
+"""
+Running order statistics of a multiset of samples, such as latencies, over
+a sliding window, built on avl_tree.AVLTreeST.
+
+AVLTreeST keeps distinct keys only, so every sample x is stored under the
+key (x, seq), where seq is the arrival number of the sample: equal samples
+get distinct keys, ordered by arrival, and the subtree sizes of the tree
+count every copy. The arrival order is kept in a queue, so that the
+oldest samples can be evicted.
+
+push(x), push_many(xs):
+    Add one sample, or a batch of samples in bulk; with a window, the
+    oldest samples beyond it are evicted.
+
+evict(n), remove(x):
+    Remove the n oldest samples, or one copy of the sample x.
+
+quantile(q), median(), percentile_rank(x):
+    The sample at a fraction q of the sorted samples, interpolated as by
+    numpy.quantile, the median, and the percentage of samples ≤ x.
+
+Each operation on one sample or one statistic takes O(log n).
+"""
+import math
+from collections import deque
+
+from avl_tree import AVLTreeST
+
+INTERPOLATIONS = ("linear", "lower", "higher", "nearest", "midpoint")
+
+# The smallest batch, as a fraction of the window, that push_many() ingests by
+# rebuilding the tree rather than by pushing the samples one by one.
+REBUILD_FRACTION = 0.3
+
+
+class OrderStatistics(object):
+    """A multiset of comparable samples with O(log n) order statistics.
+
+    quantile() with the "linear" and "midpoint" interpolations needs
+    numeric samples; the other statistics only compare them.
+    """
+
+    def __init__(self, window=None):
+        """It initializes an empty multiset of samples.
+
+        Args:
+            window: keep at most this many samples, evicting the oldest ones
+                    as new ones are pushed, or None for no limit
+        """
+        if window is not None and window < 1:
+            raise ValueError("window must be positive")
+        self.window = window
+        self._tree = AVLTreeST(validation="off")
+        self._arrivals = deque()    # the keys (x, seq) from the oldest one
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._arrivals)
+
+    def is_empty(self):
+        """ Check whether there is no sample. """
+        return not self._arrivals
+
+    def push(self, x):
+        """Adds the sample x, evicting the oldest sample beyond the window.
+
+        Args:
+            x: the sample, comparable with the others and not NaN
+        """
+        if x is None or x != x:
+            raise ValueError("samples can't be 'None' or NaN")
+        key = (x, self._seq)
+        self._seq += 1
+        self._tree.put(key, True)
+        self._arrivals.append(key)
+        if self.window is not None and len(self._arrivals) > self.window:
+            self._tree.delete(self._arrivals.popleft())
+
+    def push_many(self, xs):
+        """Adds the samples xs in the order given, in bulk.
+
+        Without a window, the samples are merged into the tree by
+        AVLTreeST.put_many(). With one, each sample pushed also evicts one,
+        which only a rebuild can do in bulk: when the batch is at least
+        REBUILD_FRACTION of the window, the tree is rebuilt from the
+        samples that stay, in O(w log w) for a window of w; otherwise the
+        samples are pushed one by one, in O(m log w) for m samples.
+
+        Args:
+            xs: an iterable of samples
+        """
+        xs = list(xs)
+        for x in xs:
+            if x is None or x != x:
+                raise ValueError("samples can't be 'None' or NaN")
+        if self.window is None:
+            keys = [(x, self._seq + i) for i, x in enumerate(xs)]
+            self._seq += len(keys)
+            self._tree.put_many([(key, True) for key in keys])
+            self._arrivals.extend(keys)
+        elif len(xs) < REBUILD_FRACTION * self.window:
+            tree, arrivals, window = self._tree, self._arrivals, self.window
+            for x in xs:
+                key = (x, self._seq)
+                self._seq += 1
+                tree.put(key, True)
+                arrivals.append(key)
+                if len(arrivals) > window:
+                    tree.delete(arrivals.popleft())
+        else:
+            dropped = max(0, len(self._arrivals) + len(xs) - self.window)
+            kept = list(self._arrivals)[dropped:]
+            skip = max(0, len(xs) - self.window)    # pushed and evicted at once
+            self._seq += skip
+            keys = [(x, self._seq + i) for i, x in enumerate(xs[skip:])]
+            self._seq += len(keys)
+            self._arrivals = deque(kept + keys)
+            self._tree = AVLTreeST.from_items(((key, True) for key in self._arrivals),
+                                              validation="off")
+
+    def evict(self, n=1):
+        """Removes the n oldest samples.
+
+        Args:
+            n: the number of samples to remove
+        Returns:
+            the removed samples, from the oldest one
+        Raises:
+            RuntimeError: if there are fewer than n samples
+        """
+        if n > len(self._arrivals):
+            raise RuntimeError("evict(n) is called with fewer than n samples")
+        evicted = []
+        for _ in range(n):
+            key = self._arrivals.popleft()
+            self._tree.delete(key)
+            evicted.append(key[0])
+        return evicted
+
+    def remove(self, x):
+        """Removes the oldest copy of the sample x.
+
+        This takes O(log n) to find the sample in the tree, and O(n) to
+        take it out of the arrival queue.
+
+        Args:
+            x: the sample
+        Returns:
+            True if a copy of x was removed, or False if there was none
+        """
+        if x is None or x != x:
+            raise ValueError("samples can't be 'None' or NaN")
+        if self.is_empty():
+            return False
+        key = self._tree.ceiling((x, -1))
+        if key is None or key[0] != x:
+            return False
+        self._tree.delete(key)
+        self._arrivals.remove(key)
+        return True
+
+    def min(self):
+        """ Returns the smallest sample. """
+        if self.is_empty():
+            raise RuntimeError(" min() is called with no samples")
+        return self._tree.min()[0]
+
+    def max(self):
+        """ Returns the largest sample. """
+        if self.is_empty():
+            raise RuntimeError(" max() is called with no samples")
+        return self._tree.max()[0]
+
+    def select(self, k):
+        """ Returns the kth smallest sample, counting every copy. """
+        if k < 0 or k >= len(self._arrivals):
+            raise ValueError("k is out of range")
+        return self._tree.select(k)[0]
+
+    def count(self, x):
+        """ Returns the number of copies of the sample x. """
+        return self._tree.rank((x, math.inf)) - self._tree.rank((x, -1))
+
+    def quantile(self, q, interpolation="linear"):
+        """Returns the q-quantile of the samples.
+
+        The quantile sits at the fractional position h = q (n - 1) of the
+        sorted samples. As in numpy.quantile, "linear" interpolates between
+        the samples at floor(h) and ceil(h), "lower" and "higher" take
+        either of them, "nearest" the closer one and "midpoint" their mean.
+
+        Args:
+            q            : the fraction, between 0 and 1
+            interpolation: one of INTERPOLATIONS
+        Returns:
+            the q-quantile
+        Raises:
+            RuntimeError: if there are no samples
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {INTERPOLATIONS}")
+        if self.is_empty():
+            raise RuntimeError(" quantile() is called with no samples")
+        h = q * (len(self._arrivals) - 1)
+        low, high = math.floor(h), math.ceil(h)
+        if interpolation == "lower" or (interpolation == "nearest" and h - low <= 0.5
+                                        and not (h - low == 0.5 and low % 2)):
+            return self.select(low)
+        if interpolation in ("higher", "nearest"):
+            return self.select(high)
+        a = self.select(low)
+        b = a if high == low else self.select(high)
+        if interpolation == "midpoint":
+            return (a + b) / 2
+        return a + (b - a) * (h - low)
+
+    def median(self):
+        """ Returns the median of the samples, the mean of the two middle ones
+        for an even number of samples. """
+        return self.quantile(0.5)
+
+    def percentile_rank(self, x, inclusive=True):
+        """Returns the percentage of the samples less than or equal to x.
+
+        Args:
+            x        : the value, comparable with the samples
+            inclusive: count the samples equal to x; otherwise only those
+                       strictly less than x
+        Returns:
+            a percentage between 0 and 100
+        Raises:
+            RuntimeError: if there are no samples
+        """
+        if self.is_empty():
+            raise RuntimeError(" percentile_rank() is called with no samples")
+        below = self._tree.rank((x, math.inf if inclusive else -1))
+        return 100 * below / len(self._arrivals)
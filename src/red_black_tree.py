@@ -0,0 +1,327 @@
+"""
+An ordered symbol table of key-value pairs backed by a left-leaning
+red-black BST (https://en.wikipedia.org/wiki/Left-leaning_red%E2%80%93black_tree).
+
+The tree is a binary encoding of a 2-3 tree: a black node with a red left
+child stands for a 3-node, red links never lean right and never come two
+in a row, and every path from the root to an empty subtree crosses the
+same number of black links, so the height is at most 2 lg n. Insertions
+and deletions restore these invariants with rotations and color flips on
+the way back up the search path.
+
+The symbol table supports the operations of sized_bst.SizedBST, which are
+those of avl_tree.AVLTreeST without the persistent, aggregate and batch
+extensions.
+"""
+from sized_bst import SizedBST
+from utils import sorted_items
+
+RED, BLACK = True, False
+
+
+class RedBlackTreeST(SizedBST):
+    """Symbol table implementation using a left-leaning red-black BST."""
+
+    # *************************** Nested Node Class ***************************#
+    class Node(object):
+        def __init__(self, key, value, size, color):
+            self.key = key  # the key
+            self.value = value  # the value
+            self.size = size  # number of nodes in the subtree
+            self.color = color  # color of the link from the parent
+            self.left = None  # left subtree
+            self.right = None  # right subtree
+
+    # *********************** End of Nested Node Class ************************#
+
+    def _is_red(self, x):
+        return x is not None and x.color is RED
+
+    def put(self, key, value):
+        """Inserts the key-value pair into the symbol table.
+
+        Args:
+            key  : the key to be inserted into the table
+            value: value associated with the given key; None deletes the key
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if value is None:
+            self.delete(key)
+            return
+        self.root = self._put(self.root, key, value)
+        self.root.color = BLACK
+        self._validate(key)
+
+    def _put(self, h, key, value):
+        """ Insert the pair into the subtree h and return the balanced subtree. """
+        if h is None:
+            return self.Node(key, value, 1, RED)
+        if key < h.key:
+            h.left = self._put(h.left, key, value)
+        elif h.key < key:
+            h.right = self._put(h.right, key, value)
+        else:
+            h.value = value
+            return h
+        if self._is_red(h.right) and not self._is_red(h.left):
+            h = self._rotate_left(h)
+        if self._is_red(h.left) and self._is_red(h.left.left):
+            h = self._rotate_right(h)
+        if self._is_red(h.left) and self._is_red(h.right):
+            self._flip_colors(h)
+        h.size = 1 + self._size(h.left) + self._size(h.right)
+        return h
+
+    def delete(self, key):
+        """Remove the given key and associated value with it from the table.
+
+        Args:
+            key: the key to be removed
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        if not self.contains(key):
+            return
+        if not self._is_red(self.root.left) and not self._is_red(self.root.right):
+            self.root.color = RED
+        self.root = self._delete(self.root, key)
+        if self.root is not None:
+            self.root.color = BLACK
+        self._validate(key)
+
+    def _delete(self, h, key):
+        """ Delete the key, which is in the subtree h, and rebalance. """
+        if key < h.key:
+            if not self._is_red(h.left) and not self._is_red(h.left.left):
+                h = self._move_red_left(h)
+            h.left = self._delete(h.left, key)
+        else:
+            if self._is_red(h.left):
+                h = self._rotate_right(h)
+            if not h.key < key and h.right is None:
+                return None
+            if not self._is_red(h.right) and not self._is_red(h.right.left):
+                h = self._move_red_right(h)
+            if not h.key < key:
+                x = self._min(h.right)
+                h.key, h.value = x.key, x.value
+                h.right = self._delete_min(h.right)
+            else:
+                h.right = self._delete(h.right, key)
+        return self._balance(h)
+
+    def delete_min(self):
+        """Removes the smallest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_min() is called on empty table")
+        key = self._min(self.root).key
+        if not self._is_red(self.root.left) and not self._is_red(self.root.right):
+            self.root.color = RED
+        self.root = self._delete_min(self.root)
+        if self.root is not None:
+            self.root.color = BLACK
+        self._validate(key)
+
+    def _delete_min(self, h):
+        if h.left is None:
+            return None
+        if not self._is_red(h.left) and not self._is_red(h.left.left):
+            h = self._move_red_left(h)
+        h.left = self._delete_min(h.left)
+        return self._balance(h)
+
+    def delete_max(self):
+        """Removes the largest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_max() is called on empty table")
+        key = self._max(self.root).key
+        if not self._is_red(self.root.left) and not self._is_red(self.root.right):
+            self.root.color = RED
+        self.root = self._delete_max(self.root)
+        if self.root is not None:
+            self.root.color = BLACK
+        self._validate(key)
+
+    def _delete_max(self, h):
+        if self._is_red(h.left):
+            h = self._rotate_right(h)
+        if h.right is None:
+            return None
+        if not self._is_red(h.right) and not self._is_red(h.right.left):
+            h = self._move_red_right(h)
+        h.right = self._delete_max(h.right)
+        return self._balance(h)
+
+    # ************************* Red-black tree helpers ************************#
+    def _rotate_right(self, h):
+        """ Make a left-leaning link lean to the right. """
+        x = h.left
+        h.left = x.right
+        x.right = h
+        x.color, h.color = h.color, RED
+        x.size = h.size
+        h.size = 1 + self._size(h.left) + self._size(h.right)
+        return x
+
+    def _rotate_left(self, h):
+        """ Make a right-leaning link lean to the left. """
+        x = h.right
+        h.right = x.left
+        x.left = h
+        x.color, h.color = h.color, RED
+        x.size = h.size
+        h.size = 1 + self._size(h.left) + self._size(h.right)
+        return x
+
+    def _flip_colors(self, h):
+        """ Flip the colors of a node and its two children. """
+        h.color = not h.color
+        h.left.color = not h.left.color
+        h.right.color = not h.right.color
+
+    def _move_red_left(self, h):
+        """ Make h.left or one of its children red, h being red. """
+        self._flip_colors(h)
+        if self._is_red(h.right.left):
+            h.right = self._rotate_right(h.right)
+            h = self._rotate_left(h)
+            self._flip_colors(h)
+        return h
+
+    def _move_red_right(self, h):
+        """ Make h.right or one of its children red, h being red. """
+        self._flip_colors(h)
+        if self._is_red(h.left.left):
+            h = self._rotate_right(h)
+            self._flip_colors(h)
+        return h
+
+    def _balance(self, h):
+        """ Restore the red-black invariants at h on the way up. """
+        if self._is_red(h.right) and not self._is_red(h.left):
+            h = self._rotate_left(h)
+        if self._is_red(h.left) and self._is_red(h.left.left):
+            h = self._rotate_right(h)
+        if self._is_red(h.left) and self._is_red(h.right):
+            self._flip_colors(h)
+        h.size = 1 + self._size(h.left) + self._size(h.right)
+        return h
+
+    # ********************* End of Red-black tree helpers *********************#
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        The pairs are sorted (unless presorted) and deduplicated, then the
+        tree is built bottom-up in linear time as the 2-3 tree of the
+        smallest height, its extra keys making up red left children.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        """
+        st = cls(**options)
+        keys, values, _ = sorted_items(items, presorted)
+        n = len(keys)
+        st.root = st._build(keys, values, 0, n - 1, (n + 1).bit_length() - 1)
+        st._validate()
+        return st
+
+    def _build(self, keys, values, low, high, black_height):
+        """Builds a subtree of the given black height from keys[low ... high].
+
+        A subtree of black height b holds between 2^b - 1 keys (only 2-nodes)
+        and 3^b - 1 keys (only 3-nodes). The root is a 2-node when the rest
+        fits in two children, and a 3-node otherwise.
+
+        Returns:
+            the root of the subtree, black, or None if low > high
+        """
+        n = high - low + 1
+        if black_height == 0:
+            return None
+        most = 3 ** (black_height - 1) - 1   # the most keys of a child
+        if n - 1 <= 2 * most:
+            mid = low + (n - 1) // 2
+            h = self.Node(keys[mid], values[mid], n, BLACK)
+            h.left = self._build(keys, values, low, mid - 1, black_height - 1)
+            h.right = self._build(keys, values, mid + 1, high, black_height - 1)
+            return h
+        q, r = divmod(n - 2, 3)
+        a = low + q + (r > 0)                 # the red key
+        b = a + 1 + q + (r > 1)               # the black key
+        x = self.Node(keys[a], values[a], b - low, RED)
+        x.left = self._build(keys, values, low, a - 1, black_height - 1)
+        x.right = self._build(keys, values, a + 1, b - 1, black_height - 1)
+        h = self.Node(keys[b], values[b], n, BLACK)
+        h.left = x
+        h.right = self._build(keys, values, b + 1, high, black_height - 1)
+        return h
+
+    # ****************** Check internal invariants of the tree *****************#
+    def is_path_consistent(self, key):
+        """Check the invariants of the nodes along the search path of key.
+
+        Returns:
+            True if the nodes along the path are consistent or False otherwise.
+        """
+        if self._is_red(self.root):
+            return False
+        x, smaller, larger = self.root, None, None
+        while x is not None:
+            if not (
+                self._is_node_consistent(x, smaller, larger)
+                and self._is_node_consistent(x.left, smaller, x.key)
+                and self._is_node_consistent(x.right, x.key, larger)
+            ):
+                return False
+            if key is None:
+                break
+            if key < x.key:
+                x, larger = x.left, x.key
+            elif x.key < key:
+                x, smaller = x.right, x.key
+            else:
+                break
+        return True
+
+    def _is_node_consistent(self, x, smaller, larger):
+        """ Check the order, size and colors of x against its children. """
+        if x is None:
+            return True
+        if smaller is not None and not smaller < x.key:
+            return False
+        if larger is not None and not x.key < larger:
+            return False
+        if self._is_red(x.right):
+            return False
+        if self._is_red(x) and self._is_red(x.left):
+            return False
+        return x.size == 1 + self._size(x.left) + self._size(x.right)
+
+    def is_balanced(self):
+        """ Check the 2-3 tree invariants: colors and equal black heights. """
+        if self._is_red(self.root):
+            return False
+        black, x = 0, self.root
+        while x is not None:
+            black += not self._is_red(x)
+            x = x.left
+        stack = [(self.root, 0)]
+        while stack:
+            x, depth = stack.pop()
+            if x is None:
+                if depth != black:
+                    return False
+                continue
+            if self._is_red(x.right) or (self._is_red(x) and self._is_red(x.left)):
+                return False
+            depth += not self._is_red(x)
+            stack.append((x.left, depth))
+            stack.append((x.right, depth))
+        return True
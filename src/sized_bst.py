@@ -0,0 +1,313 @@
+"""
+The operations shared by the ordered symbol tables built as binary search
+trees of nodes that keep the size of their subtree.
+
+SizedBST implements everything that only reads the tree: searches, order
+statistics, iteration and range queries, and the checks of the invariants
+common to all such trees. The subclasses add the mutating operations that
+keep their own balance, and their own invariants.
+"""
+from avl_tree import AVLTreeST
+
+
+class SizedBST(object):
+    """Base class of symbol tables on BSTs of nodes with subtree sizes.
+
+    The nodes have key, value, size, left and right attributes; None is the
+    empty subtree. Subclasses implement put, delete, delete_min,
+    delete_max, from_items and is_path_consistent.
+    """
+
+    VALIDATION_LEVELS = AVLTreeST.VALIDATION_LEVELS
+
+    def __init__(self, validation=None):
+        """It initializes an ordered symbol table.
+
+        Args:
+            validation: how much of the tree is checked after each mutation;
+                        "off", "path" or "full" (see AVLTreeST)
+        """
+        if validation is None:
+            validation = "path" if __debug__ else "off"
+        if validation not in self.VALIDATION_LEVELS:
+            raise ValueError(f"validation must be one of {self.VALIDATION_LEVELS}")
+        self.validation = validation
+        self.root = None
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return self.root is None
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return self._size(self.root)
+
+    def _size(self, x):
+        return 0 if x is None else x.size
+
+    def height(self):
+        """ Return the height of the tree; -1 when empty, 0 for one node. """
+        height, level = -1, [self.root] if self.root is not None else []
+        while level:
+            height += 1
+            level = [c for x in level for c in (x.left, x.right) if c is not None]
+        return height
+
+    def contains(self, key):
+        """ Check whether the symbol table contains the given key or not. """
+        if key is None:
+            raise ValueError("Can't search 'None'")
+        return self.get(key) is not None
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        x = self.root
+        while x is not None:
+            if key < x.key:
+                x = x.left
+            elif x.key < key:
+                x = x.right
+            else:
+                return x.value
+        return None
+
+    def put_many(self, items):
+        """Inserts the given key-value pairs one by one.
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        for key, value in items:
+            self.put(key, value)
+
+    def min(self):
+        """ Returns the smallest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        return self._min(self.root).key
+
+    def _min(self, x):
+        while x.left is not None:
+            x = x.left
+        return x
+
+    def max(self):
+        """ Returns the largest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        return self._max(self.root).key
+
+    def _max(self, x):
+        while x.right is not None:
+            x = x.right
+        return x
+
+    def floor(self, key):
+        """ Returns the largest key less than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        best, x = None, self.root
+        while x is not None:
+            if key < x.key:
+                x = x.left
+            else:
+                best, x = x, x.right
+        return None if best is None else best.key
+
+    def ceiling(self, key):
+        """ Returns the smallest key greater than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        best, x = None, self.root
+        while x is not None:
+            if x.key < key:
+                x = x.right
+            else:
+                best, x = x, x.left
+        return None if best is None else best.key
+
+    def select(self, k):
+        """ Returns the kth smallest key in the symbol table. """
+        if k < 0 or k >= self.size():
+            raise ValueError("k is out of range")
+        x = self.root
+        while True:
+            t = self._size(x.left)
+            if k < t:
+                x = x.left
+            elif k > t:
+                k, x = k - t - 1, x.right
+            else:
+                return x.key
+
+    def rank(self, key):
+        """ Returns the number of keys in the table strictly less than key. """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return self._rank(key)
+
+    def _rank(self, key, inclusive=False):
+        """ Returns the number of keys less than (or equal to) key. """
+        r, x = 0, self.root
+        while x is not None:
+            if (not key < x.key) if inclusive else x.key < key:
+                r += 1 + self._size(x.left)
+                x = x.right
+            else:
+                x = x.left
+        return r
+
+    def keys(self):
+        """ Returns all keys in the symbol table. """
+        return list(self.irange())
+
+    def iter_items(self):
+        """ Returns a lazy iterator over the (key, value) pairs in key order. """
+        for x in self._iter_nodes(None, None, (True, True)):
+            yield x.key, x.value
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns a lazy iterator over the keys in between the given keys.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+        """
+        for x in self._iter_nodes(low_key, high_key, inclusive):
+            yield x.key
+
+    def _iter_nodes(self, low_key, high_key, inclusive):
+        """ Yields the nodes in between the given keys with an explicit stack. """
+        low_inclusive, high_inclusive = inclusive
+
+        def too_low(key):
+            if low_key is None:
+                return False
+            return key < low_key if low_inclusive else not low_key < key
+
+        def too_high(key):
+            if high_key is None:
+                return False
+            return high_key < key if high_inclusive else not key < high_key
+
+        stack, x = [], self.root
+        while x is not None:
+            if too_low(x.key):
+                x = x.right
+            else:
+                stack.append(x)
+                x = x.left
+        while stack:
+            x = stack.pop()
+            if too_high(x.key):
+                return
+            yield x
+            x = x.right
+            while x is not None:
+                stack.append(x)
+                x = x.left
+
+    def keys_inrange(self, low_key, high_key):
+        """ Returns all keys in between low_key (inclusive) and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return list(self.irange(low_key, high_key))
+
+    def size_inrange(self, low_key, high_key):
+        """ Returns the number of keys in between low_key and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return self.count_range(low_key, high_key, (True, True))
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """ Returns the number of keys in between the given keys, each bound
+        included or excluded as in irange(), in O(log n). """
+        low, high = 0, self.size()
+        if low_key is not None:
+            low = self._rank(low_key, not inclusive[0])
+        if high_key is not None:
+            high = self._rank(high_key, inclusive[1])
+        return max(0, high - low)
+
+    def _nodes_inorder(self):
+        """ Returns the nodes following an in-order traversal. """
+        return list(self._iter_nodes(None, None, (True, True)))
+
+    # ****************** Check internal invariants of the tree *****************#
+    def _validate(self, key=None):
+        """Check the invariants after mutating the given key.
+
+        Raises:
+            AssertionError: if the tree is not consistent
+        """
+        if self.validation == "off":
+            return
+        if self.validation == "full":
+            consistent = self.checked()
+        else:
+            consistent = self.is_path_consistent(key)
+        if not consistent:
+            raise AssertionError(f"{type(self).__name__} not consistent after "
+                                 f"mutating {key!r}")
+
+    def checked(self):
+        """ Check if all the representational invariants are consistent. """
+        return (self.is_BST() and self.is_size_consistent()
+                and self.is_rank_consistent() and self.is_balanced())
+
+    def is_BST(self):
+        """ Check if the BST property of the tree is consistent. """
+        keys = self.keys()
+        return all(keys[i] < keys[i + 1] for i in range(len(keys) - 1))
+
+    def is_size_consistent(self):
+        """ Check if the subtree size of every node is consistent. """
+        return all(x.size == 1 + self._size(x.left) + self._size(x.right)
+                   for x in self._nodes_inorder())
+
+    def is_rank_consistent(self):
+        """ Check if the rank of the tree is consistent. """
+        for i in range(self.size()):
+            if i != self.rank(self.select(i)):
+                return False
+        for key in self.keys():
+            if key != self.select(self.rank(key)):
+                return False
+        return True
+
+    def is_balanced(self):
+        """ Check the balance invariant of the subclass. """
+        return True
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self.size()
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return self.irange()
+
+    # ********************* End of Python Special Methods *********************#
@@ -0,0 +1,420 @@
+"""
+An ordered symbol table of key-value pairs kept in a list of short sorted
+sublists, in the manner of the sortedcontainers package.
+
+The keys are split into consecutive sorted sublists of between load / 2
+and 2 * load keys, with the values in parallel sublists and the largest key
+of each sublist in a list of maxima. A search bisects the maxima, then the
+one sublist; an insertion or deletion shifts at most 2 * load pointers
+with a fast memmove, and splits or joins a sublist when it leaves its size
+bounds. The number of keys in front of each sublist is cached and rebuilt
+after a change the first time rank() or select() needs it.
+
+In CPython this layout makes far fewer interpreter steps and allocations
+than a tree of node objects. The symbol table supports the operations of
+sized_bst.SizedBST.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain
+
+from avl_tree import AVLTreeST
+from utils import sorted_items
+
+
+class SortedSublistsST(object):
+    """Symbol table implementation using a list of sorted sublists."""
+
+    VALIDATION_LEVELS = AVLTreeST.VALIDATION_LEVELS
+    DEFAULT_LOAD = 1000
+
+    def __init__(self, validation=None, load=DEFAULT_LOAD):
+        """It initializes an ordered symbol table.
+
+        Args:
+            validation: how much of the structure is checked after each
+                        mutation; "off", "path" (the sublist touched) or
+                        "full" (see AVLTreeST)
+            load      : the load factor; sublists hold between load / 2 and
+                        2 * load keys
+        """
+        if validation is None:
+            validation = "path" if __debug__ else "off"
+        if validation not in self.VALIDATION_LEVELS:
+            raise ValueError(f"validation must be one of {self.VALIDATION_LEVELS}")
+        if load < 4:
+            raise ValueError("load must be at least 4")
+        self.validation = validation
+        self._load = load
+        self._keys = []         # the sorted sublists of keys
+        self._values = []       # the sublists of values, parallel to _keys
+        self._maxes = []        # the largest key of each sublist
+        self._offsets = None    # number of keys in front of each sublist
+        self._n = 0
+
+    def is_empty(self):
+        """ Check whether this symbol table is empty or not. """
+        return self._n == 0
+
+    def size(self):
+        """ Return the number of key-value pairs in the symbol table. """
+        return self._n
+
+    def contains(self, key):
+        """ Check whether the symbol table contains the given key or not. """
+        if key is None:
+            raise ValueError("Can't search 'None'")
+        return self.get(key) is not None
+
+    def get(self, key):
+        """Returns the value associated with given key or None if no such key.
+
+        Args:
+            key: the key of which value to be gotten
+        """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        k = bisect_left(self._maxes, key)
+        if k == len(self._maxes):
+            return None
+        keys = self._keys[k]
+        i = bisect_left(keys, key)
+        if key < keys[i]:
+            return None
+        return self._values[k][i]
+
+    def put(self, key, value):
+        """Inserts the key-value pair into the symbol table.
+
+        Args:
+            key  : the key to be inserted into the table
+            value: value associated with the given key; None deletes the key
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if value is None:
+            self.delete(key)
+            return
+        maxes = self._maxes
+        if not maxes:
+            self._keys.append([key])
+            self._values.append([value])
+            maxes.append(key)
+        else:
+            k = bisect_left(maxes, key)
+            if k == len(maxes):
+                k -= 1
+                self._keys[k].append(key)
+                self._values[k].append(value)
+                maxes[k] = key
+            else:
+                keys = self._keys[k]
+                i = bisect_left(keys, key)
+                if not key < keys[i]:
+                    self._values[k][i] = value
+                    return
+                keys.insert(i, key)
+                self._values[k].insert(i, value)
+            self._expand(k)
+        self._n += 1
+        self._offsets = None
+        self._validate(key)
+
+    def _expand(self, k):
+        """ Split the kth sublist in two if it holds more than 2 * load keys. """
+        keys = self._keys[k]
+        if len(keys) <= 2 * self._load:
+            return
+        load, values = self._load, self._values[k]
+        self._keys.insert(k + 1, keys[load:])
+        self._values.insert(k + 1, values[load:])
+        del keys[load:]
+        del values[load:]
+        self._maxes[k] = keys[-1]
+        self._maxes.insert(k + 1, self._keys[k + 1][-1])
+
+    def delete(self, key):
+        """Remove the given key and associated value with it from the table.
+
+        Args:
+            key: the key to be removed
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        k = bisect_left(self._maxes, key)
+        if k == len(self._maxes):
+            return
+        i = bisect_left(self._keys[k], key)
+        if key < self._keys[k][i]:
+            return
+        self._remove(k, i)
+        self._validate(key)
+
+    def delete_min(self):
+        """Removes the smallest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_min() is called on empty table")
+        key = self._keys[0][0]
+        self._remove(0, 0)
+        self._validate(key)
+
+    def delete_max(self):
+        """Removes the largest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_max() is called on empty table")
+        k = len(self._keys) - 1
+        key = self._keys[k][-1]
+        self._remove(k, len(self._keys[k]) - 1)
+        self._validate(key)
+
+    def _remove(self, k, i):
+        """Removes the ith key of the kth sublist.
+
+        A sublist left with fewer than load / 2 keys is joined with a
+        neighbour, and split again if that makes it too long.
+        """
+        keys, values = self._keys[k], self._values[k]
+        del keys[i]
+        del values[i]
+        self._n -= 1
+        self._offsets = None
+        if not keys:
+            del self._keys[k], self._values[k], self._maxes[k]
+            return
+        self._maxes[k] = keys[-1]
+        if len(keys) < self._load // 2 and len(self._keys) > 1:
+            if k == 0:
+                k = 1
+            self._keys[k - 1].extend(self._keys[k])
+            self._values[k - 1].extend(self._values[k])
+            self._maxes[k - 1] = self._maxes[k]
+            del self._keys[k], self._values[k], self._maxes[k]
+            self._expand(k - 1)
+
+    def put_many(self, items):
+        """Inserts the given key-value pairs one by one.
+
+        Args:
+            items: an iterable of (key, value) pairs; a None value deletes
+                   the key from the table
+        """
+        for key, value in items:
+            self.put(key, value)
+
+    def min(self):
+        """ Returns the smallest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" min() is called in empty table")
+        return self._keys[0][0]
+
+    def max(self):
+        """ Returns the largest key in the symbol table. """
+        if self.is_empty():
+            raise RuntimeError(" max() is called in empty table")
+        return self._maxes[-1]
+
+    def floor(self, key):
+        """ Returns the largest key less than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' in the table")
+        if self.is_empty():
+            raise RuntimeError(" floor(key) is called on empty table")
+        k = bisect_left(self._maxes, key)
+        if k == len(self._maxes):
+            return self._maxes[-1]
+        keys = self._keys[k]
+        i = bisect_right(keys, key)
+        if i > 0:
+            return keys[i - 1]
+        return self._maxes[k - 1] if k > 0 else None
+
+    def ceiling(self, key):
+        """ Returns the smallest key greater than or equal to the given key. """
+        if key is None:
+            raise ValueError("Can't search 'None' from the table")
+        if self.is_empty():
+            raise RuntimeError("ceiling(key) is called on empty table")
+        k = bisect_left(self._maxes, key)
+        if k == len(self._maxes):
+            return None
+        keys = self._keys[k]
+        return keys[bisect_left(keys, key)]
+
+    def _offsets_of(self):
+        """ Return the number of keys in front of each sublist. """
+        if self._offsets is None:
+            self._offsets = list(accumulate(chain((0,), map(len, self._keys[:-1]))))
+        return self._offsets
+
+    def select(self, k):
+        """ Returns the kth smallest key in the symbol table. """
+        if k < 0 or k >= self._n:
+            raise ValueError("k is out of range")
+        offsets = self._offsets_of()
+        j = bisect_right(offsets, k) - 1
+        return self._keys[j][k - offsets[j]]
+
+    def rank(self, key):
+        """ Returns the number of keys in the table strictly less than key. """
+        if key is None:
+            raise ValueError("key can't be 'None'")
+        return self._position(key, bisect_left)
+
+    def _position(self, key, bisect):
+        """ Return bisect(all keys, key) from the maxima and one sublist. """
+        k = bisect_left(self._maxes, key)
+        if k == len(self._maxes):
+            return self._n
+        return self._offsets_of()[k] + bisect(self._keys[k], key)
+
+    def keys(self):
+        """ Returns all keys in the symbol table. """
+        return list(chain.from_iterable(self._keys))
+
+    def iter_items(self):
+        """ Returns a lazy iterator over the (key, value) pairs in key order. """
+        for keys, values in zip(self._keys, self._values):
+            yield from zip(keys, values)
+
+    def irange(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """Returns a lazy iterator over the keys in between the given keys.
+
+        Args:
+            low_key  : the lowest key, or None for no lower bound
+            high_key : the highest key, or None for no upper bound
+            inclusive: whether low_key and high_key themselves are included
+        """
+        low, high = 0, self._n
+        if low_key is not None:
+            low = self._position(low_key, bisect_left if inclusive[0] else bisect_right)
+        if high_key is not None:
+            high = self._position(high_key, bisect_right if inclusive[1] else bisect_left)
+        if low >= high:
+            return
+        offsets = self._offsets_of()
+        k = bisect_right(offsets, low) - 1
+        i, count = low - offsets[k], high - low
+        while count > 0:
+            keys = self._keys[k][i:i + count]
+            yield from keys
+            count -= len(keys)
+            k, i = k + 1, 0
+
+    def keys_inrange(self, low_key, high_key):
+        """ Returns all keys in between low_key (inclusive) and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return list(self.irange(low_key, high_key))
+
+    def size_inrange(self, low_key, high_key):
+        """ Returns the number of keys in between low_key and high_key. """
+        if low_key is None or high_key is None:
+            raise ValueError("keys can't be 'None'")
+        return self.count_range(low_key, high_key, (True, True))
+
+    def count_range(self, low_key=None, high_key=None, inclusive=(True, False)):
+        """ Returns the number of keys in between the given keys, each bound
+        included or excluded as in irange(). """
+        low, high = 0, self._n
+        if low_key is not None:
+            low = self._position(low_key, bisect_left if inclusive[0] else bisect_right)
+        if high_key is not None:
+            high = self._position(high_key, bisect_right if inclusive[1] else bisect_left)
+        return max(0, high - low)
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        The pairs are sorted (unless presorted) and deduplicated, then cut
+        into sublists of load keys in linear time.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        """
+        st = cls(**options)
+        keys, values, _ = sorted_items(items, presorted)
+        load = st._load
+        st._keys = [keys[i:i + load] for i in range(0, len(keys), load)]
+        st._values = [values[i:i + load] for i in range(0, len(values), load)]
+        st._maxes = [keys[-1] for keys in st._keys]
+        st._n = len(keys)
+        st._validate()
+        return st
+
+    # ************** Check internal invariants of the sublists *****************#
+    def _validate(self, key=None):
+        """Check the invariants after mutating the given key.
+
+        Raises:
+            AssertionError: if the structure is not consistent
+        """
+        if self.validation == "off":
+            return
+        if self.validation == "full":
+            consistent = self.checked()
+        else:
+            consistent = self.is_path_consistent(key)
+        if not consistent:
+            raise AssertionError(f"SortedSublistsST not consistent after mutating {key!r}")
+
+    def checked(self):
+        """ Check if all the representational invariants are consistent. """
+        return (all(self._is_sublist_consistent(k) for k in range(len(self._keys)))
+                and self._n == sum(map(len, self._keys))
+                and self.is_rank_consistent())
+
+    def is_path_consistent(self, key):
+        """Check the sublist the given key belongs in, and the maxima.
+
+        Returns:
+            True if the sublist is consistent or False otherwise.
+        """
+        if len(self._maxes) != len(self._keys):
+            return False
+        if not self._keys:
+            return self._n == 0
+        k = 0 if key is None else min(bisect_left(self._maxes, key), len(self._keys) - 1)
+        return self._is_sublist_consistent(k)
+
+    def _is_sublist_consistent(self, k):
+        """ Check the order, length and maximum of the kth sublist. """
+        keys, values = self._keys[k], self._values[k]
+        if not keys or len(keys) != len(values) or len(keys) > 2 * self._load:
+            return False
+        if self._maxes[k] is not keys[-1]:
+            return False
+        if k > 0 and not self._maxes[k - 1] < keys[0]:
+            return False
+        return all(keys[i] < keys[i + 1] for i in range(len(keys) - 1))
+
+    def is_rank_consistent(self):
+        """ Check if the rank of the table is consistent. """
+        for i in range(self.size()):
+            if i != self.rank(self.select(i)):
+                return False
+        return True
+
+    # ************************ Python Special Methods: ************************#
+    def __len__(self):
+        return self._n
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iter__(self):
+        return chain.from_iterable(self._keys)
+
+    # ********************* End of Python Special Methods *********************#
@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right
 from random import randint, randrange
 from typing import List
 import sys
@@ -59,22 +60,18 @@ def merge(L1: List, L2: List) -> List:
     Returns:
         a sorted list containing all elements of both list - L1 and L2.
     """
-    L = L1 + L2
+    L = []
     left_index, right_index = 0, 0
 
-    for i in range(len(L)):
-        if left_index >= len(L1):
-            L[i] = L2[right_index]
-            right_index += 1
-        elif right_index >= len(L2):
-            L[i] = L1[left_index]
-            left_index += 1
-        elif L2[right_index] < L1[left_index]:   # ensure stability
-            L[i] = L2[right_index]
+    while left_index < len(L1) and right_index < len(L2):
+        if L2[right_index] < L1[left_index]:   # ensure stability
+            L.append(L2[right_index])
             right_index += 1
         else:
-            L[i] = L1[left_index]
+            L.append(L1[left_index])
             left_index += 1
+    L.extend(L1[left_index:])
+    L.extend(L2[right_index:])
     return L
 
 
@@ -114,7 +111,8 @@ def _merge_sort_two(a: List, low: int, high: int) -> None:
 
 def merge_two(a: List, low: int, mid: int, high: int):
     """It stably merges a[low ... mid] with a[mid+1 ... high] using an
-    auxilary array, aux[low ... high]
+    auxilary copy of the first half, aux[0 ... mid-low]; the second half
+    is read in place, always ahead of the items being written
 
     Args:
         a   : the array is being sorted
@@ -123,20 +121,20 @@ def merge_two(a: List, low: int, mid: int, high: int):
         high: last index of second half of the array, a[mid+1 ... high]
     """
 
-    aux = [item for item in a]
-    left, right, i = low, mid+1, low
+    aux = a[low:mid+1]
+    left, right, i = 0, mid+1, low
 
-    while left <= mid and right <= high:
-        if aux[left] <= aux[right]:       # ensures stability
+    while left <= mid - low and right <= high:
+        if aux[left] <= a[right]:       # ensures stability
             a[i] = aux[left]
             left += 1
             i += 1
         else:
-            a[i] = aux[right]
+            a[i] = a[right]
             right += 1
             i += 1
 
-    while left <= mid:
+    while left <= mid - low:
         a[i] = aux[left]
         i += 1
         left += 1
@@ -197,10 +195,10 @@ def merge_three(a: List, low: int, mid: int, high: int, aux: List) -> None:
     for i in range(low, high+1):
         if left_index > mid:
             a[i] = aux[right_index]
-            left_index += 1
+            right_index += 1
         elif right_index > high:
             a[i] = aux[left_index]
-            right_index += 1
+            left_index += 1
         elif aux[right_index] < aux[left_index]:   # ensures stability
             a[i] = aux[right_index]
             right_index += 1
@@ -209,6 +207,276 @@ def merge_three(a: List, low: int, mid: int, high: int, aux: List) -> None:
             left_index += 1
 
 
+#************************ Adaptive natural merge sort ************************#
+MIN_MERGE = 64      # shorter lists are sorted by binary insertion sort alone
+MIN_GALLOP = 7      # wins in a row for a merge to switch to galloping
+
+
+def natural_merge_sort(a: List) -> None:
+    """Sorts the specified list stably with an adaptive, Timsort-style merge sort.
+
+    The list is cut into its natural runs: ascending ones, and strictly
+    descending ones reversed in place, which keeps the sort stable. Runs
+    shorter than a minimum length of 32 to 64 are extended by binary
+    insertion sort. The runs are pushed on a stack and merged while the
+    lengths of its top three runs break the rules of Timsort, which keeps
+    the merges balanced and the stack O(log n) deep. A merge copies only
+    the shorter run aside, skips the prefix and suffix already in place,
+    and switches to galloping, moving whole slices found by exponential
+    search, while one run keeps winning.
+
+    Presorted and reversed lists take n - 1 comparisons, nearly sorted
+    ones close to linear time, and any list O(n log n) comparisons.
+
+    Args:
+        a: the list to be sorted
+    """
+    n = len(a)
+    if n < 2:
+        return
+    min_run = _min_run_length(n)
+    runs, gallop = [], [MIN_GALLOP]     # (base, length) of the runs; threshold
+    low = 0
+    while low < n:
+        high = _count_run(a, low, n)
+        if high - low < min_run:
+            end = min(low + min_run, n)
+            _binary_insertion_sort(a, low, end, high)
+            high = end
+        runs.append((low, high - low))
+        _merge_collapse(a, runs, gallop)
+        low = high
+    while len(runs) > 1:
+        i = len(runs) - 2
+        if i > 0 and runs[i - 1][1] < runs[i + 1][1]:
+            i -= 1
+        _merge_at(a, runs, i, gallop)
+
+
+def _min_run_length(n: int) -> int:
+    """ Return the minimum run length, so that n / min_run is a power of two or a bit less. """
+    r = 0
+    while n >= MIN_MERGE:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+def _count_run(a: List, low: int, high: int) -> int:
+    """Finds the run starting at a[low], reversing it if it is descending.
+
+    Args:
+        a   : the list being sorted
+        low : the first index of the run
+        high: the end of the list, exclusive
+    Returns:
+        the end of the run, exclusive
+    """
+    i = low + 1
+    if i == high:
+        return high
+    if a[i] < a[low]:                   # strictly descending
+        i += 1
+        while i < high and a[i] < a[i-1]:
+            i += 1
+        a[low:i] = a[low:i][::-1]
+    else:
+        i += 1
+        while i < high and not a[i] < a[i-1]:
+            i += 1
+    return i
+
+
+def _binary_insertion_sort(a: List, low: int, high: int, start: int) -> None:
+    """It sorts a[low ... high-1] whose prefix a[low ... start-1] is sorted,
+    finding where each item goes by binary search
+
+    Args:
+        a    : the list being sorted
+        low  : first index of the range
+        high : end of the range, exclusive
+        start: end of the sorted prefix, exclusive
+    """
+    for i in range(start, high):
+        item = a[i]
+        pos = bisect_right(a, item, low, i)     # after equal items: stable
+        if pos < i:
+            a[pos+1:i+1] = a[pos:i]
+            a[pos] = item
+
+
+def _merge_collapse(a: List, runs: List, gallop: List) -> None:
+    """Merges runs at the top of the stack until, for its top lengths
+    ... X, Y, Z, X > Y + Z and Y > Z hold (with the invariant also checked
+    one run deeper, as corrected after Timsort's proof)
+
+    Args:
+        a     : the list being sorted
+        runs  : the stack of (base, length) runs
+        gallop: the galloping threshold, in a one-item list
+    """
+    while len(runs) > 1:
+        i = len(runs) - 2
+        if ((i > 0 and runs[i-1][1] <= runs[i][1] + runs[i+1][1])
+                or (i > 1 and runs[i-2][1] <= runs[i-1][1] + runs[i][1])):
+            if runs[i-1][1] < runs[i+1][1]:
+                i -= 1
+        elif runs[i][1] > runs[i+1][1]:
+            return
+        _merge_at(a, runs, i, gallop)
+
+
+def _merge_at(a: List, runs: List, i: int, gallop: List) -> None:
+    """It stably merges the runs i and i+1 of the stack, which are adjacent
+
+    Args:
+        a     : the list being sorted
+        runs  : the stack of (base, length) runs
+        i     : the index of the first run on the stack
+        gallop: the galloping threshold, in a one-item list
+    """
+    base1, len1 = runs[i]
+    base2, len2 = runs[i+1]
+    runs[i] = (base1, len1 + len2)
+    del runs[i+1]
+
+    # the items of the first run ≤ the first of the second are in place
+    k = _gallop(a, a[base2], base1, base2, True, False) - base1
+    base1, len1 = base1 + k, len1 - k
+    if len1 == 0:
+        return
+    # and so are the items of the second run ≥ the last of the first
+    len2 = _gallop(a, a[base2-1], base2, base2 + len2, False, True) - base2
+    if len2 == 0:
+        return
+    if len1 <= len2:
+        _merge_low(a, base1, len1, base2, len2, gallop)
+    else:
+        _merge_high(a, base1, len1, base2, len2, gallop)
+
+
+def _gallop(a: List, key, low: int, high: int, right: bool, from_end: bool) -> int:
+    """Finds where key goes in the sorted a[low ... high-1] by exponential search
+
+    The search probes 1, 3, 7, ... items away from one end, then bisects
+    the last gap, so it costs O(log d) for an answer d items from that end.
+
+    Args:
+        a       : a sorted list
+        key     : the item to be placed
+        low     : first index of the range
+        high    : end of the range, exclusive
+        right   : place key after the items equal to it, or else before them
+        from_end: start probing from a[high-1], or else from a[low]
+    Returns:
+        the index of the first item > key (or ≥ key if not right)
+    """
+    n, last, ofs = high - low, 0, 1
+    if not from_end:
+        while ofs <= n and ((not key < a[low+ofs-1]) if right else a[low+ofs-1] < key):
+            last, ofs = ofs, 2*ofs + 1
+        low, high = low + last, min(low + ofs - 1, high)
+    else:
+        while ofs <= n and (key < a[high-ofs] if right else not a[high-ofs] < key):
+            last, ofs = ofs, 2*ofs + 1
+        low, high = max(high - ofs + 1, low), high - last
+    return (bisect_right if right else bisect_left)(a, key, low, high)
+
+
+def _merge_low(a: List, base1: int, len1: int, base2: int, len2: int,
+               gallop: List) -> None:
+    """It stably merges the adjacent runs a[base1 ... base1+len1-1] and
+    a[base2 ... base2+len2-1], copying the first, shorter one aside and
+    filling the list from the left
+
+    Args:
+        a     : the list being sorted
+        base1 : first index of the first run
+        len1  : length of the first run
+        base2 : first index of the second run
+        len2  : length of the second run
+        gallop: the galloping threshold, in a one-item list
+    """
+    aux = a[base1:base1+len1]
+    i, j, k, end2 = 0, base2, base1, base2 + len2
+    min_gallop = gallop[0]
+    while i < len1 and j < end2:
+        wins1 = wins2 = 0               # one item at a time, counting wins
+        while i < len1 and j < end2 and wins1 < min_gallop and wins2 < min_gallop:
+            if a[j] < aux[i]:           # ensures stability
+                a[k] = a[j]
+                j += 1
+                wins1, wins2 = 0, wins2 + 1
+            else:
+                a[k] = aux[i]
+                i += 1
+                wins1, wins2 = wins1 + 1, 0
+            k += 1
+        while i < len1 and j < end2:    # galloping: move whole slices
+            count1 = _gallop(aux, a[j], i, len1, True, False) - i
+            a[k:k+count1] = aux[i:i+count1]
+            i, k = i + count1, k + count1
+            if i == len1:
+                break
+            count2 = _gallop(a, aux[i], j, end2, False, False) - j
+            a[k:k+count2] = a[j:j+count2]
+            j, k = j + count2, k + count2
+            min_gallop = max(1, min_gallop - 1)
+            if count1 < MIN_GALLOP and count2 < MIN_GALLOP:
+                min_gallop += 2         # penalize leaving galloping
+                break
+    a[k:k+len1-i] = aux[i:]             # the rest of the second run is in place
+    gallop[0] = min_gallop
+
+
+def _merge_high(a: List, base1: int, len1: int, base2: int, len2: int,
+                gallop: List) -> None:
+    """It stably merges the adjacent runs a[base1 ... base1+len1-1] and
+    a[base2 ... base2+len2-1], copying the second, shorter one aside and
+    filling the list from the right
+
+    Args:
+        a     : the list being sorted
+        base1 : first index of the first run
+        len1  : length of the first run
+        base2 : first index of the second run
+        len2  : length of the second run
+        gallop: the galloping threshold, in a one-item list
+    """
+    aux = a[base2:base2+len2]
+    i, j, k = len2 - 1, base2 - 1, base2 + len2 - 1
+    min_gallop = gallop[0]
+    while i >= 0 and j >= base1:
+        wins1 = wins2 = 0
+        while i >= 0 and j >= base1 and wins1 < min_gallop and wins2 < min_gallop:
+            if aux[i] < a[j]:           # ensures stability
+                a[k] = a[j]
+                j -= 1
+                wins1, wins2 = wins1 + 1, 0
+            else:
+                a[k] = aux[i]
+                i -= 1
+                wins1, wins2 = 0, wins2 + 1
+            k -= 1
+        while i >= 0 and j >= base1:
+            start = _gallop(a, aux[i], base1, j + 1, True, True)
+            count1 = j + 1 - start
+            a[k-count1+1:k+1] = a[start:j+1]
+            j, k = start - 1, k - count1
+            if j < base1:
+                break
+            start = _gallop(aux, a[j], 0, i + 1, False, True)
+            count2 = i + 1 - start
+            a[k-count2+1:k+1] = aux[start:i+1]
+            i, k = start - 1, k - count2
+            min_gallop = max(1, min_gallop - 1)
+            if count1 < MIN_GALLOP and count2 < MIN_GALLOP:
+                min_gallop += 2
+                break
+    a[base1:base1+i+1] = aux[:i+1]      # the rest of the first run is in place
+    gallop[0] = min_gallop
+
+
 """ Implementation of quick sort algorithm.
 
 This modules provides two functions, implemented in different ways, for
@@ -0,0 +1,195 @@
+"""
+The interchangeable ordered symbol tables of this package, a factory to
+pick one by name, and a randomized conformance check of their common
+interface.
+
+Every backend supports is_empty, size, contains, get, put, delete,
+delete_min, delete_max, min, max, floor, ceiling, select, rank, keys,
+keys_inrange, size_inrange, count_range, put_many, checked and from_items,
+with the same semantics, errors included, and the dict-like special
+methods:
+
+avl            : avl_tree.AVLTreeST, an AVL tree of node objects
+wavl           : wavl_tree.WAVLTreeST, a weak AVL tree of node objects
+arena-avl      : arena_avl_tree.ArenaAVLTreeST, an AVL tree in array columns
+red-black      : red_black_tree.RedBlackTreeST, a left-leaning red-black BST
+treap          : treap.TreapST, a randomized treap
+sorted-sublists: sorted_sublists.SortedSublistsST, a list of sorted sublists
+bplus          : bplus_tree.BPlusTreeST, a B+-tree in a paged file
+
+benchmarks.bench_backends() measures them side by side.
+"""
+from random import Random
+
+from arena_avl_tree import ArenaAVLTreeST
+from avl_tree import AVLTreeST
+from bplus_tree import BPlusTreeST
+from red_black_tree import RedBlackTreeST
+from sorted_sublists import SortedSublistsST
+from treap import TreapST
+from wavl_tree import WAVLTreeST
+
+BACKENDS = {
+    "avl": AVLTreeST,
+    "wavl": WAVLTreeST,
+    "arena-avl": ArenaAVLTreeST,
+    "red-black": RedBlackTreeST,
+    "treap": TreapST,
+    "sorted-sublists": SortedSublistsST,
+    "bplus": BPlusTreeST,
+}
+
+
+def new_symbol_table(backend="avl", items=None, **options):
+    """Makes an ordered symbol table of the given backend.
+
+    Args:
+        backend: the name of the backend, see BACKENDS
+        items  : optional (key, value) pairs to bulk load
+        options: keyword arguments for the constructor of the backend
+    Returns:
+        a new symbol table
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {tuple(BACKENDS)}")
+    cls = BACKENDS[backend]
+    if items is not None:
+        return cls.from_items(items, **options)
+    return cls(**options)
+
+
+def check_conformance(backend, options=None, operations=5000, key_space=200, seed=0):
+    """Checks a backend against a dict model with random operations.
+
+    The same seeded sequence of puts, deletes, bulk loads and queries runs
+    on the backend and on a dict; every result, and every error raised for
+    an empty table or a None key, must match the interface of AVLTreeST.
+
+    Args:
+        backend   : the name or the class of the backend
+        options   : a dict of keyword arguments for the constructor
+        operations: the number of random operations
+        key_space : the keys are the integers 0 ... key_space - 1
+        seed      : the seed of the operations
+    Raises:
+        AssertionError: describing the first mismatch
+    """
+    cls = BACKENDS[backend] if isinstance(backend, str) else backend
+    name, rnd = cls.__name__, Random(seed)
+    options = options or {}
+
+    def expect(condition, what):
+        if not condition:
+            raise AssertionError(f"{name}: {what}")
+
+    def expect_error(error, fn, *args):
+        try:
+            fn(*args)
+        except error:
+            return
+        except Exception as e:
+            raise AssertionError(f"{name}: {fn.__name__}{args} raised {e!r}, "
+                                 f"not {error.__name__}")
+        raise AssertionError(f"{name}: {fn.__name__}{args} did not raise {error.__name__}")
+
+    st = cls(**options)
+    expect(st.is_empty() and st.size() == 0 and len(st) == 0, "new table not empty")
+    expect(st.keys() == [] and list(st) == [], "new table has keys")
+    expect(st.get(0) is None and not st.contains(0) and 0 not in st, "get on empty table")
+    expect(st.rank(0) == 0, "rank on empty table")
+    for method in (st.min, st.max, st.delete_min, st.delete_max):
+        expect_error(RuntimeError, method)
+    for method in (st.floor, st.ceiling):
+        expect_error(RuntimeError, method, 0)
+    expect_error(ValueError, st.select, 0)
+    for method in (st.get, st.contains, st.delete, st.rank):
+        expect_error(ValueError, method, None)
+    expect_error(ValueError, st.put, None, 1)
+    expect_error(ValueError, st.keys_inrange, None, 1)
+    expect_error(ValueError, st.size_inrange, 0, None)
+    expect_error(ValueError, st.put_many, [(None, 2), (1, 1)])
+    expect_error(ValueError, lambda: cls.from_items([(1, 1), (None, 2)], **options))
+
+    model = {}
+    for step in range(operations):
+        op = rnd.random()
+        key = rnd.randrange(key_space)
+        if op < 0.35:
+            st.put(key, step)
+            model[key] = step
+        elif op < 0.40:
+            st.put(key, None)
+            model.pop(key, None)
+        elif op < 0.55:
+            del st[key]
+            model.pop(key, None)
+        elif op < 0.58 and model:
+            st.delete_min()
+            del model[min(model)]
+        elif op < 0.61 and model:
+            st.delete_max()
+            del model[max(model)]
+        elif op < 0.63:
+            batch = [(rnd.randrange(key_space), rnd.choice((None, step, step + 1)))
+                     for _ in range(rnd.randrange(1, 30))]
+            st.put_many(batch)
+            for k, v in batch:
+                if v is None:
+                    model.pop(k, None)
+                else:
+                    model[k] = v
+        else:
+            keys = sorted(model)
+            probe = rnd.randrange(-1, key_space + 1) + rnd.choice((0, 0.5))
+            expect(st.get(probe) == model.get(probe), f"get({probe!r})")
+            expect(st.contains(probe) == (probe in model), f"contains({probe!r})")
+            rank = sum(1 for k in keys if k < probe)
+            expect(st.rank(probe) == rank, f"rank({probe!r})")
+            if keys:
+                floor = max((k for k in keys if k <= probe), default=None)
+                ceiling = min((k for k in keys if k >= probe), default=None)
+                expect(st.floor(probe) == floor, f"floor({probe!r})")
+                expect(st.ceiling(probe) == ceiling, f"ceiling({probe!r})")
+                i = rnd.randrange(len(keys))
+                expect(st.select(i) == keys[i], f"select({i})")
+                expect(st.min() == keys[0] and st.max() == keys[-1], "min() or max()")
+            expect_error(ValueError, st.select, len(keys))
+            low, high = sorted((probe, rnd.randrange(-1, key_space + 1)))
+            expect(st.keys_inrange(low, high) == [k for k in keys if low <= k < high],
+                   f"keys_inrange({low!r}, {high!r})")
+            expect(st.size_inrange(low, high) == sum(1 for k in keys if low <= k <= high),
+                   f"size_inrange({low!r}, {high!r})")
+            expect(st.size_inrange(high + 1, low) == 0, "size_inrange of an empty range")
+            inclusive = (rnd.random() < 0.5, rnd.random() < 0.5)
+            expect(st.count_range(low, high, inclusive)
+                   == sum(1 for k in keys if (low <= k if inclusive[0] else low < k)
+                          and (k <= high if inclusive[1] else k < high)),
+                   f"count_range({low!r}, {high!r}, {inclusive})")
+            expect(st.count_range(None, high) == sum(1 for k in keys if k < high)
+                   and st.count_range(low) == sum(1 for k in keys if low <= k),
+                   "count_range with an open bound")
+            if hasattr(st, "irange"):
+                expect(list(st.irange(low, high, (False, True)))
+                       == [k for k in keys if low < k <= high], "irange()")
+        expect(st.size() == len(st) == len(model), f"size() after step {step}")
+        expect(st.is_empty() == (not model), f"is_empty() after step {step}")
+        if step % 100 == 0 or step == operations - 1:
+            keys = sorted(model)
+            expect(st.keys() == keys and list(st) == keys, f"keys() after step {step}")
+            if hasattr(st, "iter_items"):
+                expect(list(st.iter_items()) == [(k, model[k]) for k in keys],
+                       f"iter_items() after step {step}")
+            expect(st.checked(), f"checked() after step {step}")
+
+    items = [(rnd.randrange(key_space), rnd.choice((None, 1, 2))) for _ in range(key_space)]
+    model = {}
+    for k, v in items:
+        model[k] = v
+    model = {k: v for k, v in model.items() if v is not None}
+    st = cls.from_items(items, **options)
+    expect([(k, st.get(k)) for k in st.keys()] == sorted(model.items()), "from_items()")
+    expect(st.checked(), "checked() after from_items()")
+    ordered = sorted(model.items())
+    st = cls.from_items(ordered, presorted=True, **options)
+    expect([(k, st.get(k)) for k in st.keys()] == ordered, "from_items(presorted=True)")
+    expect_error(ValueError, cls.from_items, [(2, 1), (1, 1)], True)
@@ -0,0 +1,251 @@
+"""
+An ordered symbol table of key-value pairs backed by a treap
+(https://en.wikipedia.org/wiki/Treap).
+
+Every node draws a random priority, and the tree is a BST by key and a
+max-heap by priority, so its shape is that of a BST built by inserting the
+keys in random order: the expected height is O(log n) whatever the order
+of the operations. An insertion rotates the new node up until its parent
+has a higher priority; a deletion replaces the node by the merge of its
+two subtrees.
+
+The symbol table supports the operations of sized_bst.SizedBST, which are
+those of avl_tree.AVLTreeST without the persistent, aggregate and batch
+extensions.
+"""
+from random import Random
+
+from sized_bst import SizedBST
+from utils import sorted_items
+
+
+class TreapST(SizedBST):
+    """Symbol table implementation using a treap."""
+
+    # *************************** Nested Node Class ***************************#
+    class Node(object):
+        def __init__(self, key, value, priority):
+            self.key = key  # the key
+            self.value = value  # the value
+            self.priority = priority  # random heap priority
+            self.size = 1  # number of nodes in the subtree
+            self.left = None  # left subtree
+            self.right = None  # right subtree
+
+    # *********************** End of Nested Node Class ************************#
+
+    def __init__(self, validation=None, seed=None):
+        """It initializes an ordered symbol table.
+
+        Args:
+            validation: how much of the tree is checked after each mutation;
+                        "off", "path" or "full" (see AVLTreeST)
+            seed      : the seed of the priorities, for reproducible shapes
+        """
+        super().__init__(validation)
+        self._random = Random(seed).random
+
+    def put(self, key, value):
+        """Inserts the key-value pair into the symbol table.
+
+        The search path is recorded on a stack; a new leaf is rotated up
+        along it while its priority is higher than its parent's.
+
+        Args:
+            key  : the key to be inserted into the table
+            value: value associated with the given key; None deletes the key
+        """
+        if key is None:
+            raise ValueError("Can't insert 'None' in the table")
+        if value is None:
+            self.delete(key)
+            return
+        path, x = [], self.root
+        while x is not None:
+            if key < x.key:
+                path.append(x)
+                x = x.left
+            elif x.key < key:
+                path.append(x)
+                x = x.right
+            else:
+                x.value = value
+                return
+        x = self.Node(key, value, self._random())
+        for p in path:
+            p.size += 1
+        while path:
+            p = path.pop()
+            if x.priority <= p.priority:
+                if key < p.key:
+                    p.left = x
+                else:
+                    p.right = x
+                break
+            if key < p.key:                 # rotate x above p
+                p.left, x.right = x.right, p
+            else:
+                p.right, x.left = x.left, p
+            p.size = 1 + self._size(p.left) + self._size(p.right)
+            x.size = 1 + self._size(x.left) + self._size(x.right)
+        else:
+            self.root = x
+        self._validate(key)
+
+    def delete(self, key):
+        """Remove the given key and associated value with it from the table.
+
+        Args:
+            key: the key to be removed
+        """
+        if key is None:
+            raise ValueError("Can't delete 'None' from the table")
+        path, x = [], self.root
+        while x is not None:
+            if key < x.key:
+                path.append(x)
+                x = x.left
+            elif x.key < key:
+                path.append(x)
+                x = x.right
+            else:
+                break
+        if x is None:
+            return
+        self._unlink(path, x)
+        self._validate(key)
+
+    def delete_min(self):
+        """Removes the smallest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_min() is called on empty table")
+        path, x = [], self.root
+        while x.left is not None:
+            path.append(x)
+            x = x.left
+        self._unlink(path, x)
+        self._validate(x.key)
+
+    def delete_max(self):
+        """Removes the largest key and its value from the table."""
+        if self.is_empty():
+            raise RuntimeError(" delete_max() is called on empty table")
+        path, x = [], self.root
+        while x.right is not None:
+            path.append(x)
+            x = x.right
+        self._unlink(path, x)
+        self._validate(x.key)
+
+    def _unlink(self, path, x):
+        """ Replace x, reached through path, by the merge of its subtrees. """
+        merged = self._merge(x.left, x.right)
+        for p in path:
+            p.size -= 1
+        if not path:
+            self.root = merged
+        elif path[-1].left is x:
+            path[-1].left = merged
+        else:
+            path[-1].right = merged
+
+    def _merge(self, left, right):
+        """Merges two treaps whose keys do not interleave.
+
+        The root of higher priority stays on top, down the right spine of
+        left and the left spine of right.
+
+        Args:
+            left : the treap with the smaller keys
+            right: the treap with the larger keys
+        Returns:
+            the merged treap
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.size = 1 + self._size(left.left) + self._size(left.right)
+            return left
+        right.left = self._merge(left, right.left)
+        right.size = 1 + self._size(right.left) + self._size(right.right)
+        return right
+
+    @classmethod
+    def from_items(cls, items, presorted=False, **options):
+        """Builds a symbol table from the given key-value pairs in bulk.
+
+        The pairs are sorted (unless presorted) and deduplicated, then the
+        treap is built as the Cartesian tree of the keys and fresh random
+        priorities in linear time, with a stack holding its right spine.
+
+        Args:
+            items    : an iterable of (key, value) pairs
+            presorted: True if the pairs are already in ascending key order
+            options  : keyword arguments for the constructor
+        Returns:
+            a new symbol table holding the given pairs
+        """
+        st = cls(**options)
+        keys, values, _ = sorted_items(items, presorted)
+        spine = []
+        for key, value in zip(keys, values):
+            x, last = st.Node(key, value, st._random()), None
+            while spine and spine[-1].priority < x.priority:
+                last = spine.pop()
+                last.size = 1 + st._size(last.left) + st._size(last.right)
+            x.left = last
+            if spine:
+                spine[-1].right = x
+            spine.append(x)
+        while spine:
+            last = spine.pop()
+            last.size = 1 + st._size(last.left) + st._size(last.right)
+        st.root = last if keys else None
+        st._validate()
+        return st
+
+    # ****************** Check internal invariants of the tree *****************#
+    def is_path_consistent(self, key):
+        """Check the invariants of the nodes along the search path of key.
+
+        Returns:
+            True if the nodes along the path are consistent or False otherwise.
+        """
+        x, smaller, larger = self.root, None, None
+        while x is not None:
+            if not (
+                self._is_node_consistent(x, smaller, larger)
+                and self._is_node_consistent(x.left, smaller, x.key)
+                and self._is_node_consistent(x.right, x.key, larger)
+            ):
+                return False
+            if key is None:
+                break
+            if key < x.key:
+                x, larger = x.left, x.key
+            elif x.key < key:
+                x, smaller = x.right, x.key
+            else:
+                break
+        return True
+
+    def _is_node_consistent(self, x, smaller, larger):
+        """ Check the order, priority and size of x against its children. """
+        if x is None:
+            return True
+        if smaller is not None and not smaller < x.key:
+            return False
+        if larger is not None and not x.key < larger:
+            return False
+        for child in (x.left, x.right):
+            if child is not None and child.priority > x.priority:
+                return False
+        return x.size == 1 + self._size(x.left) + self._size(x.right)
+
+    def is_balanced(self):
+        """ Check the heap order of the priorities. """
+        return all(self._is_node_consistent(x, None, None)
+                   for x in self._nodes_inorder())
@@ -1,3 +1,5 @@
+import sys
+from operator import itemgetter
 from typing import Sequence, List
 
 NUMBERS = {"ZERO": 0, "TEN": 10, "TWENTY": 20, "THIRTY": 30, "FORTY": 40, "FIFTY": 50}
@@ -24,27 +26,89 @@ def is_sorted(array):
 def load_data_from_file(file_path, container):
     with open(file_path, encoding="utf-8") as f:         # Open the file
 
-        value = 0
+        items, value = [], 0
         while True:
             line = f.readline()
             if not line:
                 break                      # line is empty so exit
             for word in line.split():
-                container.put(word, value)
+                items.append((word, value))
                 value += 1
+    put_items(container, items)
 
 
 def load_data_from_collection(collection, container):
 
     if type(collection) is dict:
-        for key in collection.keys():
-            container.put(key, collection[key])
+        put_items(container, collection.items())
 
     elif type(collection) is list:
         for item in collection:
             container.append(collection[item])
 
 
+def put_items(container, items):
+    ''' Insert the key-value pairs into container, in bulk if supported. '''
+    if hasattr(container, "put_many"):
+        container.put_many(items)
+    else:
+        for key, value in items:
+            container.put(key, value)
+
+
+def sorted_items(items, presorted, keep_none=False, key=None, intern=False):
+    """Returns the keys and values of the given pairs in ascending key order.
+
+    This is the bulk-loading step shared by the ordered symbol tables: the
+    pairs are sorted (unless presorted) and deduplicated, the last value
+    given for a key winning, as with put().
+
+    Args:
+        items    : an iterable of (key, value) pairs
+        presorted: True if the pairs are already in ascending key order
+        keep_none: keep pairs with None values instead of dropping them
+        key      : the function mapping keys to their comparison keys
+        intern   : intern the str keys and comparison keys
+    Returns:
+        a list of distinct keys, the list of their (last) values and the
+        list of their comparison keys (the keys themselves if key is None)
+    Raises:
+        ValueError: for a None key, or presorted pairs out of order
+    """
+    items = list(items)
+    for k, _ in items:          # before sorting, which would raise TypeError
+        if k is None:
+            raise ValueError("Can't insert 'None' in the table")
+    if intern:
+        items = [(sys.intern(k) if type(k) is str else k, v) for k, v in items]
+    if key is not None:
+        items = [(key(k), k, v) for k, v in items]
+        if intern:
+            items = [(sys.intern(c) if type(c) is str else c, k, v) for c, k, v in items]
+    if not presorted:
+        items.sort(key=itemgetter(0))       # stable, last value stays last
+    keys, values, ckeys = [], [], []
+    for item in items:      # (key, value) or (comparison key, key, value)
+        ckey, k, value = item[0], item[-2], item[-1]
+        if ckeys and not ckeys[-1] < ckey:
+            if ckey < ckeys[-1]:
+                raise ValueError("items are not sorted by key")
+            values[-1] = value
+            continue
+        keys.append(k)
+        values.append(value)
+        ckeys.append(ckey)
+    if not keep_none:
+        keep = [i for i, v in enumerate(values) if v is not None]
+        if len(keep) < len(values):
+            keys = [keys[i] for i in keep]
+            values = [values[i] for i in keep]
+            ckeys = [ckeys[i] for i in keep]
+    if key is None:
+        ckeys = keys
+    return keys, values, ckeys
+
+
 def display_st(ST):
     print(f"""\t{"keys(): "} \t{ST.keys()}""")
     print(f"""\t{"root.key: "} \t{ST.root.key}""")
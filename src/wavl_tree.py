@@ -0,0 +1,235 @@
+"""
+An ordered symbol table of key-value pairs backed by a weak AVL tree
+(https://en.wikipedia.org/wiki/WAVL_tree), a rank-balanced tree.
+
+Every node has an integer rank, kept where AVLTreeST keeps the height; a
+missing child has rank -1. The rank difference of a child is the rank of
+its parent minus its own, and the tree is balanced when every rank
+difference is 1 or 2 and every leaf has rank 0. A WAVL tree built by
+insertions alone is an AVL tree with the ranks as heights; deletions let
+ranks drift above the heights, which is what spares them the rotations:
+
+put():
+    A promotion may move up the path, and at most two rotations end the
+    rebalancing, as in an AVL tree.
+
+delete(), delete_min(), delete_max():
+    Demotions may move up the path, and at most two rotations end the
+    rebalancing, where an AVL tree may rotate at every level.
+
+Rebalancing takes amortized O(1) rank changes per update, and the height
+stays below 2 log n (and below 1.44 log n without deletions). The nodes
+keep their subtree sizes and aggregates, so the symbol table supports the
+operations of AVLTreeST, including the split and join based ones, whose
+join hangs a tree on the spine of the other by rank.
+"""
+from avl_tree import AVLTreeST
+
+
+class WAVLTreeST(AVLTreeST):
+    """Symbol table implementation using a weak AVL tree.
+
+    The height field of the nodes holds their rank; height() returns the
+    rank of the root, which bounds the height of the tree from above.
+    """
+
+    def height(self):
+        """Returns the rank of the root, -1 for an empty table.
+
+        The rank of a node is at least the height of its subtree, and at
+        most twice it.
+        """
+        return self._height(self.root)
+
+    def _rebalance_path(self, path, x, delta):
+        """Reattach x below the recorded path and restore the rank rule bottom-up.
+
+        Sizes and aggregates are recomputed on the whole path. Ranks are
+        fixed from the bottom up by promotions (after an insertion or a
+        join) or demotions (after a deletion), until a node satisfies the
+        rank rule or a rotation restores it for good.
+
+        Args:
+            path : the (node, went_left) pairs from the subtree root down to
+                   the parent of x
+            x    : the new child of the last node on the path
+            delta: the change in the number of keys
+        Returns:
+            The updated subtree
+        """
+        self._mod_count += 1
+        aggregated = self._aggregates is not None
+        for i in range(len(path) - 1, -1, -1):
+            p, went_left = path[i]
+            if went_left:
+                p.left = x
+            else:
+                p.right = x
+            p.size = 1 + self._size(p.left) + self._size(p.right)
+            if aggregated:
+                self._update_agg(p)
+            x, settled = self._fix_rank(p)
+            if settled:
+                if i == 0:
+                    return x
+                parent, went_left = path[i - 1]
+                if went_left:
+                    parent.left = x
+                else:
+                    parent.right = x
+                for j in range(i - 1, -1, -1):
+                    path[j][0].size += delta
+                    if aggregated:
+                        self._update_agg(path[j][0])
+                return path[0][0]
+        return x
+
+    def _fix_rank(self, z):
+        """Restores the rank rule at z, whose children all satisfy it.
+
+        Returns:
+            the root of the subtree, and False if the rank of z changed so
+            that its parent may violate the rank rule, or True otherwise
+        """
+        rz, left, right = z.height, z.left, z.right
+        dl = rz - self._height(left)
+        dr = rz - self._height(right)
+        if dl == 0 or dr == 0:          # a child is as high as z: promote or rotate
+            if dl + dr == 1:
+                z.height += 1
+                return z, False
+            return self._rotate_up(z, dl == 0), True
+        if left is None and right is None:
+            if rz == 0:
+                return z, True
+            z.height = 0                # a 2,2 leaf
+            return z, False
+        if dl == 3 or dr == 3:          # a child is too low: demote or rotate
+            y = right if dl == 3 else left
+            if rz - y.height == 2:
+                z.height -= 1
+                return z, False
+            inner, outer = (y.left, y.right) if dl == 3 else (y.right, y.left)
+            ry = y.height
+            if ry - self._height(inner) == 2 and ry - self._height(outer) == 2:
+                y = self._own(y)
+                y.height -= 1
+                if dl == 3:
+                    z.right = y
+                else:
+                    z.left = y
+                z.height -= 1
+                return z, False
+            return self._rotate_down(z, dl == 3, ry - self._height(outer) == 1), True
+        return z, True
+
+    def _rotate_up(self, z, left):
+        """Rotates the 0-child of z above it after an insertion or a join.
+
+        The 0-child, x, was just promoted, or hung by a join a rank above
+        the taller of its children, so it has a 1-child and a 2-child. One
+        rotation does if its inner child is the 2-child, two otherwise.
+
+        Args:
+            z   : the node with a child of its own rank, and a 2-child
+            left: True if the 0-child is the left child of z
+        Returns:
+            the root of the rebalanced subtree
+        """
+        x = z.left if left else z.right
+        inner = x.right if left else x.left
+        rx, rz = x.height, z.height
+        if rx - self._height(inner) == 2:
+            root = self._rotate_right(z) if left else self._rotate_left(z)
+            root.height = rx
+            (root.right if left else root.left).height = rz - 1
+            return root
+        ry = inner.height
+        if left:
+            z.left = self._rotate_left(x)
+            root = self._rotate_right(z)
+        else:
+            z.right = self._rotate_right(x)
+            root = self._rotate_left(z)
+        root.height = ry + 1
+        (root.left if left else root.right).height = rx - 1
+        (root.right if left else root.left).height = rz - 1
+        return root
+
+    def _rotate_down(self, z, right, single):
+        """Rotates the 1-child of z above it after a deletion.
+
+        Args:
+            z     : the node with a 3-child and a 1-child, y
+            right : True if y is the right child of z
+            single: True if the outer child of y is a 1-child, so that one
+                    rotation does; otherwise the inner child of y, a
+                    1-child, becomes the root by a double rotation
+        Returns:
+            the root of the rebalanced subtree
+        """
+        y = z.right if right else z.left
+        ry, rz = y.height, z.height
+        if single:
+            root = self._rotate_left(z) if right else self._rotate_right(z)
+            root.height = ry + 1
+            z = root.left if right else root.right
+            z.height = 0 if z.left is None and z.right is None else rz - 1
+            return root
+        rv = (y.left if right else y.right).height
+        if right:
+            z.right = self._rotate_right(y)
+            root = self._rotate_left(z)
+        else:
+            z.left = self._rotate_left(y)
+            root = self._rotate_right(z)
+        root.height = rv + 2
+        (root.right if right else root.left).height = ry - 1
+        (root.left if right else root.right).height = rz - 2
+        return root
+
+    # ****************** Check internal invariants of the tree *****************#
+    def _is_node_consistent(self, x, smaller, larger):
+        """Check the invariants of a single node against its children.
+
+        Args:
+            x      : the subtree
+            smaller: the comparison key x.ckey must be larger than, or None
+            larger : the comparison key x.ckey must be smaller than, or None
+
+        Returns:
+            True if the node is consistent or False otherwise.
+        """
+        if x is None:
+            return True
+        if smaller is not None and x.ckey <= smaller:
+            return False
+        if larger is not None and x.ckey >= larger:
+            return False
+        if x.left is not None and not x.left.ckey < x.ckey:
+            return False
+        if x.right is not None and not x.ckey < x.right.ckey:
+            return False
+        return (
+            x.size == 1 + self._size(x.left) + self._size(x.right)
+            and self._is_rank_rule(x)
+            and (self._aggregates is None or x.agg == self._node_agg(x))
+        )
+
+    def _is_rank_rule(self, x):
+        """ Check the rank differences of the children of x, and leaf ranks. """
+        dl = x.height - self._height(x.left)
+        dr = x.height - self._height(x.right)
+        if x.left is None and x.right is None:
+            return x.height == 0
+        return dl in (1, 2) and dr in (1, 2)
+
+    def is_AVL(self):
+        """Check if the rank rule of the weak AVL tree holds at every node.
+
+        Returns:
+            True if the rank rule is consistent or False otherwise.
+        """
+        nodes = []
+        self._nodes_inorder(self.root, nodes)
+        return all(self._is_rank_rule(x) for x in nodes)
@@ -0,0 +1,85 @@
+import pytest
+
+from avl_tree import AVLTreeST
+
+
+class CorruptingSuccessorPath(AVLTreeST):
+    """ Breaks the size of the node after the successor of a deleted key. """
+
+    def _delete(self, x, key):
+        root = super()._delete(x, key)
+        x, target = root, self._ckey(self.victim)
+        while x is not None and x.ckey != target:
+            x = x.left if target < x.ckey else x.right
+        if x is not None:
+            x.size += 1
+        return root
+
+
+class CorruptingBuild(AVLTreeST):
+    """ Breaks the order of the deepest leftmost node of every rebuild. """
+
+    def _build(self, keys, values, low, high, ckeys=None):
+        root = super()._build(keys, values, low, high, ckeys)
+        if root is not None and low == 0 and high == len(keys) - 1 and root.left:
+            x = root
+            while x.left is not None:
+                x = x.left
+            x.key = x.ckey = 10**9
+        return root
+
+
+def test_path_validation_covers_the_successor_path():
+    st = CorruptingSuccessorPath.from_items([(k, k) for k in range(31)],
+                                            validation="off")
+    x = st.root                             # two children, successor deep
+    successor = st.select(st.rank(x.key) + 1)
+    st.victim = st.select(st.rank(x.key) + 2)
+    st.validation = "path"
+    with pytest.raises(AssertionError):
+        st.delete(x.key)
+    assert successor is not None
+
+
+@pytest.mark.parametrize("validation", ["path", "full"])
+def test_bulk_rebuilds_are_fully_validated(validation):
+    with pytest.raises(AssertionError):
+        CorruptingBuild.from_items([(k, k) for k in range(31)], validation=validation)
+    st = CorruptingBuild(validation=validation)
+    st.put(-1, -1)
+    with pytest.raises(AssertionError):
+        st.put_many([(k, k) for k in range(31)])
+
+
+def test_path_validation_passes_bulk_operations():
+    st = AVLTreeST.from_items([(k, k) for k in range(1000)], validation="path")
+    for k in range(0, 1000, 7):
+        st.delete(k)
+    assert st.delete_range(100, 200) == sum(1 for k in range(100, 200) if k % 7)
+    st.pop_min(5)
+    st.pop_max(5)
+    low, high = st.split(500)
+    joined = AVLTreeST.join(low, high)
+    assert joined.checked()
+
+
+def test_delete_range_and_pops_return_counts_by_default():
+    st = AVLTreeST.from_items([(k, -k) for k in range(100)])
+    assert st.delete_range(10, 20) == 10
+    assert st.pop_min(3) == 3 and st.pop_max(3) == 3
+    assert st.delete_range(30, 33, (False, True), items=True) == [(31, -31), (32, -32),
+                                                                  (33, -33)]
+    assert st.pop_min(2, items=True) == [(3, -3), (4, -4)]
+    assert st.pop_max(2, items=True) == [(96, -96), (95, -95)]
+    assert st.delete_range(50, 40) == 0
+    assert st.size() == 100 - 10 - 6 - 3 - 4 and st.checked()
+
+
+@pytest.mark.parametrize("low, high, inclusive", [(None, 5, (True, False)),
+                                                  (5, None, (True, False)),
+                                                  (1, 5, (True,))])
+def test_delete_range_rejects_bad_bounds(low, high, inclusive):
+    st = AVLTreeST.from_items([(k, k) for k in range(10)])
+    with pytest.raises(ValueError):
+        st.delete_range(low, high, inclusive)
+    assert st.size() == 10
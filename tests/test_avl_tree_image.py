@@ -0,0 +1,61 @@
+import pytest
+
+from avl_tree import AVLTreeST
+
+
+def negated(key):
+    return -key
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "table.avl"
+    st = AVLTreeST.from_items((f"k{i:03d}", i) for i in range(100))
+    st.dump(path)
+    assert list(AVLTreeST.load(path).iter_items()) == list(st.iter_items())
+    with AVLTreeST.open_mmap(path) as mapped:
+        assert mapped.keys() == st.keys()
+        assert mapped.get("k042") == 42 and mapped.get("k1000") is None
+
+
+def test_round_trip_with_key_function(tmp_path):
+    path = tmp_path / "table.avl"
+    st = AVLTreeST(key=negated)
+    for k in range(10):
+        st.put(k, k * 10)
+    st.dump(path)
+    loaded = AVLTreeST.load(path, key=negated)
+    assert list(loaded.iter_items()) == list(st.iter_items())
+    assert loaded.checked()
+    with AVLTreeST.open_mmap(path, key=negated) as mapped:
+        assert [mapped.get(k) for k in range(10)] == [k * 10 for k in range(10)]
+        assert mapped.get(10) is None
+        assert mapped.keys() == st.keys()
+        for k in (-1, 0, 4.5, 9, 10):
+            assert mapped.rank(k) == st.rank(k)
+            assert mapped.floor(k) == st.floor(k)
+            assert mapped.ceiling(k) == st.ceiling(k)
+        assert mapped.keys_inrange(7, 2) == st.keys_inrange(7, 2)
+        assert mapped.size_inrange(7, 2) == st.size_inrange(7, 2)
+
+
+def test_key_function_must_match_image(tmp_path):
+    keyed, plain = tmp_path / "keyed.avl", tmp_path / "plain.avl"
+    AVLTreeST.from_items([(1, 1), (2, 2)], key=negated).dump(keyed)
+    AVLTreeST.from_items([(1, 1), (2, 2)]).dump(plain)
+    with pytest.raises(ValueError):
+        AVLTreeST.load(keyed)
+    with pytest.raises(ValueError):
+        AVLTreeST.open_mmap(keyed)
+    with pytest.raises(ValueError):
+        AVLTreeST.load(plain, key=negated)
+
+
+def test_empty_image_min_max_raise_like_the_tree(tmp_path):
+    path = tmp_path / "empty.avl"
+    AVLTreeST().dump(path)
+    with AVLTreeST.open_mmap(path) as mapped:
+        for method in ("min", "max"):
+            with pytest.raises(RuntimeError):
+                getattr(mapped, method)()
+            with pytest.raises(RuntimeError):
+                getattr(AVLTreeST(), method)()
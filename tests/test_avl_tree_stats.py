@@ -0,0 +1,50 @@
+import pytest
+
+from avl_tree import AVLTreeST
+from avl_tree_stats import InstrumentedAVLTreeST
+
+
+def negated(key):
+    return -key
+
+
+@pytest.mark.parametrize("key", [None, negated])
+def test_dump_and_load(tmp_path, key):
+    path = tmp_path / "table.avl"
+    st = InstrumentedAVLTreeST(key=key)
+    for k in range(20):
+        st.put(k, str(k))
+    st.dump(path)
+    for cls in (AVLTreeST, InstrumentedAVLTreeST):
+        loaded = cls.load(path, key=key)
+        assert list(loaded.iter_items()) == list(st.iter_items())
+        assert loaded.checked()
+    with AVLTreeST.open_mmap(path, key=key) as mapped:
+        assert mapped.keys() == st.keys()
+        assert mapped.get(7) == "7"
+
+
+@pytest.mark.parametrize("key", [None, negated])
+def test_freeze_and_thaw(key):
+    st = InstrumentedAVLTreeST(key=key)
+    for k in range(20):
+        st.put(k, str(k))
+    frozen = st.freeze()
+    assert frozen.keys() == st.keys()
+    assert frozen.get(7) == "7" and frozen.rank(7) == st.rank(7)
+    thawed = frozen.thaw()
+    assert type(thawed) is AVLTreeST
+    assert list(thawed.iter_items()) == list(st.iter_items())
+    assert thawed.checked()
+    thawed.put(100, "100")
+    assert thawed.get(100) == "100"
+
+
+def test_counts_operations():
+    st = InstrumentedAVLTreeST(validation="off")
+    for k in range(100):
+        st.put(k, k)
+    st.reset_stats()
+    st.get(42)
+    stats = st.stats()["get"]
+    assert stats["calls"] == 1 and stats["comparisons"] > 0 and stats["visits"] > 0
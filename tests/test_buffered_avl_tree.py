@@ -0,0 +1,28 @@
+import pytest
+
+from buffered_avl_tree import BufferedAVLTreeST
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_cursor_write_replaces_buffered_write(persistent):
+    st = BufferedAVLTreeST.from_items([(k, k) for k in range(100)], buffer_size=1000,
+                                      persistent=persistent)
+    cursor = st.seek(10)
+    st.put(10, "buffered")
+    st.delete(11)
+    assert st.get(10) == "buffered" and st.pending == 2
+    cursor.value = "cursor"
+    assert st.get(10) == "cursor" and st.pending == 1
+    st.flush()
+    assert st.get(10) == "cursor" and not st.contains(11)
+
+
+def test_cursors_flush_first():
+    st = BufferedAVLTreeST(buffer_size=1000)
+    st.put_many((k, k) for k in range(10))
+    assert st.pending == 10
+    assert st.first().key == 0 and st.last().key == 9 and st.seek(4.5).key == 5
+    assert st.pending == 0
+    cursor = st.first()
+    cursor.value = "zero"
+    assert st.get(0) == "zero"
@@ -0,0 +1,131 @@
+import sys
+import threading
+
+import pytest
+
+from concurrent_avl_tree import ConcurrentAVLTreeST, ReadWriteLock
+
+WRITERS, READERS, KEYS_PER_WRITER = 3, 4, 1500
+TIMEOUT = 60
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """ Switch threads often, so that readers interleave with every write. """
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(targets):
+    """ Runs the targets in threads and returns the exceptions they raised. """
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except BaseException as e:  # reported by the test thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(t,)) for t in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive(), "thread still running, deadlock?"
+    return errors
+
+
+def writer_keys(w):
+    """ The keys writer w inserts, in this order. """
+    return range(w, WRITERS * KEYS_PER_WRITER, WRITERS)
+
+
+@pytest.mark.parametrize("snapshot_reads", [False, True])
+def test_readers_and_writers(snapshot_reads):
+    st = ConcurrentAVLTreeST(snapshot_reads=snapshot_reads, validation="off")
+    done = threading.Event()
+
+    def write(w):
+        keys = list(writer_keys(w))
+        for i, key in enumerate(keys):
+            if i % 10 == 0:
+                st.put_many([(k, k) for k in keys[i:i + 5]])
+            else:
+                st.put(key, key)
+        # writing the same pairs again changes nothing a reader can see
+        st.put_many([(k, k) for k in keys])
+
+    def check_view(view, last_size):
+        assert view.checked()
+        size = view.size()
+        assert size >= last_size
+        keys = view.keys()
+        assert len(keys) == size
+        for w in range(WRITERS):
+            mine = [k for k in keys if k % WRITERS == w]
+            # each writer inserts its keys in order, so a view holds a prefix
+            assert mine == list(writer_keys(w))[:len(mine)]
+        return size
+
+    def read():
+        seen, last_size, rounds = set(), 0, 0
+        while not done.is_set() or rounds < 2:
+            rounds += 1
+            if snapshot_reads:
+                last_size = check_view(st.snapshot(), last_size)
+            else:
+                assert st.checked()
+                size = st.size()
+                assert size >= last_size
+                last_size = size
+            for key in range(rounds % 7, WRITERS * KEYS_PER_WRITER, 37):
+                value = st.get(key)
+                if key in seen:
+                    assert value == key, f"{key} disappeared"
+                elif value is not None:
+                    assert value == key
+                    seen.add(key)
+
+    writers = [lambda w=w: write(w) for w in range(WRITERS)]
+
+    def write_all():
+        try:
+            assert not run_threads(writers)
+        finally:
+            done.set()
+
+    errors = run_threads([write_all] + [read] * READERS)
+    assert not errors, errors[0]
+    expected = list(range(WRITERS * KEYS_PER_WRITER))
+    assert st.keys() == expected
+    assert all(st.get(k) == k for k in expected)
+    assert st.checked()
+
+
+def test_read_write_lock_excludes_writers():
+    lock = ReadWriteLock()
+    state = {"a": 0, "b": 0, "readers": 0}
+    guard = threading.Lock()
+
+    def write():
+        for _ in range(2000):
+            with lock.write_locked():
+                assert state["readers"] == 0
+                state["a"] += 1
+                state["b"] += 1
+
+    def read():
+        for _ in range(2000):
+            with lock.read_locked():
+                with guard:
+                    state["readers"] += 1
+                assert state["a"] == state["b"]
+                with guard:
+                    state["readers"] -= 1
+
+    errors = run_threads([write] * 2 + [read] * 4)
+    assert not errors, errors[0]
+    assert state["a"] == state["b"] == 4000
+    assert state["readers"] == 0
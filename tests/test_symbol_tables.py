@@ -0,0 +1,55 @@
+from random import Random
+
+import pytest
+
+from bplus_tree import BPlusTreeST
+from symbol_tables import BACKENDS, check_conformance, new_symbol_table
+
+# Small pages make the B+-tree split and merge after a few keys.
+OPTIONS = {"bplus": {"page_size": 256}}
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+@pytest.mark.parametrize("validation", ["off", "full"])
+def test_conformance(backend, validation):
+    options = dict(OPTIONS.get(backend, {}), validation=validation)
+    check_conformance(backend, options, operations=3000)
+
+
+@pytest.mark.parametrize("validation", ["off", "full"])
+def test_bplus_conformance_with_a_small_cache(validation):
+    # A cache of a few pages evicts, writes back and rereads pages constantly.
+    options = {"page_size": 256, "cache_bytes": 4 * 256, "validation": validation}
+    check_conformance("bplus", options, operations=3000)
+
+
+def test_bplus_close_and_reopen(tmp_path):
+    path, rnd, model = tmp_path / "table.bpt", Random(7), {}
+    for session in range(4):
+        with BPlusTreeST(path, page_size=256, cache_bytes=4 * 256) as st:
+            assert list(st.iter_items()) == sorted(model.items())
+            assert st.checked()
+            for step in range(500):
+                key = rnd.randrange(300)
+                if rnd.random() < 0.7:
+                    st.put(key, (session, step))
+                    model[key] = (session, step)
+                else:
+                    st.delete(key)
+                    model.pop(key, None)
+    with BPlusTreeST(path) as st:
+        assert st.page_size == 256 and st.size() == len(model)
+        assert list(st.iter_items()) == sorted(model.items())
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_new_symbol_table(backend):
+    items = [(k, str(k)) for k in range(50, 0, -1)]
+    st = new_symbol_table(backend, items, **OPTIONS.get(backend, {}))
+    assert st.keys() == list(range(1, 51))
+    assert st.get(7) == "7"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        new_symbol_table("skip-list")